@@ -0,0 +1,81 @@
+from dataclasses import dataclass, fields, replace
+import numpy as np
+
+from calculations.disc import DiscInput, calculate_disc_batch
+
+# Searches outer diameter, inner/outer diameter ratio and thickness for the
+# lightest disc that meets a temperature-rise limit and a safety-factor target.
+# Every round scores a whole block of candidates through calculate_disc_batch,
+# then shrinks the search box around the lightest feasible disc found so far.
+
+SEARCH_VARIABLES = ('max_outer_diameter', 'inner_diameter_ratio', 'initial_disc_thickness')
+
+@dataclass
+class DiscOptimizationResult:
+    candidates_evaluated: int
+    feasible_candidates: int
+    best: dict    # lightest feasible candidate: inputs and outputs, or None
+    pareto: dict  # feasible mass vs. temp_rise front, sorted by disc_mass
+
+def pareto_front(mass: np.ndarray, temp_rise: np.ndarray) -> np.ndarray:
+    # Indices of the candidates no other candidate beats on both mass and temperature rise
+    order = np.lexsort((temp_rise, mass))
+    sorted_temp = temp_rise[order]
+    best_so_far = np.minimum.accumulate(sorted_temp)
+    keep = np.empty(order.size, dtype=bool)
+    keep[:1] = True
+    keep[1:] = sorted_temp[1:] < best_so_far[:-1]
+    return order[keep]
+
+def optimize_disc(base: DiscInput, max_temp_rise: float, min_safety_factor: float,
+                  outer_diameter_range: tuple = None, inner_ratio_range: tuple = (0.5, 0.75),
+                  thickness_range: tuple = (3.0, 8.0), candidates_per_round: int = 20_000,
+                  rounds: int = 6, shrink: float = 0.5, max_front_points: int = 200, seed=None) -> DiscOptimizationResult:
+    # outer_diameter_range defaults to 50%-100% of base.max_outer_diameter (the packaging limit)
+    if outer_diameter_range is None:
+        outer_diameter_range = (0.5 * base.max_outer_diameter, base.max_outer_diameter)
+    bounds = np.array([outer_diameter_range, inner_ratio_range, thickness_range], dtype=float)
+    low, high = bounds[:, 0].copy(), bounds[:, 1].copy()
+    rng = np.random.default_rng(seed)
+    fixed = {field.name: getattr(base, field.name) for field in fields(DiscInput) if field.name not in SEARCH_VARIABLES}
+
+    kept = []
+    evaluated = 0
+    best_point = None
+    for _ in range(rounds):
+        points = low + rng.random((candidates_per_round, len(SEARCH_VARIABLES))) * (high - low)
+        columns = {**fixed, **dict(zip(SEARCH_VARIABLES, points.T))}
+        table = calculate_disc_batch(columns)
+        evaluated += candidates_per_round
+        feasible = (table['temp_rise'] <= max_temp_rise) & (table['safety_factor'] >= min_safety_factor) & (table['disc_mass'] > 0)
+        if feasible.any():
+            kept.append({**{name: points[feasible, i] for i, name in enumerate(SEARCH_VARIABLES)},
+                         **{name: np.asarray(value)[feasible] for name, value in table.items()}})
+            lightest = np.argmin(np.where(feasible, table['disc_mass'], np.inf))
+            if best_point is None or table['disc_mass'][lightest] < best_point[1]:
+                best_point = (points[lightest], table['disc_mass'][lightest])
+        if best_point is not None:
+            # Bounded refinement: re-centre a smaller box on the incumbent, clipped to the original bounds
+            half_width = (high - low) * shrink / 2
+            low = np.maximum(bounds[:, 0], best_point[0] - half_width)
+            high = np.minimum(bounds[:, 1], best_point[0] + half_width)
+
+    if not kept:
+        return DiscOptimizationResult(evaluated, 0, None, {})
+    pool = {name: np.concatenate([block[name] for block in kept]) for name in kept[0]}
+    front = pareto_front(pool['disc_mass'], pool['temp_rise'])
+    # For a single-stop energy balance nearly every feasible disc is on the front, so thin it evenly
+    if front.size > max_front_points:
+        front = front[np.linspace(0, front.size - 1, max_front_points).round().astype(int)]
+    lightest = int(np.argmin(pool['disc_mass']))
+    best = {name: float(column[lightest]) for name, column in pool.items()}
+    return DiscOptimizationResult(
+        candidates_evaluated=evaluated,
+        feasible_candidates=len(pool['disc_mass']),
+        best=best,
+        pareto={name: column[front] for name, column in pool.items()},
+    )
+
+def optimized_disc_input(base: DiscInput, result: DiscOptimizationResult) -> DiscInput:
+    # The base input with the optimizer's lightest feasible geometry applied
+    return replace(base, **{name: result.best[name] for name in SEARCH_VARIABLES})
@@ -0,0 +1,145 @@
+import warnings
+from dataclasses import dataclass
+import numpy as np
+
+from calculations.brakepad import BrakePadInput
+from calculations.results import quantity
+
+# Lumped-capacity brake heating over a speed-time trace. Every step, the kinetic
+# energy lost while slowing down goes into the brakes (rolling and aero losses
+# are ignored, which is conservative), split between disc and pads. Each body
+# cools by convection with a coefficient that grows with road speed:
+#
+#     theta[k+1] = exp(-h_k A dt / (m c)) * theta[k] + q_k / (m c)
+#
+# where theta is the temperature above ambient. This linear recurrence is
+# solved in closed form with cumulative sums, for all candidates and a whole
+# block of time steps at once, so no per-sample Python loop is involved.
+
+MAX_BLOCK_ELEMENTS = 4_000_000  # candidates x time steps held in memory at once
+MAX_BLOCK_DECAY = 600.0         # keeps exp(cumulative decay) inside float64 range
+
+@dataclass
+class DriveCycleResult:
+    samples: int
+    duration: float = quantity('s')
+    distance: float = quantity('km')
+    braking_energy_per_disc: float = quantity('kJ')
+    peak_disc_temperature: np.ndarray = quantity('°C')
+    final_disc_temperature: np.ndarray = quantity('°C')
+    steady_state_disc_temperature: np.ndarray = quantity('°C')
+    time_above_fade: np.ndarray = quantity('s')
+    peak_pad_temperature: float = quantity('°C')
+    steady_state_pad_temperature: float = quantity('°C')
+    pad_wear: float = quantity('mm')
+    pad_remaining: float = quantity('mm')
+
+def read_speed_trace(path: str, chunk_size: int = 1_000_000):
+    # Yields speed chunks (km/h) from a .npy file (memory-mapped) or a one-column text/CSV file
+    if path.endswith('.npy'):
+        speeds = np.load(path, mmap_mode='r')
+        for start in range(0, len(speeds), chunk_size):
+            yield np.array(speeds[start:start + chunk_size], dtype=float)
+        return
+    with open(path) as trace:
+        while True:
+            with warnings.catch_warnings():
+                # loadtxt warns when it reaches the end of the file
+                warnings.simplefilter('ignore', UserWarning)
+                chunk = np.loadtxt(trace, delimiter=',', max_rows=chunk_size, ndmin=1)
+            if chunk.size == 0:
+                return
+            yield chunk
+
+def disc_thermal_properties(disc_table: dict) -> tuple:
+    # Mass (kg) and convective area of both faces (m²) from a calculate_disc_batch table
+    outer_m = np.asarray(disc_table['outer_diameter']) / 1000
+    inner_m = np.asarray(disc_table['inner_diameter']) / 1000
+    return np.asarray(disc_table['disc_mass'], dtype=float), 2 * np.pi / 4 * (outer_m**2 - inner_m**2)
+
+def _integrate(theta0: np.ndarray, decay: np.ndarray, rise: np.ndarray) -> np.ndarray:
+    # theta0: (c,), decay/rise: (c, n) -> theta after every step, (c, n)
+    cumulative = np.cumsum(decay, axis=1)
+    with np.errstate(over='ignore'):
+        growth = np.exp(cumulative)
+    return (theta0[:, None] + np.cumsum(rise * growth, axis=1)) / growth
+
+def simulate_drive_cycle(speed_chunks, dt: float, pad: BrakePadInput, disc_mass, disc_specific_heat,
+                         disc_cooling_area, number_of_discs: int = 1, disc_heat_fraction: float = 0.9,
+                         pad_mass: float = 0.15, pad_specific_heat: float = 1000.0,
+                         ambient_temperature: float = 25.0, h_static: float = 10.0, h_per_speed: float = 4.0,
+                         fade_temperature: float = 400.0, steady_window: float = 60.0) -> DriveCycleResult:
+    # speed_chunks: iterable of km/h arrays sampled every dt seconds (e.g. read_speed_trace()).
+    # disc_*: scalars or (candidates,) arrays, e.g. from disc_thermal_properties().
+    # The vehicle mass, pad area (cm²), wear rate (mm/1000 km) and thickness come from pad.
+    disc_mass, disc_specific_heat, disc_cooling_area = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(disc_mass, dtype=float)),
+        np.atleast_1d(np.asarray(disc_specific_heat, dtype=float)),
+        np.atleast_1d(np.asarray(disc_cooling_area, dtype=float)))
+    candidates = disc_mass.size
+    disc_capacity = (disc_mass * disc_specific_heat)[:, None]
+    pad_capacity = pad_mass * pad_specific_heat
+    pad_area_m2 = pad.pad_area / 10000
+    window_steps = max(1, int(round(steady_window / dt)))
+
+    disc_theta = np.zeros(candidates)
+    pad_theta = np.zeros(1)
+    disc_peak = np.zeros(candidates)
+    pad_peak = 0.0
+    time_above_fade = np.zeros(candidates)
+    disc_tail = np.empty((candidates, 0))
+    pad_tail = np.empty((1, 0))
+    previous_speed = None
+    samples = 0
+    distance_m = 0.0
+    braking_energy = 0.0
+
+    for chunk in speed_chunks:
+        speed_ms = np.asarray(chunk, dtype=float) * 1000 / 3600
+        if speed_ms.size == 0:
+            continue
+        samples += speed_ms.size
+        distance_m += speed_ms.sum() * dt
+        # Energy released between consecutive samples, including across chunk boundaries
+        start_speed = np.concatenate(([speed_ms[0] if previous_speed is None else previous_speed], speed_ms[:-1]))
+        previous_speed = speed_ms[-1]
+        heat = np.maximum(0.0, 0.5 * pad.total_mass * (start_speed**2 - speed_ms**2)) / number_of_discs
+        braking_energy += heat.sum()
+        h = h_static + h_per_speed * speed_ms
+
+        block = max(1, MAX_BLOCK_ELEMENTS // candidates)
+        for start in range(0, speed_ms.size, block):
+            h_block = h[start:start + block]
+            heat_block = heat[start:start + block]
+            disc_decay = h_block[None, :] * disc_cooling_area[:, None] * dt / disc_capacity
+            pad_decay = (h_block * pad_area_m2 * dt / pad_capacity)[None, :]
+            # Split further where the cumulative decay would overflow exp()
+            worst_step = max(disc_decay.max(), pad_decay.max(), 1e-300)
+            step = max(1, int(MAX_BLOCK_DECAY / worst_step))
+            for sub in range(0, h_block.size, step):
+                part = slice(sub, sub + step)
+                disc_history = _integrate(disc_theta, disc_decay[:, part], disc_heat_fraction * heat_block[None, part] / disc_capacity)
+                pad_history = _integrate(pad_theta, pad_decay[:, part], (1 - disc_heat_fraction) * heat_block[None, part] / pad_capacity)
+                disc_theta, pad_theta = disc_history[:, -1], pad_history[:, -1]
+                disc_peak = np.maximum(disc_peak, disc_history.max(axis=1))
+                pad_peak = max(pad_peak, float(pad_history.max()))
+                time_above_fade += (disc_history + ambient_temperature > fade_temperature).sum(axis=1) * dt
+                disc_tail = np.concatenate([disc_tail, disc_history[:, -window_steps:]], axis=1)[:, -window_steps:]
+                pad_tail = np.concatenate([pad_tail, pad_history[:, -window_steps:]], axis=1)[:, -window_steps:]
+
+    distance_km = distance_m / 1000
+    pad_wear = distance_km * pad.pad_wear_rate / 1000
+    return DriveCycleResult(
+        samples=samples,
+        duration=samples * dt,
+        distance=distance_km,
+        braking_energy_per_disc=braking_energy / 1000,
+        peak_disc_temperature=disc_peak + ambient_temperature,
+        final_disc_temperature=disc_theta + ambient_temperature,
+        steady_state_disc_temperature=(disc_tail.mean(axis=1) if disc_tail.size else disc_theta) + ambient_temperature,
+        time_above_fade=time_above_fade,
+        peak_pad_temperature=pad_peak + ambient_temperature,
+        steady_state_pad_temperature=float(pad_tail.mean() if pad_tail.size else pad_theta[0]) + ambient_temperature,
+        pad_wear=pad_wear,
+        pad_remaining=max(0.0, pad.pad_thickness - pad_wear),
+    )
@@ -0,0 +1,204 @@
+from dataclasses import dataclass
+import numpy as np
+
+from calculations.results import quantity
+
+# Load histories are reduced to cycles by rainflow counting, each cycle's
+# amplitude is corrected for its mean stress (Goodman or Soderberg) and the
+# damage is summed with Miner's rule against a Shigley S-N line running from
+# 0.9 Su at 10³ cycles to the endurance limit at 10⁶ cycles.
+
+@dataclass
+class FatigueMaterial:
+    ultimate_strength: float            # MPa
+    yield_strength: float               # MPa
+    endurance_limit: float = None       # MPa, defaults to 0.5 Su
+
+    def __post_init__(self):
+        if self.endurance_limit is None:
+            self.endurance_limit = 0.5 * self.ultimate_strength
+
+@dataclass
+class FatigueResult:
+    cycles_counted: float
+    damage: float                                   # Miner sum for the history analysed
+    life_repeats: float                             # times the history can be repeated before failure
+    life_hours: float = quantity('h')               # when the history duration is known
+    max_stress_amplitude: float = quantity('MPa')
+    max_stress_mean: float = quantity('MPa')
+    fatigue_safety_factor: float = quantity('')     # against the worst counted cycle
+
+# --- Rainflow counting ---
+def _reversals(series: np.ndarray) -> np.ndarray:
+    # Peaks and valleys, keeping the first and last points
+    if series.size < 3:
+        return series
+    series = series[np.concatenate(([True], np.diff(series) != 0))]
+    slope = np.sign(np.diff(series))
+    turning = np.concatenate(([True], slope[1:] != slope[:-1], [True]))
+    return series[turning]
+
+def _extract_cycles(points: np.ndarray) -> tuple:
+    # Four-point rule: a range no larger than both of its neighbours closes a
+    # cycle and its two points are removed. Non-adjacent candidates are removed
+    # together, so each pass is one vectorized sweep over the reversals.
+    ranges, means = [], []
+    while points.size >= 4:
+        span = np.abs(np.diff(points))
+        closes = (span[1:-1] <= span[:-2]) & (span[1:-1] <= span[2:])
+        if not closes.any():
+            break
+        closes[1:] &= ~closes[:-1]
+        start = np.flatnonzero(closes) + 1
+        ranges.append(span[start])
+        means.append((points[start] + points[start + 1]) / 2)
+        keep = np.ones(points.size, dtype=bool)
+        keep[start] = keep[start + 1] = False
+        points = points[keep]
+    if not ranges:
+        return np.empty(0), np.empty(0), points
+    return np.concatenate(ranges), np.concatenate(means), points
+
+def rainflow(chunks, close_residue: bool = False):
+    # Yields (ranges, means, counts) per chunk of an arbitrarily long history.
+    # Only the residue of unclosed reversals is carried between chunks, so
+    # memory is bounded by the chunk size. The final residue is counted as half
+    # cycles, or, with close_residue, as the full cycles of a repeating history.
+    residue = np.empty(0)
+    for chunk in chunks:
+        points = _reversals(np.concatenate((residue, np.asarray(chunk, dtype=float).ravel())))
+        ranges, means, residue = _extract_cycles(points)
+        if ranges.size:
+            yield ranges, means, np.ones(ranges.size)
+    if close_residue and residue.size:
+        # Rotate the residue to start at its largest excursion and repeat it once
+        start = int(np.argmax(np.abs(residue - residue.mean())))
+        loop = np.concatenate((residue[start:], residue[:start], residue[start:start + 1]))
+        ranges, means, residue = _extract_cycles(_reversals(loop))
+        if ranges.size:
+            yield ranges, means, np.ones(ranges.size)
+    if residue.size >= 2:
+        yield np.abs(np.diff(residue)), (residue[1:] + residue[:-1]) / 2, np.full(residue.size - 1, 0.5)
+
+# --- Damage ---
+MEAN_STRESS_METHODS = ('goodman', 'soderberg')
+
+def equivalent_amplitude(amplitude, mean, material: FatigueMaterial, method: str = 'goodman') -> np.ndarray:
+    # Fully reversed amplitude with the same life; compressive means get no credit
+    if method not in MEAN_STRESS_METHODS:
+        raise ValueError(f'Unknown mean stress method: {method}')
+    strength = material.ultimate_strength if method == 'goodman' else material.yield_strength
+    margin = 1 - np.maximum(mean, 0) / strength
+    with np.errstate(divide='ignore'):
+        return np.where(margin > 0, amplitude / np.maximum(margin, 0), np.inf)
+
+def cycles_to_failure(equivalent: np.ndarray, material: FatigueMaterial) -> np.ndarray:
+    low_cycle = 0.9 * material.ultimate_strength
+    exponent = -np.log10(low_cycle / material.endurance_limit) / 3
+    coefficient = low_cycle**2 / material.endurance_limit
+    with np.errstate(divide='ignore', over='ignore'):
+        life = (equivalent / coefficient)**(1 / exponent)
+    return np.where(equivalent < material.endurance_limit, np.inf, life)
+
+def fatigue_life(stress_chunks, material: FatigueMaterial, method: str = 'goodman', close_residue: bool = False,
+                 history_hours: float = None) -> FatigueResult:
+    # stress_chunks: iterable of stress arrays (MPa) forming one history
+    counted = damage = 0.0
+    worst_equivalent = worst_amplitude = worst_mean = 0.0
+    safety_factor = np.inf
+    strength = material.ultimate_strength if method == 'goodman' else material.yield_strength
+    for ranges, means, counts in rainflow(stress_chunks, close_residue):
+        amplitude = ranges / 2
+        equivalent = equivalent_amplitude(amplitude, means, material, method)
+        damage += float(np.sum(counts / cycles_to_failure(equivalent, material)))
+        counted += float(counts.sum())
+        worst = int(np.argmax(equivalent))
+        if equivalent[worst] >= worst_equivalent:
+            worst_equivalent = float(equivalent[worst])
+            worst_amplitude, worst_mean = float(amplitude[worst]), float(means[worst])
+        with np.errstate(divide='ignore'):
+            cycle_factor = 1 / (amplitude / material.endurance_limit + np.maximum(means, 0) / strength)
+        safety_factor = min(safety_factor, float(cycle_factor.min()))
+    life_repeats = 1 / damage if damage > 0 else np.inf
+    return FatigueResult(
+        cycles_counted=counted,
+        damage=damage,
+        life_repeats=life_repeats,
+        life_hours=life_repeats * history_hours if history_hours is not None else np.nan,
+        max_stress_amplitude=worst_amplitude,
+        max_stress_mean=worst_mean,
+        fatigue_safety_factor=safety_factor,
+    )
+
+# --- Components ---
+# Nominal stress (MPa) per newton of load, from the sized geometry and the
+# same section models the sizing functions use.
+
+def _rod_stress(inputs, outputs) -> float:
+    # I-section shank, area 11 t²; rod forces are compression-positive, stresses tension-positive
+    return -1 / (11 * outputs.web_and_flange_thickness**2)
+
+def _wrist_pin_stress(inputs, outputs) -> float:
+    # Bending of a pin simply supported between the bosses
+    outer, inner = outputs.wrist_pin_outer_diameter, outputs.wrist_pin_inner_diameter
+    section_modulus = (np.pi / 32) * (outer**4 - inner**4) / outer
+    return (inputs.piston_diameter * 0.5 / 8) / section_modulus
+
+def _crankpin_stress(inputs, outputs) -> float:
+    # Crankpin bending between main bearings
+    moment_arm = inputs.cylinder_bore_spacing / 2
+    return 32 * moment_arm / (np.pi * outputs.crankpin_diameter**3)
+
+COMPONENT_STRESS = {
+    'connectingrod': _rod_stress,
+    'wristpin': _wrist_pin_stress,
+    'crankshaft': _crankpin_stress,
+}
+
+# Load on each component over a CrankCycle: the pin carries the force along
+# the cylinder axis, the rod and crankpin the force along the rod
+def _axial_force(cycle):
+    return cycle.gas_force + cycle.inertia_force
+
+def _rod_force(cycle):
+    return cycle.rod_force
+
+COMPONENT_LOAD = {
+    'connectingrod': _rod_force,
+    'wristpin': _axial_force,
+    'crankshaft': _rod_force,
+}
+
+def component_fatigue(component: str, load_chunks, inputs, outputs, material: FatigueMaterial, **options) -> FatigueResult:
+    # load_chunks: force history (N) on the component, e.g. CrankCycle.rod_force rows;
+    # inputs/outputs: the component's sizing input and result
+    scale = COMPONENT_STRESS[component](inputs, outputs)
+    return fatigue_life((np.asarray(chunk, dtype=float) * scale for chunk in load_chunks), material, **options)
+
+def engine_duty_fatigue(component: str, cycle, hours_per_speed, inputs, outputs, material: FatigueMaterial,
+                        method: str = 'goodman') -> FatigueResult:
+    # Life over a duty cycle of steady speeds. cycle is a CrankCycle and
+    # hours_per_speed gives the running time at each of its rpm rows; every
+    # 720° row is a repeating block, so its residue closes into full cycles.
+    load = COMPONENT_LOAD[component](cycle)
+    hours_per_speed = np.broadcast_to(np.asarray(hours_per_speed, dtype=float), cycle.rpm.shape)
+    total_damage = counted = 0.0
+    worst = None
+    for row, rpm, hours in zip(load, cycle.rpm, hours_per_speed):
+        block = component_fatigue(component, [row], inputs, outputs, material, method=method, close_residue=True)
+        blocks = hours * 3600 * rpm / 120
+        total_damage += block.damage * blocks
+        counted += block.cycles_counted * blocks
+        if worst is None or block.fatigue_safety_factor < worst.fatigue_safety_factor:
+            worst = block
+    total_hours = float(hours_per_speed.sum())
+    life_hours = total_hours / total_damage if total_damage > 0 else np.inf
+    return FatigueResult(
+        cycles_counted=counted,
+        damage=total_damage,
+        life_repeats=1 / total_damage if total_damage > 0 else np.inf,
+        life_hours=life_hours,
+        max_stress_amplitude=worst.max_stress_amplitude,
+        max_stress_mean=worst.max_stress_mean,
+        fatigue_safety_factor=worst.fatigue_safety_factor,
+    )
@@ -0,0 +1,124 @@
+from dataclasses import dataclass, replace
+import numpy as np
+
+from calculations.piston import PistonInput, calculate_piston
+from calculations.connecting_rod import ConnectingRodInput, calculate_connecting_rod
+from calculations.results import quantity
+
+# Exact slider-crank kinematics over a four-stroke cycle. Crank angle 0° is TDC
+# at the start of the intake stroke, so the firing TDC sits at 360°. Piston
+# position is measured from TDC towards the crank, and forces along the
+# cylinder axis are positive towards the crank (rod in compression).
+#
+# Every quantity is evaluated on an (rpm, crank angle) grid in one broadcast
+# pass: rpm runs down the rows and crank angle along the columns.
+
+@dataclass
+class CrankCycle:
+    crank_angle: np.ndarray = quantity('°')               # (angles,)
+    rpm: np.ndarray = quantity('rpm')                     # (speeds,)
+    piston_position: np.ndarray = quantity('mm')          # (angles,)
+    rod_angle: np.ndarray = quantity('°')                 # (angles,)
+    piston_velocity: np.ndarray = quantity('m/s')         # (speeds, angles)
+    piston_acceleration: np.ndarray = quantity('m/s²')    # (speeds, angles)
+    gas_force: np.ndarray = quantity('N')                 # (angles,) or (speeds, angles)
+    inertia_force: np.ndarray = quantity('N')             # (speeds, angles)
+    rod_force: np.ndarray = quantity('N')                 # (speeds, angles), + = compression
+    side_thrust: np.ndarray = quantity('N')               # (speeds, angles)
+
+@dataclass
+class CrankLoads:
+    # Per engine speed, shape (speeds,)
+    rpm: np.ndarray = quantity('rpm')
+    peak_gas_force: np.ndarray = quantity('N')
+    peak_rod_compression: np.ndarray = quantity('N')
+    peak_rod_tension: np.ndarray = quantity('N')
+    peak_side_thrust: np.ndarray = quantity('N')
+    rod_force_mean: np.ndarray = quantity('N')
+    rod_force_amplitude: np.ndarray = quantity('N')
+    peak_piston_acceleration: np.ndarray = quantity('m/s²')
+    max_rod_angle: float = quantity('°')
+
+def combustion_pressure_trace(crank_angle: np.ndarray, peak_pressure: float, peak_angle: float = 375.0,
+                              width: float = 25.0) -> np.ndarray:
+    # Stand-in gauge pressure (MPa) when no measured trace is available: a
+    # Gaussian combustion pulse peaking shortly after the firing TDC
+    offset = (np.asarray(crank_angle) - peak_angle + 360) % 720 - 360
+    return peak_pressure * np.exp(-0.5 * (offset / width)**2)
+
+def _interpolate_trace(crank_angle: np.ndarray, pressure_trace) -> np.ndarray:
+    # pressure_trace: (angles in degrees, gauge pressure in MPa), the pressure
+    # either one curve or one curve per engine speed; wrapped over 720°
+    trace_angle, pressure = pressure_trace
+    pressure = np.asarray(pressure, dtype=float)
+    if pressure.ndim == 1:
+        return np.interp(crank_angle, trace_angle, pressure, period=720)
+    return np.stack([np.interp(crank_angle, trace_angle, row, period=720) for row in pressure])
+
+def crank_cycle(piston: PistonInput, rod: ConnectingRodInput, rpm=None, pressure_trace=None,
+                angle_step: float = 0.1, rpm_step: float = 200.0) -> CrankCycle:
+    # Geometry and peak pressure come from piston, reciprocating mass and top speed from rod.
+    # rpm defaults to rpm_step increments from rpm_step up to rod.max_engine_rpm.
+    if rpm is None:
+        rpm = np.arange(rpm_step, rod.max_engine_rpm + rpm_step / 2, rpm_step)
+    rpm = np.atleast_1d(np.asarray(rpm, dtype=float))
+    crank_angle = np.arange(0, 720, angle_step)
+    theta = np.radians(crank_angle)
+
+    crank_radius = piston.stroke_length / 2
+    ratio = crank_radius / piston.connecting_rod_length
+    sin_theta, cos_theta = np.sin(theta), np.cos(theta)
+    root = np.sqrt(1 - (ratio * sin_theta)**2)
+    piston_position = crank_radius * (1 - cos_theta) + piston.connecting_rod_length * (1 - root)
+    rod_angle = np.arcsin(ratio * sin_theta)
+
+    omega = (rpm * 2 * np.pi / 60)[:, None]
+    radius_m = crank_radius / 1000
+    velocity_shape = sin_theta + ratio * sin_theta * cos_theta / root
+    acceleration_shape = cos_theta + ratio * (np.cos(2 * theta) + ratio**2 * sin_theta**4) / root**3
+    piston_velocity = radius_m * omega * velocity_shape
+    piston_acceleration = radius_m * omega**2 * acceleration_shape
+
+    if pressure_trace is None:
+        pressure = combustion_pressure_trace(crank_angle, piston.max_combustion_pressure)
+    else:
+        pressure = _interpolate_trace(crank_angle, pressure_trace)
+    gas_force = pressure * (np.pi * piston.cylinder_bore**2 / 4)
+    inertia_force = -rod.reciprocating_mass * piston_acceleration
+    axial_force = gas_force + inertia_force
+
+    return CrankCycle(
+        crank_angle=crank_angle,
+        rpm=rpm,
+        piston_position=piston_position,
+        rod_angle=np.degrees(rod_angle),
+        piston_velocity=piston_velocity,
+        piston_acceleration=piston_acceleration,
+        gas_force=gas_force,
+        inertia_force=inertia_force,
+        rod_force=axial_force / np.cos(rod_angle),
+        side_thrust=axial_force * np.tan(rod_angle),
+    )
+
+def peak_loads(cycle: CrankCycle) -> CrankLoads:
+    rod_max = cycle.rod_force.max(axis=1)
+    rod_min = cycle.rod_force.min(axis=1)
+    return CrankLoads(
+        rpm=cycle.rpm,
+        peak_gas_force=np.broadcast_to(cycle.gas_force, cycle.rod_force.shape).max(axis=1),
+        peak_rod_compression=np.maximum(rod_max, 0),
+        peak_rod_tension=np.maximum(-rod_min, 0),
+        peak_side_thrust=np.abs(cycle.side_thrust).max(axis=1),
+        rod_force_mean=(rod_max + rod_min) / 2,
+        rod_force_amplitude=(rod_max - rod_min) / 2,
+        peak_piston_acceleration=np.abs(cycle.piston_acceleration).max(axis=1),
+        max_rod_angle=float(np.abs(cycle.rod_angle).max()),
+    )
+
+def size_from_cycle(piston: PistonInput, rod: ConnectingRodInput, loads: CrankLoads) -> tuple:
+    # Re-runs the piston and connecting rod sizing with the worst loads over the speed range
+    piston_design = replace(piston, design_side_thrust=float(loads.peak_side_thrust.max()))
+    rod_design = replace(rod,
+                         design_compressive_load=float(loads.peak_rod_compression.max()),
+                         design_bolt_load=float(loads.peak_rod_tension.max()))
+    return calculate_piston(piston_design), calculate_connecting_rod(rod_design)
@@ -0,0 +1,229 @@
+from collections import OrderedDict
+from dataclasses import MISSING, dataclass, fields
+from graphlib import TopologicalSorter
+
+from calculations.registry import CALCULATORS
+from calculations.results import as_dict
+from calculations.schema import InputError, schema_for
+
+# --- Wiring ---
+# Every input field of a stage is fed by a design parameter, by an output of an
+# upstream stage (both optionally passed through a transform) or by a value
+# derived from several design parameters.
+
+@dataclass(frozen=True)
+class Param:
+    name: str
+    transform: object = None
+
+@dataclass(frozen=True)
+class Link:
+    stage: str
+    output: str
+    transform: object = None
+
+@dataclass(frozen=True)
+class Derived:
+    params: tuple
+    function: object
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    calculator: str
+    wiring: dict
+
+    def dependencies(self) -> set:
+        return {source.stage for source in self.wiring.values() if isinstance(source, Link)}
+
+class Pipeline:
+    # Stages are memoized on their fully resolved inputs, so a re-run only
+    # recomputes the stages whose inputs actually changed, and specs that share
+    # a stage's inputs (e.g. one tyre across a fleet) share its result.
+    def __init__(self, stages, memo_size: int = 128):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            input_fields = fields(CALCULATORS[stage.calculator].input_class)
+            required = {field.name for field in input_fields if field.default is MISSING}
+            if not required <= set(stage.wiring) <= {field.name for field in input_fields}:
+                raise ValueError(f'Stage {stage.name!r} must wire: {", ".join(sorted(required))}')
+        self.order = list(TopologicalSorter({stage.name: stage.dependencies() for stage in stages}).static_order())
+        self.memo_size = memo_size
+        self._memo = {name: OrderedDict() for name in self.order}
+        self.last_recomputed = []
+
+    def required_parameters(self) -> set:
+        names = set()
+        for stage in self.stages.values():
+            for source in stage.wiring.values():
+                if isinstance(source, Param):
+                    names.add(source.name)
+                elif isinstance(source, Derived):
+                    names.update(source.params)
+        return names
+
+    def run(self, parameters: dict) -> dict:
+        missing = self.required_parameters() - set(parameters)
+        if missing:
+            raise KeyError(f'Missing design parameters: {", ".join(sorted(missing))}')
+        outputs = {}
+        self.last_recomputed = []
+        for name in self.order:
+            stage = self.stages[name]
+            calculator = CALCULATORS[stage.calculator]
+            record = {field: self._resolve(source, parameters, outputs) for field, source in stage.wiring.items()}
+            try:
+                inputs = schema_for(calculator.input_class).parse(record)
+            except InputError as e:
+                # Name the stage, since upstream outputs feed the inputs too
+                raise InputError({f'{name}.{field}': message for field, message in e.errors.items()}) from None
+            key = tuple(as_dict(inputs).values())
+            memo = self._memo[name]
+            if key in memo:
+                memo.move_to_end(key)
+                outputs[name] = memo[key]
+            else:
+                outputs[name] = calculator.function(inputs)
+                memo[key] = outputs[name]
+                if len(memo) > self.memo_size:
+                    memo.popitem(last=False)
+                self.last_recomputed.append(name)
+        return outputs
+
+    def run_many(self, specs) -> list:
+        return [self.run(spec) for spec in specs]
+
+    @staticmethod
+    def _resolve(source, parameters: dict, outputs: dict):
+        if isinstance(source, Derived):
+            return source.function(*(parameters[name] for name in source.params))
+        if isinstance(source, Param):
+            value = parameters[source.name]
+        else:
+            value = getattr(outputs[source.stage], source.output)
+        return source.transform(value) if source.transform is not None else value
+
+# --- Engine ---
+def _half(value):
+    return value / 2
+
+ENGINE_STAGES = (
+    Stage('piston', 'piston', {
+        'cylinder_bore': Param('cylinder_bore'),
+        'stroke_length': Param('stroke_length'),
+        'connecting_rod_length': Param('connecting_rod_length'),
+        'deck_height': Param('deck_height'),
+        'max_combustion_pressure': Param('max_combustion_pressure'),
+        'piston_material_strength': Param('piston_material_strength'),
+        'safety_factor': Param('safety_factor'),
+    }),
+    Stage('wrist_pin', 'wristpin', {
+        'piston_diameter': Link('piston', 'piston_diameter'),
+        'max_gas_pressure': Param('max_combustion_pressure'),
+        'wrist_pin_material_yield_strength': Param('wrist_pin_material_yield_strength'),
+    }),
+    Stage('crankshaft', 'crankshaft', {
+        'piston_diameter': Link('piston', 'piston_diameter'),
+        'max_combustion_pressure': Param('max_combustion_pressure'),
+        'cylinder_bore_spacing': Param('cylinder_bore_spacing'),
+        'crankshaft_material_yield_strength': Param('crankshaft_material_yield_strength'),
+        'allowable_bearing_pressure': Param('allowable_bearing_pressure'),
+        'safety_factor': Param('safety_factor'),
+    }),
+    Stage('connecting_rod', 'connectingrod', {
+        'piston_diameter': Link('piston', 'piston_diameter'),
+        'max_combustion_pressure': Param('max_combustion_pressure'),
+        'reciprocating_mass': Param('reciprocating_mass'),
+        'crank_radius': Param('stroke_length', transform=_half),
+        'piston_pin_diameter': Link('piston', 'gudgeon_pin_outer_diameter'),
+        'crankpin_diameter': Link('crankshaft', 'crankpin_diameter'),
+        'max_engine_rpm': Param('max_engine_rpm'),
+        'rod_material_yield_strength': Param('rod_material_yield_strength'),
+        'bolt_material_yield_strength': Param('bolt_material_yield_strength'),
+        'safety_factor': Param('safety_factor'),
+    }),
+    Stage('cylinder', 'cylinder', {
+        'cylinder_bore_diameter': Param('cylinder_bore'),
+        'stroke_length': Param('stroke_length'),
+        'max_combustion_pressure': Param('max_combustion_pressure'),
+        'cylinder_material_strength': Param('cylinder_material_strength'),
+        'safety_factor': Param('safety_factor'),
+    }),
+)
+
+def engine_pipeline() -> Pipeline:
+    # Keep the returned pipeline around to get incremental re-runs
+    return Pipeline(ENGINE_STAGES)
+
+def design_engine(parameters: dict) -> dict:
+    return engine_pipeline().run(parameters)
+
+# --- Brake system ---
+def _add(*values):
+    return sum(values)
+
+def _wheel_radius_m(overall_diameter_mm):
+    return overall_diameter_mm / 2000
+
+def _mm_to_m(value):
+    return value / 1000
+
+BRAKE_STAGES = (
+    Stage('tyre', 'tyre', {
+        'bike_type': Param('bike_type'),
+        'vehicle_mass': Derived(('mass_vehicle', 'mass_rider'), _add),
+        'rim_diameter': Param('rim_diameter_inches'),
+        'aspect_ratio': Param('tyre_aspect_ratio'),
+        'section_width': Param('tyre_width_mm'),
+    }),
+    Stage('rim', 'rim', {
+        'tyre_width_mm': Param('tyre_width_mm'),
+        'tyre_aspect_ratio': Param('tyre_aspect_ratio'),
+        'rim_diameter_inches': Param('rim_diameter_inches'),
+        'proposed_rim_width_inches': Param('proposed_rim_width_inches'),
+    }),
+    Stage('disc', 'disc', {
+        'mass_vehicle': Param('mass_vehicle'),
+        'mass_rider': Param('mass_rider'),
+        'initial_velocity': Param('initial_velocity'),
+        'stopping_distance': Param('stopping_distance'),
+        'wheel_radius': Link('tyre', 'overall_diameter', transform=_wheel_radius_m),
+        'friction_coefficient': Param('friction_coefficient'),
+        'caliper_piston_area': Param('caliper_piston_area'),
+        'hydraulic_pressure': Param('hydraulic_pressure'),
+        'number_of_discs': Param('number_of_discs'),
+        'material_density': Param('material_density'),
+        'material_specific_heat': Param('material_specific_heat'),
+        'material_yield_strength': Param('material_yield_strength'),
+        'max_outer_diameter': Param('max_outer_diameter'),
+        'initial_disc_thickness': Param('initial_disc_thickness'),
+    }),
+    Stage('caliper', 'caliper', {
+        'required_braking_torque': Link('disc', 'braking_torque'),
+        'number_of_pistons': Param('number_of_pistons'),
+        'hydraulic_pressure': Param('hydraulic_pressure'),
+        'pad_contact_area': Param('pad_contact_area'),
+        'number_of_discs': Param('number_of_discs'),
+        'caliper_material_yield_strength': Param('caliper_material_yield_strength'),
+        'disc_effective_radius': Link('disc', 'effective_radius', transform=_mm_to_m),
+        'friction_coefficient': Param('friction_coefficient'),
+    }),
+    Stage('brake_pad', 'brakepad', {
+        'total_mass': Derived(('mass_vehicle', 'mass_rider'), _add),
+        'initial_velocity': Param('initial_velocity'),
+        'stopping_distance': Param('stopping_distance'),
+        'pad_area': Param('pad_area'),
+        'pad_wear_rate': Param('pad_wear_rate'),
+        'pad_thickness': Param('pad_thickness'),
+    }),
+)
+
+def brake_pipeline() -> Pipeline:
+    return Pipeline(BRAKE_STAGES)
+
+def design_brake_system(spec: dict) -> dict:
+    return brake_pipeline().run(spec)
+
+def evaluate_fleet(specs) -> list:
+    # One pipeline for the whole fleet, so identical stage inputs are computed once
+    return brake_pipeline().run_many(specs)
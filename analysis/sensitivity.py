@@ -0,0 +1,161 @@
+import os
+import time
+from dataclasses import dataclass, fields
+import numpy as np
+
+from analysis.uncertainty import concatenate_chunks, sample_chunk
+from analysis.sweep import map_chunks
+
+# Global sensitivity of every numeric output of a calculator to a chosen set of
+# input fields, each varied uniformly between bounds. One sample matrix is
+# evaluated once through the batch path and all outputs are analysed from the
+# same evaluations, so the cost grows with the samples and not the outputs.
+
+# --- Quasi-random samples ---
+def _first_primes(count: int) -> list:
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+def halton(samples: int, dimensions: int, seed=None) -> np.ndarray:
+    # Halton points in [0, 1)^dimensions (one prime base per dimension), with a
+    # random shift modulo 1 when seeded so repeated runs give independent estimates
+    index = np.arange(1, samples + 1)
+    points = np.empty((samples, dimensions))
+    for d, base in enumerate(_first_primes(dimensions)):
+        remaining = index.copy()
+        fraction = 1.0 / base
+        column = np.zeros(samples)
+        while remaining.any():
+            remaining, digit = np.divmod(remaining, base)
+            column += digit * fraction
+            fraction /= base
+        points[:, d] = column
+    if seed is not None:
+        points = (points + np.random.default_rng(seed).random(dimensions)) % 1.0
+    return points
+
+# --- Evaluation ---
+class _MatrixDesign:
+    # Design-space interface of analysis.sweep over a precomputed sample matrix
+    def __init__(self, names: list, matrix: np.ndarray):
+        self.names = names
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def chunk(self, start: int, stop: int) -> dict:
+        return dict(zip(self.names, self.matrix[start:stop].T))
+
+def _evaluate(calculator: str, base, names: list, matrix: np.ndarray, chunk_size: int, processes: int) -> dict:
+    # {numeric output: column} for every row of matrix; non-finite results become NaN.
+    # List outputs are split per stage (see sample_chunk), so each stage is ranked on its own.
+    if processes is None:
+        processes = 1 if len(matrix) <= chunk_size else os.cpu_count() or 1
+    fixed = {field.name: getattr(base, field.name) for field in fields(base) if field.name not in names}
+    table, _ = concatenate_chunks(list(map_chunks(sample_chunk, calculator, _MatrixDesign(names, matrix), fixed, chunk_size, processes)))
+    outputs = {}
+    for name, column in table.items():
+        if name not in names:
+            column = column.astype(float)
+            outputs[name] = np.where(np.isfinite(column), column, np.nan)
+    return outputs
+
+def _scale(unit: np.ndarray, bounds: dict) -> np.ndarray:
+    limits = np.array(list(bounds.values()), dtype=float)
+    return limits[:, 0] + unit * (limits[:, 1] - limits[:, 0])
+
+@dataclass
+class SensitivityResult:
+    method: str
+    calculator: str
+    base_samples: int
+    evaluations: int
+    elapsed_seconds: float
+    # {output: [{'input': name, index: value...}, ...]} ranked most influential first
+    rankings: dict
+
+def _rank(names: list, columns: dict, key: str) -> list:
+    order = np.argsort(-np.nan_to_num(columns[key], nan=-np.inf), kind='stable')
+    return [{'input': names[i], **{index: float(values[i]) for index, values in columns.items()}} for i in order]
+
+# --- Sobol ---
+def sobol_indices(calculator: str, base, bounds: dict, samples: int = 4096, seed=None,
+                  chunk_size: int = 200_000, processes: int = None) -> SensitivityResult:
+    # Saltelli design: matrices A and B plus one A-with-column-i-from-B matrix
+    # per input, samples * (inputs + 2) evaluations in total. First-order
+    # indices use the Saltelli (2010) estimator and total-order the Jansen one.
+    if samples <= 0:
+        raise ValueError('samples must be greater than 0')
+    names = list(bounds)
+    k = len(names)
+    unit = halton(samples, 2 * k, seed)
+    a, b = _scale(unit[:, :k], bounds), _scale(unit[:, k:], bounds)
+    blocks = [a, b]
+    for i in range(k):
+        mixed = a.copy()
+        mixed[:, i] = b[:, i]
+        blocks.append(mixed)
+    started = time.perf_counter()
+    outputs = _evaluate(calculator, base, names, np.concatenate(blocks), chunk_size, processes)
+
+    rankings = {}
+    for output, values in outputs.items():
+        y = values.reshape(k + 2, samples)
+        y_a, y_b, y_mixed = y[0], y[1], y[2:]
+        variance = np.nanvar(np.concatenate((y_a, y_b)))
+        if not variance > 0:
+            continue
+        with np.errstate(invalid='ignore'):
+            first = np.nanmean(y_b * (y_mixed - y_a), axis=1) / variance
+            total = 0.5 * np.nanmean((y_a - y_mixed)**2, axis=1) / variance
+        rankings[output] = _rank(names, {'total_order': total, 'first_order': first}, 'total_order')
+    return SensitivityResult('sobol', calculator, samples, samples * (k + 2), time.perf_counter() - started, rankings)
+
+# --- Morris ---
+def morris_screening(calculator: str, base, bounds: dict, trajectories: int = 100, levels: int = 4, seed=None,
+                     chunk_size: int = 200_000, processes: int = None) -> SensitivityResult:
+    # Elementary effects along random one-at-a-time trajectories on a levels-point
+    # grid, per unit fraction of each input's range; mu_star ranks influence,
+    # sigma flags nonlinearity and interactions
+    if trajectories <= 0:
+        raise ValueError('trajectories must be greater than 0')
+    names = list(bounds)
+    k = len(names)
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    # Starting points on the lower part of the grid so every +delta step stays inside [0, 1]
+    start = rng.integers(0, levels // 2, (trajectories, 1, k)) / (levels - 1)
+    # Each trajectory moves one randomly ordered input per step, by +delta or -delta
+    order = np.argsort(rng.random((trajectories, k)), axis=1)
+    direction = rng.choice([-1.0, 1.0], (trajectories, k))
+    steps = np.zeros((trajectories, k + 1, k))
+    moved = np.zeros((trajectories, k, k))
+    moved[np.arange(trajectories)[:, None], np.arange(k)[None, :], order] = 1.0
+    steps[:, 1:, :] = np.cumsum(moved, axis=1)
+    # A -delta step starts from the top of its range, so the path still stays inside [0, 1]
+    unit = start + delta * np.where(direction[:, None, :] > 0, steps, 1 - steps)
+    started = time.perf_counter()
+    outputs = _evaluate(calculator, base, names, _scale(unit.reshape(-1, k), bounds), chunk_size, processes)
+
+    rankings = {}
+    for output, values in outputs.items():
+        y = values.reshape(trajectories, k + 1)
+        change = np.diff(y, axis=1)
+        # Step j of trajectory t moves input order[t, j] by ±delta of its range
+        sign = np.take_along_axis(direction, order, axis=1)
+        effects = np.empty((trajectories, k))
+        np.put_along_axis(effects, order, change * sign / delta, axis=1)
+        with np.errstate(invalid='ignore'):
+            columns = {
+                'mu_star': np.nanmean(np.abs(effects), axis=0),
+                'mu': np.nanmean(effects, axis=0),
+                'sigma': np.nanstd(effects, axis=0),
+            }
+        rankings[output] = _rank(names, columns, 'mu_star')
+    return SensitivityResult('morris', calculator, trajectories, trajectories * (k + 1), time.perf_counter() - started, rankings)
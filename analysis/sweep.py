@@ -0,0 +1,165 @@
+import csv
+import io
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import MISSING, dataclass, fields
+import numpy as np
+
+from calculations.catalogue import references, resolve_columns
+from calculations.registry import CALCULATORS, evaluate_batch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# --- Design-space specifications ---
+# A design only knows how many cases it has and how to produce the input
+# columns of cases [start, stop), so a sweep never materialises the whole grid.
+
+class FullFactorial:
+    def __init__(self, parameters: dict):
+        # parameters: {input field name: sequence of levels}; a catalogue table or
+        # select() result sweeps catalogue ids as a categorical dimension
+        self.names = list(parameters)
+        self.levels = [np.asarray(list(values)) for values in parameters.values()]
+        self.shape = tuple(len(values) for values in self.levels)
+
+    def __len__(self) -> int:
+        return math.prod(self.shape)
+
+    def chunk(self, start: int, stop: int) -> dict:
+        index = np.unravel_index(np.arange(start, stop), self.shape)
+        return {name: levels[i] for name, levels, i in zip(self.names, self.levels, index)}
+
+class LatinHypercube:
+    def __init__(self, bounds: dict, samples: int, seed=None):
+        # bounds: {input field name: (low, high)}
+        rng = np.random.default_rng(seed)
+        self.names = list(bounds)
+        self.bounds = np.array(list(bounds.values()), dtype=float)
+        self.samples = samples
+        # One stratum permutation per parameter; the position inside each stratum is drawn per chunk
+        self._strata = np.stack([rng.permutation(samples).astype(np.uint32 if samples < 2**32 else np.uint64) for _ in self.names])
+        self._seed = int(rng.integers(2**63))
+
+    def __len__(self) -> int:
+        return self.samples
+
+    def chunk(self, start: int, stop: int) -> dict:
+        rng = np.random.default_rng([self._seed, start])
+        unit = (self._strata[:, start:stop] + rng.random((len(self.names), stop - start))) / self.samples
+        low, high = self.bounds[:, 0:1], self.bounds[:, 1:2]
+        values = low + unit * (high - low)
+        return dict(zip(self.names, values))
+
+# --- Evaluation ---
+@dataclass
+class SweepReport:
+    calculator: str
+    cases: int
+    elapsed_seconds: float
+    cases_per_second: float
+    output_path: str = None
+
+def evaluate_chunk(calculator: str, columns: dict, fixed: dict) -> dict:
+    # The input and output table of one chunk of cases.
+    # Catalogue id columns (e.g. 'material' levels) fill the fields linked to them
+    input_class = CALCULATORS[calculator].input_class
+    merged = resolve_columns(input_class, {**fixed, **columns})
+    input_fields = fields(input_class)
+    missing = [field.name for field in input_fields if field.name not in merged and field.default is MISSING]
+    if missing:
+        raise KeyError(f'No value or range given for: {", ".join(missing)}')
+    size = len(next(iter(columns.values())))
+    table = {key: np.broadcast_to(merged[key], (size,)) for key in references(input_class) if key in merged}
+    table.update({field.name: np.broadcast_to(merged.get(field.name, field.default), (size,)) for field in input_fields})
+    table.update(evaluate_batch(calculator, merged))
+    return table
+
+def _encode_chunk(calculator: str, columns: dict, fixed: dict) -> tuple:
+    # CSV text is produced in the worker so formatting scales with the pool too
+    table = evaluate_chunk(calculator, columns, fixed)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    values = list(table.values())
+    if all(column.dtype.kind in 'biuf' for column in values):
+        np.savetxt(buffer, np.column_stack(values), delimiter=',', fmt='%.10g')
+    else:
+        writer.writerows(zip(*(column.tolist() for column in values)))
+    return list(table), len(values[0]), buffer.getvalue()
+
+def map_chunks(task, calculator: str, design, fixed: dict, chunk_size: int, processes: int):
+    # Yields task(calculator, columns, fixed) for each chunk of the design; the
+    # uncertainty and sensitivity studies share it. Results come back in order.
+    # Chunks are evaluated in a process pool unless processes == 1; at most two
+    # chunks per worker are in flight at any time.
+    bounds = ((start, min(start + chunk_size, len(design))) for start in range(0, len(design), chunk_size))
+    if processes == 1:
+        for start, stop in bounds:
+            yield task(calculator, design.chunk(start, stop), fixed)
+        return
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, stop in bounds:
+            pending.append(pool.submit(task, calculator, design.chunk(start, stop), fixed))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def iter_sweep(calculator: str, design, fixed: dict = None, chunk_size: int = 50_000, processes: int = None):
+    # Yields one {column: ndarray} table per chunk
+    yield from map_chunks(evaluate_chunk, calculator, design, fixed or {}, chunk_size, processes)
+
+def run_sweep(calculator: str, design, output_path: str, fixed: dict = None, chunk_size: int = 50_000, processes: int = None,
+              progress=None) -> SweepReport:
+    # Streams every chunk to CSV, or to Parquet when output_path ends in .parquet;
+    # progress, if given, is called with (cases done, total cases) after each chunk
+    cases = 0
+    started = time.perf_counter()
+    if output_path.endswith('.parquet'):
+        sink = _ParquetSink(output_path)
+        try:
+            for table in iter_sweep(calculator, design, fixed, chunk_size, processes):
+                sink.write(table)
+                cases += len(next(iter(table.values())))
+                if progress is not None:
+                    progress(cases, len(design))
+        finally:
+            sink.close()
+    else:
+        with open(output_path, 'w', newline='') as output:
+            for header, size, text in map_chunks(_encode_chunk, calculator, design, fixed or {}, chunk_size, processes):
+                if cases == 0:
+                    csv.writer(output).writerow(header)
+                output.write(text)
+                cases += size
+                if progress is not None:
+                    progress(cases, len(design))
+    elapsed = time.perf_counter() - started
+    return SweepReport(calculator, cases, elapsed, cases / elapsed if elapsed > 0 else float('inf'), output_path)
+
+# --- Output sinks ---
+class _ParquetSink:
+    def __init__(self, path: str):
+        if pq is None:
+            raise ImportError('Writing Parquet requires pyarrow (pip install pyarrow)')
+        self._path = path
+        self._writer = None
+
+    def write(self, table: dict):
+        arrow_table = pa.table({name: np.ascontiguousarray(column) if column.dtype.kind in 'biuf' else column.tolist()
+                                for name, column in table.items()})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._path, arrow_table.schema)
+        self._writer.write_table(arrow_table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,189 @@
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, fields
+import numpy as np
+
+from analysis.sweep import evaluate_chunk, map_chunks
+
+# Monte Carlo propagation of input scatter through any registered calculator.
+# Samples are drawn chunk by chunk from a generator seeded on the chunk start,
+# so for a given seed and chunk size a run is reproducible whatever the number
+# of processes, and every chunk goes through the calculator's batch path (see
+# evaluate_batch).
+
+# --- Distributions ---
+@dataclass(frozen=True)
+class Normal:
+    mean: float
+    std: float
+    low: float = -np.inf   # samples are clipped to [low, high]
+    high: float = np.inf
+
+    @classmethod
+    def from_tolerance(cls, nominal: float, tolerance: float, sigmas: float = 3.0, **limits):
+        # nominal ± tolerance read as a ±sigmas band
+        return cls(nominal, tolerance / sigmas, **limits)
+
+    def sample(self, rng, size: int) -> np.ndarray:
+        return np.clip(rng.normal(self.mean, self.std, size), self.low, self.high)
+
+@dataclass(frozen=True)
+class LogNormal:
+    median: float
+    sigma: float           # standard deviation of log(value)
+
+    def sample(self, rng, size: int) -> np.ndarray:
+        return self.median * np.exp(rng.normal(0.0, self.sigma, size))
+
+@dataclass(frozen=True)
+class Uniform:
+    low: float
+    high: float
+
+    def sample(self, rng, size: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, size)
+
+@dataclass(frozen=True)
+class Triangular:
+    low: float
+    mode: float
+    high: float
+
+    def sample(self, rng, size: int) -> np.ndarray:
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+class MonteCarloDesign:
+    # Design-space interface of analysis.sweep: a length and chunk(start, stop)
+    def __init__(self, distributions: dict, samples: int, seed=None):
+        self.distributions = distributions
+        self.samples = samples
+        self._seed = int(np.random.default_rng(seed).integers(2**63))
+
+    def __len__(self) -> int:
+        return self.samples
+
+    def chunk(self, start: int, stop: int) -> dict:
+        rng = np.random.default_rng([self._seed, start])
+        return {name: distribution.sample(rng, stop - start) for name, distribution in self.distributions.items()}
+
+# --- Propagation ---
+def _stage_columns(name: str, column: np.ndarray):
+    # List outputs (one entry per gear stage, e.g. gearbox) give one column per
+    # stage, name[1], name[2]...; rows with fewer stages are padded with None
+    stages = max(map(len, column), default=0)
+    for stage in range(stages):
+        yield f'{name}[{stage + 1}]', np.array([row[stage] if stage < len(row) else None for row in column], dtype=object)
+
+def sample_chunk(calculator: str, columns: dict, fixed: dict) -> tuple:
+    # A map_chunks task, shared with the sensitivity study: sampled inputs and numeric
+    # outputs, plus value counts of the text outputs; neither the fixed inputs nor
+    # per-row strings travel back from the worker
+    table = evaluate_chunk(calculator, columns, fixed)
+    numeric, text = {}, {}
+    for name, column in table.items():
+        if name in fixed:
+            continue
+        if column.dtype == object and column.size and isinstance(column.flat[0], (list, tuple)):
+            stages = _stage_columns(name, column.ravel())
+        else:
+            stages = [(name, column)]
+        for stage, values in stages:
+            if values.dtype.kind in 'biuf':
+                numeric[stage] = values
+            elif all(value is None or isinstance(value, (int, float, np.number)) for value in values):
+                numeric[stage] = np.array([np.nan if value is None else value for value in values], dtype=float)
+            else:
+                text[stage] = Counter(value for value in values.tolist() if value is not None)
+    return numeric, text
+
+def concatenate_chunks(chunks: list) -> tuple:
+    # Joins sample_chunk results; a stage column missing from a chunk (none of
+    # its rows reached that stage) is NaN there
+    sizes = [len(next(iter(numeric.values()))) for numeric, _ in chunks]
+    names = dict.fromkeys(name for numeric, _ in chunks for name in numeric)
+    table = {name: np.concatenate([numeric.get(name, np.full(size, np.nan)) for (numeric, _), size in zip(chunks, sizes)])
+             for name in names}
+    counts = {}
+    for _, text in chunks:
+        for name, counter in text.items():
+            counts[name] = counts.get(name, Counter()) + counter
+    return table, counts
+
+@dataclass
+class UncertaintyResult:
+    calculator: str
+    samples: int
+    elapsed_seconds: float
+    statistics: dict                  # {numeric output: {'mean', 'std', 'p<q>'...}}
+    categories: dict                  # {text output: {value: share of samples}}
+    probability_below_target: float   # P(target_output < target), None without a target
+    sensitivity: dict                 # {input: squared standardized rank regression coefficient}
+    sensitivity_r2: float             # share of the ranked target_output variance they explain
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    ranks = np.empty(values.size)
+    ranks[np.argsort(values)] = np.arange(values.size)
+    return ranks
+
+def rank_sensitivity(inputs: dict, output: np.ndarray) -> tuple:
+    # Squared standardized rank regression coefficients; they cover monotonic
+    # but nonlinear responses such as 1/x, and sum to about R² when inputs are
+    # independent. Non-finite outputs are left out.
+    finite = np.isfinite(output)
+    names = [name for name, values in inputs.items() if np.ptp(values[finite]) > 0]
+    if not names or finite.sum() < 3:
+        return {name: 0.0 for name in inputs}, 0.0
+    x = np.column_stack([_ranks(inputs[name][finite]) for name in names])
+    y = _ranks(output[finite])
+    x = (x - x.mean(axis=0)) / x.std(axis=0)
+    y = (y - y.mean()) / y.std() if y.std() > 0 else y - y.mean()
+    coefficients, *_ = np.linalg.lstsq(x, y, rcond=None)
+    r2 = 1 - np.mean((y - x @ coefficients)**2) if y.any() else 0.0
+    indices = dict(zip(names, coefficients**2))
+    return {name: float(indices.get(name, 0.0)) for name in inputs}, float(r2)
+
+def propagate(calculator: str, base, distributions: dict, samples: int = 100_000,
+              target_output: str = 'safety_factor', target: float = None,
+              percentiles=(1, 5, 50, 95, 99), chunk_size: int = 200_000, processes: int = None,
+              seed=None) -> UncertaintyResult:
+    # base: the calculator's input instance holding the nominal value of every
+    # field without a distribution. processes=None runs in-process when the
+    # samples fit in one chunk and uses one process per CPU otherwise.
+    if samples <= 0:
+        raise ValueError('samples must be greater than 0')
+    if processes is None:
+        processes = 1 if samples <= chunk_size else os.cpu_count() or 1
+    fixed = {field.name: getattr(base, field.name) for field in fields(base) if field.name not in distributions}
+    design = MonteCarloDesign(distributions, samples, seed)
+    started = time.perf_counter()
+    table, counts = concatenate_chunks(list(map_chunks(sample_chunk, calculator, design, fixed, chunk_size, processes)))
+    elapsed = time.perf_counter() - started
+
+    outputs = {name: column for name, column in table.items() if name not in distributions}
+    statistics = {}
+    for name, column in outputs.items():
+        finite = column[np.isfinite(column)]
+        summary = {'mean': float(finite.mean()), 'std': float(finite.std())} if finite.size else {'mean': np.nan, 'std': np.nan}
+        summary.update({f'p{q:g}': float(value) for q, value in zip(percentiles, np.nanpercentile(column, percentiles))})
+        statistics[name] = summary
+    categories = {name: {str(value): count / samples for value, count in counter.items()} for name, counter in counts.items()}
+
+    probability = None
+    sensitivity, r2 = {name: 0.0 for name in distributions}, 0.0
+    if target_output in outputs:
+        response = outputs[target_output].astype(float)
+        if target is not None:
+            probability = float(np.mean(response < target))
+        sensitivity, r2 = rank_sensitivity({name: table[name].astype(float) for name in distributions}, response)
+
+    return UncertaintyResult(
+        calculator=calculator,
+        samples=samples,
+        elapsed_seconds=elapsed,
+        statistics=statistics,
+        categories=categories,
+        probability_below_target=probability,
+        sensitivity=sensitivity,
+        sensitivity_r2=r2,
+    )
@@ -1,5 +1,8 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, send_file, send_from_directory, stream_with_context, url_for
 import dataclasses
+import json
+import os
+import threading
 
 # Import all calculation modules and their data classes
 from calculations.disc import DiscInput, calculate_disc
@@ -10,23 +13,89 @@ from calculations.piston import PistonInput, calculate_piston
 from calculations.connecting_rod import ConnectingRodInput, calculate_connecting_rod
 from calculations.crankshaft import CrankshaftInput, calculate_crankshaft
 from calculations.clutch import ClutchInput, calculate_clutch
-from calculations.gearbox import GearboxInput, calculate_gearbox
-from calculations.chain_sprocket import ChainSprocketInput, calculate_chain_sprocket
+from calculations.gearbox import GearboxInput, calculate_gearbox, synthesize_gear_sets
+from calculations.chain_sprocket import ChainSprocketInput, calculate_chain_sprocket, select_chain_sprocket
 from calculations.rim import RimInput, calculate_rim_compatibility
 from calculations.cylinder import CylinderInput, calculate_cylinder
 from calculations.wrist_pin import WristPinInput, calculate_wrist_pin
+from calculations.results import as_dict, format_results, result_units
+from calculations.catalogue import CATALOGUE, references
+from calculations.registry import CALCULATORS
+from calculations.schema import InputError, schema_for
+from calculations.units import SYSTEMS, UnitError, convert_values, output_conversions
+from services.cache import cache_from_environment
+from services.designs import design_store_from_environment
+from services.metrics import SIZE_BUCKETS, metrics_from_environment
+from services.jobs import TERMINAL_STATES, job_queue_from_environment
+from services.studies import STUDIES
+from analysis.pipeline import brake_pipeline, engine_pipeline
+from cadesign.parts import PARTS
+from cadesign.store import cad_store_from_environment
 
 app = Flask(__name__)
+result_cache = cache_from_environment()
+cad_store = cad_store_from_environment()
+job_queue = job_queue_from_environment()
+design_store = design_store_from_environment()
+metrics = metrics_from_environment()
+JOB_EVENTS_LIFETIME = float(os.environ.get('JOB_EVENTS_LIFETIME', 30))
+CALCULATOR_NAMES = {calculator.function: name for name, calculator in CALCULATORS.items()}
+
+# --- Helper Functions to handle form/JSON data and errors ---
+def build_inputs(input_dataclass, data):
+    # Create an instance of the input dataclass from form data or a JSON record;
+    # optional fields fall back to their default when left out. Raises InputError
+    # listing every missing, malformed or out-of-range field.
+    return schema_for(input_dataclass).parse(data)
 
-# --- Helper Function to handle form data and errors ---
 def process_request(form_data, input_dataclass, calculation_function, template_name):
     if request.method == 'POST':
+        route = CALCULATOR_NAMES[calculation_function]
+        phases = metrics.phases(route)
         try:
-            # Create an instance of the input dataclass from the form data
-            inputs = input_dataclass(**{field.name: field.type(form_data.get(field.name)) for field in dataclasses.fields(input_dataclass)})
+            # 'units' converts the submitted values, 'output_units' the displayed results
+            inputs = build_inputs(input_dataclass, form_data)
+            output_units = form_data.get('output_units') or form_data.get('units')
+            conversions = None
+            if output_units:
+                try:
+                    conversions = output_conversions(CALCULATORS[route].output_class, output_units)
+                except UnitError as e:
+                    raise InputError(e.errors)
+            phases.mark('parse')
+            key = None
+            if result_cache.enabled:
+                # A cache hit skips both the calculation and the Jinja rendering
+                cache_name = calculation_function.__name__
+                if conversions:
+                    cache_name = f'{cache_name}:{output_units}'
+                key = result_cache.make_key(cache_name, inputs)
+                cached = result_cache.get(key)
+                phases.mark('cache')
+                if cached is not None:
+                    design_store.record(route, inputs, CALCULATORS[route].output_class(**cached[0]))
+                    phases.finish('cached')
+                    return cached[1]
             results = calculation_function(inputs)
-            return render_template(template_name, results=dataclasses.asdict(results))
+            phases.mark('calculate')
+            design_store.record(route, inputs, results)
+            # Numbers are only turned into display strings here, when a page is rendered
+            formatted = format_results(results, conversions)
+            phases.mark('format')
+            html = render_template(template_name, results=formatted)
+            phases.mark('render')
+            if key is not None:
+                result_cache.put(key, results, html)
+                phases.mark('store')
+            phases.finish('ok')
+            return html
         except (ValueError, TypeError, KeyError) as e:
+            # Inputs that pass the schema but fail inside the calculation count as 'calculation'.
+            # Only declared inputs become label values; other keys (e.g. unit names) count as 'other'
+            declared = {field.name for field in dataclasses.fields(input_dataclass)} | set(references(input_dataclass))
+            for field in (e.errors if isinstance(e, InputError) else ['calculation']):
+                metrics.increment('validation_errors_total', route=route, field=field if field in declared else 'other')
+            phases.finish('invalid')
             return render_template(template_name, error=f"Invalid or missing input: {e}")
     return render_template(template_name, results=None)
 
@@ -96,5 +165,340 @@ def cylinder():
 def wristpin():
     return process_request(request.form, WristPinInput, calculate_wrist_pin, 'wristpin.html')
 
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+# --- Metrics ---
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus scrape target; counters and histograms are summed over all workers
+    cache = result_cache.stats() if result_cache.enabled else {}
+    gauges = [
+        ('result_cache_entries', 'Entries in the shared result cache', {(): cache.get('entries', 0)}),
+        ('result_cache_lookups', 'Shared result cache lookups by outcome since it was last cleared',
+         {(('outcome', outcome),): cache.get(outcome, 0) for outcome in ('hits', 'misses', 'evictions')}),
+    ]
+    if design_store.enabled:
+        gauges.append(('designs_stored', 'Distinct designs in the design store',
+                       {(('calculator', name),): count for name, count in design_store.stats()['designs'].items()}))
+    return Response(metrics.exposition(gauges), mimetype='text/plain; version=0.0.4')
+
+# --- JSON Batch API ---
+def iter_records():
+    # NDJSON bodies are read line by line so large uploads are never held in memory
+    if request.mimetype == 'application/x-ndjson':
+        for line in request.stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield e
+    else:
+        data = request.get_json()
+        yield from (data if isinstance(data, list) else [data])
+
+API_CHUNK_SIZE = 1000
+
+def iter_chunks(records, size=API_CHUNK_SIZE):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_records(name, calculator, records, units=None, conversions=None):
+    # Validates a chunk of records column by column, then runs the valid ones;
+    # units applies to records without their own, conversions to every result
+    parsed = iter(schema_for(calculator.input_class).parse_records([record for record in records if isinstance(record, dict)],
+                                                                   units))
+    for record in records:
+        if isinstance(record, Exception):
+            yield {'error': f'Malformed record: {record}'}
+            continue
+        if not isinstance(record, dict):
+            yield {'error': 'Malformed record: expected a JSON object'}
+            continue
+        inputs, errors = next(parsed)
+        try:
+            if errors:
+                raise InputError(errors)
+            results = calculator.function(inputs)
+            design_store.record(name, inputs, results)
+            metrics.increment('api_records_total', calculator=name, outcome='ok')
+            yield {'results': convert_values(as_dict(results), conversions) if conversions else as_dict(results)}
+        except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+            metrics.increment('api_records_total', calculator=name, outcome='invalid')
+            yield {'error': f'Invalid or missing input: {e}', **({'fields': e.errors} if isinstance(e, InputError) else {})}
+
+@app.route('/api/<name>', methods=['GET', 'POST'])
+def api(name):
+    calculator = CALCULATORS.get(name)
+    if calculator is None:
+        return jsonify(error=f'Unknown calculator: {name}'), 404
+    # ?units= gives the unit choice of the records, ?output_units= that of the results
+    # (defaulting to units); see calculations.units
+    units = request.args.get('units')
+    output_units = request.args.get('output_units') or units
+    try:
+        conversions = output_conversions(calculator.output_class, output_units) if output_units else None
+    except UnitError as e:
+        return jsonify(error=f'Invalid output units: {e}', fields=e.errors), 400
+    if request.method == 'GET':
+        declared = result_units(calculator.output_class)
+        return jsonify(
+            inputs={field.name: field.type.__name__ for field in dataclasses.fields(calculator.input_class)},
+            schema=schema_for(calculator.input_class).describe(),
+            output_units={**declared, **{field: unit for field, (_, _, unit) in (conversions or {}).items()}},
+            unit_systems=sorted(SYSTEMS)
+        )
+    if request.mimetype != 'application/x-ndjson' and request.get_json(silent=True) is None:
+        return jsonify(error='Expected a JSON array or an NDJSON body'), 400
+
+    def generate():
+        count = 0
+        for chunk in iter_chunks(iter_records()):
+            for result in run_records(name, calculator, chunk, units, conversions):
+                yield json.dumps({'index': count, **result}) + '\n'
+                count += 1
+        metrics.observe('api_records', count, buckets=SIZE_BUCKETS, calculator=name)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/gearbox/synthesis', methods=['POST'])
+def api_gearbox_synthesis():
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict):
+        return jsonify(error='Expected a JSON object'), 400
+    try:
+        inputs = build_inputs(GearboxInput, record)
+        gear_sets = synthesize_gear_sets(inputs, top_n=int(record.get('top_n', 10)))
+    except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+        return jsonify(error=f'Invalid or missing input: {e}'), 400
+    return jsonify(gear_sets=[as_dict(gear_set) for gear_set in gear_sets])
+
+@app.route('/api/chainsprocket/selection', methods=['POST'])
+def api_chain_selection():
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict):
+        return jsonify(error='Expected a JSON object'), 400
+    try:
+        selections = select_chain_sprocket(
+            max_engine_power=float(record['max_engine_power']),
+            small_sprocket_rpm=float(record['small_sprocket_rpm']),
+            target_ratio=float(record['target_ratio']),
+            center_distance_mm=float(record['center_distance_mm']),
+            ratio_tolerance=float(record.get('ratio_tolerance', 0.03)),
+            min_factor_of_safety=float(record.get('min_factor_of_safety', 10)),
+            top_n=int(record.get('top_n', 10)),
+        )
+    except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+        return jsonify(error=f'Invalid or missing input: {e}'), 400
+    return jsonify(selections=[as_dict(selection) for selection in selections])
+
+# --- Design Pipelines ---
+# One pipeline per name for the life of the worker, so its stage memo carries over
+# between requests; runs of a pipeline are serialised since the memo is shared
+PIPELINES = {'brake': brake_pipeline(), 'engine': engine_pipeline()}
+PIPELINE_LOCKS = {name: threading.Lock() for name in PIPELINES}
+
+@app.route('/api/pipeline/<name>', methods=['GET', 'POST'])
+def api_pipeline(name):
+    pipeline = PIPELINES.get(name)
+    if pipeline is None:
+        return jsonify(error=f'Unknown pipeline: {name}'), 404
+    if request.method == 'GET':
+        return jsonify(parameters=sorted(pipeline.required_parameters()), stages=pipeline.order)
+    if request.mimetype != 'application/x-ndjson' and request.get_json(silent=True) is None:
+        return jsonify(error='Expected a JSON object, a JSON array or an NDJSON body'), 400
+
+    def run(spec):
+        if isinstance(spec, Exception):
+            return {'error': f'Malformed record: {spec}'}
+        if not isinstance(spec, dict):
+            return {'error': 'Malformed record: expected a JSON object'}
+        try:
+            with PIPELINE_LOCKS[name]:
+                outputs = pipeline.run(spec)
+            return {'results': {stage: as_dict(output) for stage, output in outputs.items()}}
+        except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+            return {'error': f'Invalid or missing input: {e}'}
+
+    def generate():
+        for index, spec in enumerate(iter_records()):
+            yield json.dumps({'index': index, **run(spec)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# --- CAD Export ---
+@app.route('/api/cad/<part>', methods=['POST'])
+def api_cad(part):
+    # Body: the part's calculator inputs plus 'format' ('step' or 'stl') and any
+    # part options (e.g. center_distance for the connecting rod)
+    spec = PARTS.get(part)
+    if spec is None:
+        return jsonify(error=f'Unknown part: {part}'), 404
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict):
+        return jsonify(error='Expected a JSON object'), 400
+    calculator = CALCULATORS[spec.calculator]
+    try:
+        inputs = build_inputs(calculator.input_class, record)
+        dimensions = spec.dimensions(inputs, calculator.function(inputs), record)
+        key = cad_store.submit(part, dimensions, str(record.get('format', 'step')).lower())
+    except ImportError as e:
+        return jsonify(error=str(e)), 501
+    except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+        return jsonify(error=f'Invalid or missing input: {e}'), 400
+    status = cad_store.status(key)
+    return jsonify(key=key, dimensions=dimensions, status_url=url_for('api_cad_job', key=key), **status,
+                   **cad_file_links(key, status)), 200 if status['status'] == 'done' else 202
+
+def cad_file_links(key, status):
+    return {'file_url': url_for('api_cad_file', key=key)} if status['status'] == 'done' else {}
+
+@app.route('/api/cad/jobs/<key>')
+def api_cad_job(key):
+    status = cad_store.status(key)
+    return jsonify(key=key, **status, **cad_file_links(key, status)), 404 if status['status'] == 'unknown' else 200
+
+@app.route('/api/cad/files/<key>')
+def api_cad_file(key):
+    found = cad_store.find(key)
+    if found is None:
+        return jsonify(error=f'No generated file for {key}'), 404
+    path, export_format = found
+    return send_file(path, as_attachment=True, download_name=f'{key[:12]}.{export_format}')
+
+# --- Background Jobs ---
+def job_links(job_id):
+    return {'status_url': url_for('api_job', job_id=job_id), 'events_url': url_for('api_job_events', job_id=job_id)}
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def api_jobs():
+    if request.method == 'GET':
+        return jsonify(jobs=job_queue.list(status=request.args.get('status'), limit=request.args.get('limit', 100, type=int)))
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict) or not isinstance(record.get('params'), dict):
+        return jsonify(error="Expected a JSON object with 'kind' and 'params'"), 400
+    if record.get('kind') not in STUDIES:
+        return jsonify(error=f"Unknown study: {record.get('kind')}", studies=sorted(STUDIES)), 400
+    try:
+        job_id = job_queue.submit(record['kind'], record['params'], priority=int(record.get('priority', 0)),
+                                  max_memory_mb=record.get('max_memory_mb'), max_cpu_seconds=record.get('max_cpu_seconds'))
+    except (ValueError, TypeError) as e:
+        return jsonify(error=f'Invalid job: {e}'), 400
+    return jsonify(id=job_id, status='queued', **job_links(job_id)), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def api_job(job_id):
+    if request.method == 'DELETE':
+        if not job_queue.cancel(job_id):
+            return jsonify(error='Job is not queued or running'), 409
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify(error=f'Unknown job: {job_id}'), 404
+    job['files'] = {name: url_for('api_job_file', job_id=job_id, name=name) for name in job['files']}
+    return jsonify(**job, **job_links(job_id))
+
+@app.route('/api/jobs/<job_id>/events')
+def api_job_events(job_id):
+    # Server-sent events: one 'progress' event per change, then an event named after the final state.
+    # Each stream ends after JOB_EVENTS_LIFETIME seconds and the client reconnects (or polls status_url).
+    def generate():
+        yield 'retry: 1000\n\n'
+        for snapshot in job_queue.events(job_id, lifetime=JOB_EVENTS_LIFETIME):
+            event = snapshot['status'] if snapshot['status'] in TERMINAL_STATES else 'progress'
+            yield f'event: {event}\ndata: {json.dumps(snapshot)}\n\n'
+
+    if job_queue.get(job_id) is None:
+        return jsonify(error=f'Unknown job: {job_id}'), 404
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/jobs/<job_id>/files/<name>')
+def api_job_file(job_id, name):
+    if job_queue.get(job_id) is None:
+        return jsonify(error=f'Unknown job: {job_id}'), 404
+    return send_from_directory(job_queue.job_directory(job_id), name, as_attachment=True)
+
+# --- Design History ---
+def design_filters():
+    # Query arguments <field>__<operator>=<value>, e.g. safety_factor__lt=2&disc_mass__lt=1
+    filters = []
+    for argument, value in request.args.items():
+        field, separator, operator = argument.rpartition('__')
+        if separator:
+            filters.append((field, operator, value))
+    return filters
+
+@app.route('/api/designs')
+def api_designs_stats():
+    return jsonify(design_store.stats())
+
+@app.route('/api/designs/<name>')
+def api_designs(name):
+    # Optional order_by=<field> (prefix with '-' for descending) and limit
+    if name not in CALCULATORS:
+        return jsonify(error=f'Unknown calculator: {name}'), 404
+    order_by = request.args.get('order_by')
+    try:
+        designs = design_store.query(name, design_filters(), order_by=order_by.lstrip('-') if order_by else None,
+                                     descending=bool(order_by) and order_by.startswith('-'),
+                                     limit=request.args.get('limit', 100, type=int))
+    except KeyError as e:
+        return jsonify(error=f'Unknown field: {e}'), 400
+    except (ValueError, TypeError) as e:
+        return jsonify(error=f'Invalid query: {e}'), 400
+    return jsonify(designs=designs)
+
+@app.route('/api/designs/<name>/<int:design_id>')
+def api_design(name, design_id):
+    if name not in CALCULATORS:
+        return jsonify(error=f'Unknown calculator: {name}'), 404
+    design = design_store.get(name, design_id)
+    if design is None:
+        return jsonify(error=f'Unknown design: {design_id}'), 404
+    return jsonify(design)
+
+@app.route('/api/designs/<name>/diff/<int:first_id>/<int:second_id>')
+def api_design_diff(name, first_id, second_id):
+    if name not in CALCULATORS:
+        return jsonify(error=f'Unknown calculator: {name}'), 404
+    changes = design_store.diff(name, first_id, second_id)
+    if changes is None:
+        return jsonify(error='Unknown design'), 404
+    return jsonify(changes)
+
+# --- Catalogue ---
+@app.route('/api/catalogue')
+def api_catalogue():
+    return jsonify({name: {'entries': len(table), 'classes': list(table.by_class), 'properties': list(table.properties)}
+                    for name, table in CATALOGUE.items()})
+
+@app.route('/api/catalogue/<name>')
+def api_catalogue_table(name):
+    # Optional class=<class> and <property>__<operator>=<value> filters, as for designs
+    table = CATALOGUE.get(name)
+    if table is None:
+        return jsonify(error=f'Unknown catalogue: {name}'), 404
+    try:
+        ids = table.select(request.args.get('class'), design_filters())
+    except KeyError as e:
+        return jsonify(error=f'Unknown property: {e}'), 400
+    except (ValueError, TypeError) as e:
+        return jsonify(error=f'Invalid query: {e}'), 400
+    return jsonify(entries=[table.row(key) for key in ids.tolist()])
+
+@app.route('/api/catalogue/<name>/<key>')
+def api_catalogue_entry(name, key):
+    table = CATALOGUE.get(name)
+    if table is None or key not in table:
+        return jsonify(error=f'Unknown catalogue entry: {name}/{key}'), 404
+    return jsonify(table.row(key))
+
 if __name__ == '__main__':
+    job_queue.start()
     app.run(debug=True)
\ No newline at end of file
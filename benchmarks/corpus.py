@@ -0,0 +1,81 @@
+from dataclasses import MISSING, fields
+import numpy as np
+
+from calculations.registry import CALCULATORS
+from calculations.catalogue import CHAINS
+
+# Input corpora for the benchmarks: one typical design per calculator, varied
+# the way submitted forms vary, from commuters to superbikes. Float fields are
+# drawn within SPREAD of the typical value unless a field lists its own range;
+# integer and text fields are drawn from realistic choices.
+
+SPREAD = 0.25
+
+TYPICAL = {
+    'disc': dict(mass_vehicle=200, mass_rider=80, initial_velocity=60, stopping_distance=20, wheel_radius=0.3,
+                 friction_coefficient=0.4, caliper_piston_area=12, hydraulic_pressure=1, number_of_discs=1,
+                 material_density=7850, material_specific_heat=450, material_yield_strength=350,
+                 max_outer_diameter=320, initial_disc_thickness=5),
+    'caliper': dict(required_braking_torque=800, number_of_pistons=2, hydraulic_pressure=8, pad_contact_area=20,
+                    number_of_discs=1, caliper_material_yield_strength=280, disc_effective_radius=0.12,
+                    friction_coefficient=0.4),
+    'brakepad': dict(total_mass=280, initial_velocity=60, stopping_distance=20, pad_area=20, pad_wear_rate=0.1,
+                     pad_thickness=10),
+    'tyre': dict(bike_type='sports', vehicle_mass=180, rim_diameter=17, aspect_ratio=70, section_width=120),
+    'piston': dict(cylinder_bore=80, stroke_length=60, connecting_rod_length=120, deck_height=190,
+                   max_combustion_pressure=6, piston_material_strength=200, safety_factor=2),
+    'connectingrod': dict(piston_diameter=80, max_combustion_pressure=6, reciprocating_mass=0.5, crank_radius=30,
+                          piston_pin_diameter=20, crankpin_diameter=35, max_engine_rpm=9000,
+                          rod_material_yield_strength=600, bolt_material_yield_strength=900, safety_factor=2),
+    'crankshaft': dict(piston_diameter=80, max_combustion_pressure=6, cylinder_bore_spacing=90,
+                       crankshaft_material_yield_strength=600, allowable_bearing_pressure=10, safety_factor=2),
+    'clutch': dict(max_engine_torque=60, outer_diameter=150, friction_coefficient=0.3, allowable_surface_pressure=0.2,
+                   safety_factor=1.5),
+    'gearbox': dict(max_engine_torque=100, primary_drive_ratio=1.8, first_gear_ratio=2.8, top_gear_ratio=0.9,
+                    number_of_gears=6, gear_material_strength=200, safety_factor=1.5, module=2.5,
+                    pinion_teeth_1st_gear=17),
+    'chainsprocket': dict(max_engine_power=30, small_sprocket_rpm=3000, chain_type='520', small_sprocket_teeth=15,
+                          large_sprocket_teeth=45, center_distance_mm=600),
+    'rim': dict(tyre_width_mm=120, tyre_aspect_ratio=70, rim_diameter_inches=17, proposed_rim_width_inches=3.5),
+    'cylinder': dict(cylinder_bore_diameter=80, stroke_length=60, max_combustion_pressure=6,
+                     cylinder_material_strength=200, safety_factor=2),
+    'wristpin': dict(piston_diameter=80, max_gas_pressure=6, wrist_pin_material_yield_strength=600),
+}
+
+# Fields that do not follow SPREAD: a list of choices or a (low, high) range
+VARIATION = {
+    'disc': {'number_of_discs': [1, 1, 2], 'initial_velocity': (40, 160), 'max_outer_diameter': (220, 330)},
+    'caliper': {'number_of_pistons': [1, 2, 2, 4], 'number_of_discs': [1, 1, 2]},
+    'brakepad': {'initial_velocity': (40, 160)},
+    'tyre': {'bike_type': ['commuter', 'sports', 'superbike', 'cruiser_touring', 'offroad'],
+             'rim_diameter': [17, 17, 18, 19, 21], 'aspect_ratio': (50, 90), 'section_width': (80, 200)},
+    'piston': {'cylinder_bore': (50, 100)},
+    'connectingrod': {'max_engine_rpm': (6000, 14000)},
+    'gearbox': {'number_of_gears': [4, 5, 5, 6, 6], 'module': [2, 2.25, 2.5, 2.75, 3],
+                'pinion_teeth_1st_gear': [13, 14, 15, 16, 17, 18]},
+    'chainsprocket': {'chain_type': list(CHAINS), 'small_sprocket_teeth': [13, 14, 15, 16, 17],
+                      'large_sprocket_teeth': [38, 40, 42, 43, 45, 47, 50]},
+    'rim': {'tyre_width_mm': [90, 100, 110, 120, 130, 150, 160, 180, 190], 'tyre_aspect_ratio': [55, 60, 65, 70, 80, 90],
+            'rim_diameter_inches': [17, 17, 18, 19, 21], 'proposed_rim_width_inches': [2.15, 2.5, 2.75, 3.5, 4.5, 5.5, 6.0]},
+}
+
+def corpus(name: str, size: int = 200, seed: int = 0) -> list:
+    # size form records for calculator name, reproducible for a given seed
+    rng = np.random.default_rng([seed, sorted(CALCULATORS).index(name)])
+    typical, variation = TYPICAL[name], VARIATION.get(name, {})
+    records = []
+    for _ in range(size):
+        record = {}
+        for field in fields(CALCULATORS[name].input_class):
+            if field.name not in typical and field.default is not MISSING:
+                continue
+            spec = variation.get(field.name)
+            if isinstance(spec, list):
+                value = spec[rng.integers(len(spec))]
+            elif isinstance(spec, tuple):
+                value = rng.uniform(*spec)
+            else:
+                value = typical[field.name] * rng.uniform(1 - SPREAD, 1 + SPREAD)
+            record[field.name] = field.type(round(value) if field.type is int else value)
+        records.append(record)
+    return records
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Measurements compute and render time, so the shared result cache and the
+# design store are off (set before app is imported)
+os.environ['RESULT_CACHE_SIZE'] = '0'
+os.environ['DESIGN_DB_PATH'] = ''
+
+import numpy as np
+
+from calculations.registry import CALCULATORS, evaluate_batch
+from benchmarks.corpus import corpus
+
+# Performance benchmarks for the calculators and the web app:
+#
+#   python -m benchmarks.run                               # run and print
+#   python -m benchmarks.run --save benchmarks/results/baseline.json
+#   python -m benchmarks.run --compare benchmarks/results/baseline.json --threshold 0.25
+#
+# Every metric records whether lower or higher is better; --compare exits with
+# status 1 when any metric is worse than the stored run by more than threshold.
+# Timings take the best of several repeats, which is the least noisy estimate
+# on a shared machine; compare runs from the same host only.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITES = ('latency', 'throughput', 'routes', 'memory', 'startup')
+
+def _metric(value: float, unit: str, better: str = 'lower', **extra) -> dict:
+    return {'value': value, 'unit': unit, 'better': better, **extra}
+
+def _inputs(name: str, size: int, seed: int) -> list:
+    calculator = CALCULATORS[name]
+    return [calculator.input_class(**record) for record in corpus(name, size, seed)]
+
+# --- Calculators ---
+def bench_latency(size: int, repeat: int, seed: int) -> dict:
+    # Per-call time of calculate_* over the corpus, inputs built beforehand
+    metrics = {}
+    for name, calculator in CALCULATORS.items():
+        inputs = _inputs(name, size, seed)
+        function = calculator.function
+        best = None
+        for _ in range(repeat):
+            times = []
+            for item in inputs:
+                started = time.perf_counter_ns()
+                function(item)
+                times.append(time.perf_counter_ns() - started)
+            if best is None or statistics.median(times) < statistics.median(best):
+                best = times
+        metrics[f'latency.{name}'] = _metric(statistics.median(best) / 1000, 'us',
+                                             p95=float(np.percentile(best, 95)) / 1000)
+    return metrics
+
+def bench_throughput(rows: int, repeat: int, seed: int) -> dict:
+    # Rows per second through evaluate_batch, the path sweeps and studies use
+    metrics = {}
+    for name, calculator in CALCULATORS.items():
+        records = corpus(name, 500, seed)
+        columns = {key: np.resize(np.array([record[key] for record in records]), rows) for key in records[0]}
+        # Calculators without a vectorized path loop over rows; a smaller batch gives the same rate
+        count = rows if calculator.batch_function is not None or calculator.vectorized else max(rows // 20, 1)
+        if count != rows:
+            columns = {key: column[:count] for key, column in columns.items()}
+        best = min(_timed(lambda: evaluate_batch(name, columns)) for _ in range(repeat))
+        metrics[f'throughput.{name}'] = _metric(count / best, 'rows/s', 'higher')
+    return metrics
+
+def _timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def bench_memory(size: int, seed: int) -> dict:
+    # Peak Python allocation of one call, median over the corpus
+    metrics = {}
+    for name, calculator in CALCULATORS.items():
+        inputs = _inputs(name, min(size, 50), seed)
+        calculator.function(inputs[0])
+        peaks = []
+        tracemalloc.start()
+        for item in inputs:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            calculator.function(item)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+        metrics[f'memory.{name}'] = _metric(statistics.median(peaks) / 1024, 'KiB')
+    return metrics
+
+# --- Web app ---
+def bench_routes(size: int, repeat: int, seed: int) -> dict:
+    # Form POST to each HTML route through the test client: input parsing,
+    # calculation and Jinja rendering, without a network stack
+    from app import app
+    client = app.test_client()
+    metrics = {}
+    for name in CALCULATORS:
+        forms = [{key: str(value) for key, value in record.items()} for record in corpus(name, min(size, 100), seed)]
+        client.post(f'/{name}', data=forms[0])
+        best = None
+        for _ in range(repeat):
+            times = []
+            for form in forms:
+                started = time.perf_counter_ns()
+                response = client.post(f'/{name}', data=form)
+                times.append(time.perf_counter_ns() - started)
+                if response.status_code != 200:
+                    raise RuntimeError(f'/{name} answered {response.status_code}')
+            if best is None or statistics.median(times) < statistics.median(best):
+                best = times
+        metrics[f'route.{name}'] = _metric(statistics.median(best) / 1e6, 'ms', p95=float(np.percentile(best, 95)) / 1e6)
+    return metrics
+
+def bench_startup(repeat: int) -> dict:
+    # Wall time of a fresh interpreter importing the calculators and the whole app
+    metrics = {}
+    environment = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    for label, module in (('calculations', 'calculations.registry'), ('app', 'app')):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', f'import {module}'], cwd=ROOT, env=environment, check=True)
+            times.append(time.perf_counter() - started)
+        metrics[f'startup.{label}'] = _metric(min(times) * 1000, 'ms')
+    return metrics
+
+def run(suites=SUITES, size: int = 200, repeat: int = 5, rows: int = 100_000, seed: int = 0) -> dict:
+    metrics = {}
+    if 'latency' in suites:
+        metrics.update(bench_latency(size, repeat, seed))
+    if 'throughput' in suites:
+        metrics.update(bench_throughput(rows, repeat, seed))
+    if 'memory' in suites:
+        metrics.update(bench_memory(size, seed))
+    if 'routes' in suites:
+        metrics.update(bench_routes(size, repeat, seed))
+    if 'startup' in suites:
+        metrics.update(bench_startup(repeat))
+    return {
+        'meta': {'timestamp': time.time(), 'python': platform.python_version(), 'numpy': np.__version__,
+                 'platform': platform.platform(), 'cpus': os.cpu_count(), 'commit': _commit(),
+                 'size': size, 'repeat': repeat, 'rows': rows, 'seed': seed},
+        'metrics': metrics,
+    }
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# --- Comparison ---
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    # [(metric, baseline value, current value, slowdown, regressed)], slowdown > 0 meaning worse
+    rows = []
+    for name, metric in current['metrics'].items():
+        previous = baseline['metrics'].get(name)
+        if previous is None or not previous['value'] or not metric['value']:
+            continue
+        if metric['better'] == 'higher':
+            slowdown = previous['value'] / metric['value'] - 1
+        else:
+            slowdown = metric['value'] / previous['value'] - 1
+        rows.append((name, previous['value'], metric['value'], slowdown, slowdown > threshold))
+    return rows
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the calculators and the web app.')
+    parser.add_argument('--suite', action='append', choices=SUITES, help='run only these suites (repeatable)')
+    parser.add_argument('--size', type=int, default=200, help='corpus records per calculator')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=100_000, help='rows per batch in the throughput suite')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed fractional regression')
+    args = parser.parse_args(argv)
+
+    result = run(args.suite or SUITES, args.size, args.repeat, args.rows, args.seed)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as output:
+            json.dump(result, output, indent=1)
+
+    if not args.compare:
+        for name, metric in result['metrics'].items():
+            print(f"{name:28} {metric['value']:14.3f} {metric['unit']}")
+        return 0
+    with open(args.compare) as stored:
+        baseline = json.load(stored)
+    rows = compare(result, baseline, args.threshold)
+    for name, previous, value, slowdown, regressed in rows:
+        print(f"{name:28} {previous:14.3f} -> {value:14.3f} {slowdown:+8.1%}{'  REGRESSION' if regressed else ''}")
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} of {len(rows)} metrics regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
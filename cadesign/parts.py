@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+import numpy as np
+
+try:
+    import cadquery as cq
+    from cadquery import exporters
+except ImportError:
+    cq = exporters = None
+
+# Parametric solids built from calculator results. Every part first reduces a
+# calculator's inputs and outputs to a flat set of rounded dimensions (mm);
+# the solid is built from that set alone, so the set identifies the file.
+
+DIMENSION_DECIMALS = 2
+EXPORT_FORMATS = {'step': 'STEP', 'stl': 'STL'}
+
+@dataclass(frozen=True)
+class Part:
+    calculator: str
+    dimensions: object  # (inputs, outputs, options) -> {name: mm}
+    build: object       # dimensions -> cq.Workplane
+
+def _rounded(**values) -> dict:
+    dimensions = {name: round(float(value), DIMENSION_DECIMALS) for name, value in values.items()}
+    invalid = [name for name, value in dimensions.items() if not np.isfinite(value) or value <= 0]
+    if invalid:
+        raise ValueError(f'Cannot model non-positive or invalid dimensions: {", ".join(invalid)}')
+    return dimensions
+
+# --- Brake disc ---
+def _disc_dimensions(inputs, outputs, options) -> dict:
+    return _rounded(
+        outer_diameter=outputs.outer_diameter,
+        inner_diameter=outputs.inner_diameter,
+        thickness=outputs.thickness,
+        drilled_holes=options.get('drilled_holes', 24),
+    )
+
+def _build_disc(d):
+    # Annulus with one ring of cross-drilled holes on the effective radius
+    band = (d['outer_diameter'] - d['inner_diameter']) / 2
+    return (cq.Workplane('XY')
+            .circle(d['outer_diameter'] / 2).circle(d['inner_diameter'] / 2).extrude(d['thickness'])
+            .faces('>Z').workplane()
+            .polarArray((d['outer_diameter'] + d['inner_diameter']) / 4, 0, 360, int(d['drilled_holes']))
+            .hole(0.2 * band))
+
+# --- Piston ---
+def _piston_dimensions(inputs, outputs, options) -> dict:
+    return _rounded(
+        diameter=outputs.piston_diameter,
+        compression_height=outputs.compression_height,
+        crown_thickness=outputs.crown_thickness,
+        skirt_length=outputs.piston_skirt_length,
+        pin_diameter=outputs.gudgeon_pin_outer_diameter,
+    )
+
+def _build_piston(d):
+    # Cup-shaped body with the crown on top and the pin bore compression_height below it
+    height = max(d['compression_height'] + d['pin_diameter'], d['skirt_length'])
+    wall = max(d['crown_thickness'] / 2, 0.05 * d['diameter'])
+    body = (cq.Workplane('XY').circle(d['diameter'] / 2).extrude(height)
+            .faces('<Z').workplane().hole(d['diameter'] - 2 * wall, height - d['crown_thickness']))
+    pin_bore = (cq.Workplane('YZ', origin=(-d['diameter'] / 2, 0, 0))
+                .center(0, height - d['compression_height']).circle(d['pin_diameter'] / 2).extrude(d['diameter']))
+    return body.cut(pin_bore)
+
+# --- Cylinder ---
+def _cylinder_dimensions(inputs, outputs, options) -> dict:
+    return _rounded(
+        bore=inputs.cylinder_bore_diameter,
+        outer_diameter=outputs.outer_cylinder_diameter,
+        length=outputs.cylinder_length,
+        flange_diameter=outputs.cylinder_flange_diameter,
+        flange_thickness=outputs.cylinder_flange_thickness,
+    )
+
+def _build_cylinder(d):
+    barrel = cq.Workplane('XY').circle(d['outer_diameter'] / 2).circle(d['bore'] / 2).extrude(d['length'])
+    flange = cq.Workplane('XY').circle(d['flange_diameter'] / 2).circle(d['bore'] / 2).extrude(d['flange_thickness'])
+    return barrel.union(flange)
+
+# --- Connecting rod ---
+def _rod_dimensions(inputs, outputs, options) -> dict:
+    if 'center_distance' not in options:
+        raise KeyError('center_distance')
+    return _rounded(
+        center_distance=options['center_distance'],
+        big_end_bore=inputs.crankpin_diameter,
+        big_end_outer_diameter=outputs.big_end_outer_diameter,
+        small_end_bore=inputs.piston_pin_diameter,
+        small_end_outer_diameter=outputs.small_end_outer_diameter,
+        big_end_shank_height=outputs.big_end_shank_height,
+        small_end_shank_height=outputs.small_end_shank_height,
+        flange_width=outputs.big_end_flange_width,
+        web_thickness=outputs.web_and_flange_thickness,
+    )
+
+def _build_rod(d):
+    # Big end at the origin, small end along +X; tapered I-section shank
+    length, width, web = d['center_distance'], d['flange_width'], d['web_thickness']
+    big_radius, small_radius = d['big_end_outer_diameter'] / 2, d['small_end_outer_diameter'] / 2
+    big_half, small_half = d['big_end_shank_height'] / 2, d['small_end_shank_height'] / 2
+    rod = (cq.Workplane('XY').circle(big_radius).extrude(width)
+           .union(cq.Workplane('XY').center(length, 0).circle(small_radius).extrude(width))
+           .union(cq.Workplane('XY').polyline([(0, -big_half), (length, -small_half), (length, small_half), (0, big_half)])
+                  .close().extrude(width)))
+    # Pockets on both faces leave the web and flanges web_thickness thick
+    pocket_depth = (width - web) / 2
+    start, stop = big_radius, length - small_radius
+    if pocket_depth > 0 and stop > start:
+        def inset(x):
+            return big_half + (small_half - big_half) * x / length - web
+        outline = [(start, -inset(start)), (stop, -inset(stop)), (stop, inset(stop)), (start, inset(start))]
+        for z in (0, width - pocket_depth):
+            rod = rod.cut(cq.Workplane('XY', origin=(0, 0, z)).polyline(outline).close().extrude(pocket_depth))
+    bores = (cq.Workplane('XY').circle(d['big_end_bore'] / 2).extrude(width)
+             .union(cq.Workplane('XY').center(length, 0).circle(d['small_end_bore'] / 2).extrude(width)))
+    return rod.cut(bores)
+
+# --- Sprocket ---
+def _sprocket_dimensions(inputs, outputs, options) -> dict:
+    # options['sprocket'] picks 'small' (gearbox) or 'large' (wheel), default large
+    size = options.get('sprocket', 'large')
+    if size not in ('small', 'large'):
+        raise ValueError(f"sprocket must be 'small' or 'large', got {size!r}")
+    teeth = inputs.small_sprocket_teeth if size == 'small' else inputs.large_sprocket_teeth
+    pcd = getattr(outputs, f'{size}_sprocket_pcd')
+    pitch = outputs.chain_pitch_mm
+    return _rounded(
+        teeth=teeth,
+        pitch=pitch,
+        pcd=pcd,
+        outer_diameter=getattr(outputs, f'{size}_sprocket_od'),
+        bore=options.get('bore_diameter', 0.35 * (pcd - pitch)),
+    )
+
+def _build_sprocket(d):
+    # Roller seats (ISO 606 minimum seat diameter for a 0.625 p roller) cut on the PCD
+    roller = 0.625 * d['pitch']
+    seat = 1.005 * roller + 0.076
+    width = 0.93 * 0.5 * d['pitch']
+    return (cq.Workplane('XY').circle(d['outer_diameter'] / 2).circle(d['bore'] / 2).extrude(width)
+            .faces('>Z').workplane().polarArray(d['pcd'] / 2, 0, 360, int(d['teeth'])).hole(seat))
+
+PARTS = {
+    'disc': Part('disc', _disc_dimensions, _build_disc),
+    'piston': Part('piston', _piston_dimensions, _build_piston),
+    'cylinder': Part('cylinder', _cylinder_dimensions, _build_cylinder),
+    'connectingrod': Part('connectingrod', _rod_dimensions, _build_rod),
+    'sprocket': Part('chainsprocket', _sprocket_dimensions, _build_sprocket),
+}
+
+def export_part(part: str, dimensions: dict, export_format: str, path: str):
+    # Builds the solid and writes it to path in the given format
+    if cq is None:
+        raise ImportError('CAD export requires cadquery (pip install cadquery)')
+    solid = PARTS[part].build(dimensions)
+    exporters.export(solid, path, getattr(exporters.ExportTypes, EXPORT_FORMATS[export_format]))
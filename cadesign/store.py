@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from cadesign.parts import EXPORT_FORMATS, PARTS, cq, export_part
+
+# Generated files are content-addressed: the name is a hash of the part, the
+# format and its rounded dimensions, so a design that was modelled before is
+# served straight from disk by any worker. Solids are built in a process pool
+# off the request thread; a failed build leaves a .error file with the reason.
+# A build in progress is marked by a .pending file holding its state and the
+# process that owns it, so every worker reports the same status and a key is
+# only built once at a time; a mark whose process has died counts as failed.
+
+MODEL_VERSION = 1  # bump when a builder changes so stale files are not reused
+_KEY = re.compile(r'^[0-9a-f]{64}$')
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+def _mark(pending_path: str, status: str):
+    partial = f'{pending_path}.{os.getpid()}.partial'
+    with open(partial, 'w') as marker:
+        json.dump({'status': status, 'pid': os.getpid()}, marker)
+    os.replace(partial, pending_path)
+
+def _read_mark(pending_path: str):
+    try:
+        with open(pending_path) as marker:
+            return json.load(marker)
+    except (OSError, ValueError):
+        return None
+
+def _generate(part: str, dimensions: dict, export_format: str, path: str):
+    stem = os.path.splitext(path)[0]
+    partial = f'{path}.{os.getpid()}.partial'
+    _mark(f'{stem}.pending', 'running')
+    try:
+        export_part(part, dimensions, export_format, partial)
+        os.replace(partial, path)
+    except Exception as e:
+        with open(f'{stem}.error', 'w') as error_file:
+            error_file.write(f'{type(e).__name__}: {e}')
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        os.remove(f'{stem}.pending')
+
+class CadStore:
+    def __init__(self, directory: str, workers: int = 2):
+        self.directory = directory
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    @staticmethod
+    def make_key(part: str, dimensions: dict, export_format: str) -> str:
+        canonical = json.dumps([MODEL_VERSION, part, export_format, dimensions], sort_keys=True)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def path(self, key: str, export_format: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.{export_format}')
+
+    def find(self, key: str):
+        # (path, format) of a generated file, or None
+        if not _KEY.match(key):
+            return None
+        for export_format in EXPORT_FORMATS:
+            path = self.path(key, export_format)
+            if os.path.exists(path):
+                return path, export_format
+        return None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # One pool per process: executors must not be shared across a fork
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._pid = os.getpid()
+        return self._pool
+
+    def submit(self, part: str, dimensions: dict, export_format: str) -> str:
+        # Returns the file key at once; generation only starts when no file exists
+        # and no live process is already building the same key
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'Unknown export format: {export_format}')
+        if part not in PARTS:
+            raise KeyError(part)
+        key = self.make_key(part, dimensions, export_format)
+        path = self.path(key, export_format)
+        if os.path.exists(path):
+            return key
+        if cq is None:
+            raise ImportError('CAD export requires cadquery (pip install cadquery)')
+        stem = os.path.splitext(path)[0]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            pool = self._executor()
+            mark = _read_mark(f'{stem}.pending')
+            if mark is not None and _alive(mark['pid']):
+                return key
+            if mark is not None:
+                os.remove(f'{stem}.pending')  # left by a dead build
+            try:
+                # Exclusive create: of several workers submitting at once, one builds
+                os.close(os.open(f'{stem}.pending', os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                return key
+            _mark(f'{stem}.pending', 'queued')
+            if os.path.exists(f'{stem}.error'):
+                os.remove(f'{stem}.error')
+            pool.submit(_generate, part, dimensions, export_format, path)
+        return key
+
+    def status(self, key: str) -> dict:
+        if not _KEY.match(key):
+            return {'status': 'unknown'}
+        if self.find(key) is not None:
+            return {'status': 'done'}
+        error_path = os.path.join(self.directory, key[:2], f'{key}.error')
+        if os.path.exists(error_path):
+            with open(error_path) as error_file:
+                return {'status': 'failed', 'error': error_file.read()}
+        mark = _read_mark(os.path.join(self.directory, key[:2], f'{key}.pending'))
+        if mark is None:
+            return {'status': 'unknown'}
+        if not _alive(mark['pid']):
+            return {'status': 'failed', 'error': 'Build process lost'}
+        return {'status': mark['status']}
+
+def cad_store_from_environment() -> CadStore:
+    return CadStore(
+        directory=os.environ.get('CAD_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'brake_design_cad')),
+        workers=int(os.environ.get('CAD_WORKERS', 2)),
+    )
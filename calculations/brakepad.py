@@ -1,19 +1,22 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import FRICTION
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class BrakePadInput:
-    total_mass: float
-    initial_velocity: float
-    stopping_distance: float
-    pad_area: float
-    pad_wear_rate: float
-    pad_thickness: float
+    total_mass: float = parameter('kg', gt=0)
+    initial_velocity: float = parameter('km/h', gt=0)
+    stopping_distance: float = parameter('m', gt=0)
+    pad_area: float = parameter('cm²', gt=0)
+    pad_wear_rate: float = parameter('mm/1000km', ge=0, catalogue=('pad', FRICTION, 'wear_rate'))
+    pad_thickness: float = parameter('mm', gt=0)
 
-@dataclass
+@dataclass(slots=True)
 class BrakePadOutput:
-    heat_flux: str
-    wear_life: str
+    heat_flux: float = quantity('kW/m²')
+    wear_life: float = quantity('km')
 
 def calculate_brakepad(inputs: BrakePadInput) -> BrakePadOutput:
     initial_velocity_ms = inputs.initial_velocity * 1000 / 3600
@@ -26,6 +29,6 @@ def calculate_brakepad(inputs: BrakePadInput) -> BrakePadOutput:
     wear_life = (inputs.pad_thickness / inputs.pad_wear_rate) * 1000 if inputs.pad_wear_rate > 0 else float('inf')
 
     return BrakePadOutput(
-        heat_flux=f'{heat_flux / 1000:.2f} kW/m²',
-        wear_life=f'{wear_life:.2f} km'
+        heat_flux=heat_flux / 1000,
+        wear_life=wear_life
     )
@@ -1,25 +1,28 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import FRICTION, MATERIALS
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class CaliperInput:
-    required_braking_torque: float
-    number_of_pistons: int
-    hydraulic_pressure: float
-    pad_contact_area: float
-    number_of_discs: int
-    caliper_material_yield_strength: float
-    disc_effective_radius: float
-    friction_coefficient: float
+    required_braking_torque: float = parameter('Nm', gt=0)
+    number_of_pistons: int = parameter('', ge=1)
+    hydraulic_pressure: float = parameter('MPa', gt=0)
+    pad_contact_area: float = parameter('cm²', gt=0)
+    number_of_discs: int = parameter('', ge=1)
+    caliper_material_yield_strength: float = parameter('MPa', gt=0, catalogue=('material', MATERIALS, 'yield_strength'))
+    disc_effective_radius: float = parameter('m', gt=0)
+    friction_coefficient: float = parameter('', gt=0, le=1, catalogue=('pad', FRICTION, 'friction_coefficient'))
 
-@dataclass
+@dataclass(slots=True)
 class CaliperOutput:
-    total_clamp_force: str
-    clamp_force_per_piston: str
-    piston_diameter: str
-    brake_torque_delivered: str
-    caliper_stress: str
-    safety_factor: str
+    total_clamp_force: float = quantity('N')
+    clamp_force_per_piston: float = quantity('N')
+    piston_diameter: float = quantity('mm')
+    brake_torque_delivered: float = quantity('Nm')
+    caliper_stress: float = quantity('MPa')
+    safety_factor: float = quantity('')
 
 def calculate_caliper(inputs: CaliperInput) -> CaliperOutput:
     hydraulic_pressure_pa = inputs.hydraulic_pressure * 1e6
@@ -38,10 +41,10 @@ def calculate_caliper(inputs: CaliperInput) -> CaliperOutput:
 
 
     return CaliperOutput(
-        total_clamp_force=f'{total_clamp_force:.2f} N',
-        clamp_force_per_piston=f'{clamp_force_per_piston:.2f} N',
-        piston_diameter=f'{piston_diameter_mm:.2f} mm',
-        brake_torque_delivered=f'{brake_torque_delivered:.2f} Nm',
-        caliper_stress=f'{caliper_stress / 1e6:.2f} MPa',
-        safety_factor=f'{safety_factor:.2f}'
+        total_clamp_force=total_clamp_force,
+        clamp_force_per_piston=clamp_force_per_piston,
+        piston_diameter=piston_diameter_mm,
+        brake_torque_delivered=brake_torque_delivered,
+        caliper_stress=caliper_stress / 1e6,
+        safety_factor=safety_factor
     )
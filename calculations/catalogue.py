@@ -0,0 +1,220 @@
+import bisect
+from dataclasses import fields
+from functools import lru_cache
+import numpy as np
+
+# Material and component catalogue. Each table is built once at import into
+# NumPy columns with an id index (O(1) lookup), a row list per class and a
+# sorted copy of every numeric property, so a range query is two binary
+# searches. Input fields that parameter(catalogue=...) links to a table can be
+# filled from a record entry naming a catalogue id (e.g. 'material': 'AISI-4140'),
+# and iterating a table or a select() gives ids to sweep as a categorical dimension.
+
+class Table:
+    def __init__(self, name: str, rows: dict, classes: dict):
+        # rows: {id: {property: number}}, a missing property is NaN; classes: {id: class}
+        self.name = name
+        self.ids = np.array(list(rows))
+        self.properties = tuple(dict.fromkeys(key for row in rows.values() for key in row))
+        self.columns = {key: np.array([row.get(key, np.nan) for row in rows.values()], dtype=float)
+                        for key in self.properties}
+        self.classes = np.array([classes[key] for key in rows])
+        self.index = {key: i for i, key in enumerate(rows)}
+        self.by_class = {kind: np.flatnonzero(self.classes == kind) for kind in dict.fromkeys(self.classes.tolist())}
+        # Per property: row order by value (NaN last) and the values in that order
+        self._sorted, self._bands = {}, {}
+        for key, column in self.columns.items():
+            order = np.argsort(column, kind='stable')
+            self._sorted[key] = (order, column[order])
+            # Python lists for bisect, faster than NumPy for one scalar lookup
+            self._bands[key] = (order.tolist(), column[order].tolist())
+        self._values = {key: column.tolist() for key, column in self.columns.items()}
+        self._id_order = np.argsort(self.ids)
+        self._sorted_ids = self.ids[self._id_order]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    # --- Lookup ---
+    def row(self, key: str) -> dict:
+        i = self.index[key]
+        return {'id': key, 'class': str(self.classes[i]),
+                **{name: None if np.isnan(column[i]) else float(column[i]) for name, column in self.columns.items()}}
+
+    def value(self, key: str, name: str) -> float:
+        return self._values[name][self.index[key]]
+
+    def rows_of(self, keys) -> np.ndarray:
+        # Row numbers of an array of ids, by binary search; KeyError names the unknown ones
+        keys = np.asarray(keys)
+        position = np.minimum(np.searchsorted(self._sorted_ids, keys), len(self.ids) - 1)
+        found = self._sorted_ids[position] == keys
+        if not found.all():
+            raise KeyError(f'not in the {self.name} catalogue: {", ".join(map(str, np.unique(keys[~found])))}')
+        return self._id_order[position]
+
+    def lookup(self, name: str, keys) -> np.ndarray:
+        # A property column for an array of ids
+        return self.columns[name][self.rows_of(keys)]
+
+    # --- Queries ---
+    def select(self, kind: str = None, filters=()) -> np.ndarray:
+        # Ids of class kind (any if None) whose properties pass every (property, operator, value)
+        # filter, operators as in services.designs; in catalogue order. Filters on one
+        # property narrow a single slice of its sorted values.
+        spans = {}
+        excluded = []
+        for name, operator, value in filters:
+            order, values = self._sorted[name]
+            low, high = spans.get(name, (0, np.count_nonzero(~np.isnan(values))))
+            value = float(value)
+            if operator in ('gt', 'ge', 'eq'):
+                low = max(low, np.searchsorted(values, value, 'right' if operator == 'gt' else 'left'))
+            if operator in ('lt', 'le', 'eq'):
+                high = min(high, np.searchsorted(values, value, 'left' if operator == 'lt' else 'right'))
+            if operator == 'ne':
+                excluded.append((name, value))
+            elif operator not in ('gt', 'ge', 'lt', 'le', 'eq'):
+                raise ValueError(f'Unknown operator: {operator}')
+            spans[name] = (low, high)
+        if kind is None:
+            mask = np.ones(len(self.ids), bool)
+        else:
+            mask = np.zeros(len(self.ids), bool)
+            mask[self.by_class.get(kind, [])] = True
+        for name, (low, high) in spans.items():
+            inside = np.zeros(len(self.ids), bool)
+            inside[self._sorted[name][0][low:high]] = True
+            mask &= inside
+        for name, value in excluded:
+            mask &= self.columns[name] != value
+        return self.ids[mask]
+
+    def containing(self, low: str, high: str, value: float) -> int:
+        # Row whose [low, high] property interval holds value, or -1; intervals must not overlap
+        order, starts = self._bands[low]
+        position = bisect.bisect_right(starts, value) - 1
+        if position < 0 or value > self._values[high][order[position]]:
+            return -1
+        return order[position]
+
+# --- Catalogue data ---
+# Typical room-temperature properties: density (kg/m³), specific heat (J/kg·K),
+# yield or 0.2% proof strength (MPa) and ultimate tensile strength (MPa)
+MATERIAL_DATA = {
+    'AISI-1020': ('steel', 7870, 486, 350, 420),
+    'AISI-1045': ('steel', 7850, 486, 530, 625),
+    'AISI-4140': ('steel', 7850, 473, 655, 1020),
+    'AISI-4340': ('steel', 7850, 475, 862, 1282),
+    'SAE-8620': ('steel', 7850, 477, 385, 530),
+    '20MnCr5': ('steel', 7850, 460, 590, 880),
+    '42CrMo4': ('steel', 7850, 473, 750, 1000),
+    'AISI-410': ('stainless steel', 7740, 460, 275, 485),
+    'AISI-420': ('stainless steel', 7800, 460, 345, 655),
+    'X20Cr13': ('stainless steel', 7700, 460, 600, 800),
+    '17-4PH': ('stainless steel', 7800, 460, 1000, 1100),
+    'GG-20': ('cast iron', 7200, 460, 130, 200),
+    'GG-25': ('cast iron', 7200, 460, 165, 250),
+    'GGG-50': ('cast iron', 7100, 461, 320, 500),
+    '6061-T6': ('aluminium', 2700, 896, 276, 310),
+    '7075-T6': ('aluminium', 2810, 960, 503, 572),
+    '2618-T61': ('aluminium', 2760, 875, 370, 440),
+    '4032-T6': ('aluminium', 2680, 864, 315, 380),
+    'A356-T6': ('aluminium', 2685, 963, 186, 262),
+    'Ti-6Al-4V': ('titanium', 4430, 526, 880, 950),
+    'ISO-8.8': ('bolt', 7850, 486, 640, 800),
+    'ISO-10.9': ('bolt', 7850, 486, 940, 1040),
+    'ISO-12.9': ('bolt', 7850, 486, 1100, 1220),
+}
+MATERIALS = Table('materials', {
+    key: {'density': density, 'specific_heat': specific_heat, 'yield_strength': yield_strength,
+          'tensile_strength': tensile_strength}
+    for key, (_, density, specific_heat, yield_strength, tensile_strength) in MATERIAL_DATA.items()
+}, {key: row[0] for key, row in MATERIAL_DATA.items()})
+
+# Friction coefficient, maximum operating temperature (°C) and wear rate (mm/1000km, brake pads only)
+FRICTION_DATA = {
+    'organic': ('brake pad', 0.38, 350, 0.15),
+    'semi-metallic': ('brake pad', 0.42, 500, 0.10),
+    'sintered': ('brake pad', 0.45, 650, 0.08),
+    'ceramic': ('brake pad', 0.40, 600, 0.09),
+    'carbon-ceramic': ('brake pad', 0.42, 900, 0.05),
+    'dry-organic': ('clutch facing', 0.35, 250, None),
+    'dry-sintered': ('clutch facing', 0.40, 450, None),
+    'wet-paper': ('clutch facing', 0.13, 150, None),
+    'wet-cork': ('clutch facing', 0.30, 120, None),
+}
+FRICTION = Table('friction', {
+    key: {'friction_coefficient': mu, 'max_temperature': temperature,
+          **({'wear_rate': wear} if wear is not None else {})}
+    for key, (_, mu, temperature, wear) in FRICTION_DATA.items()
+}, {key: row[0] for key, row in FRICTION_DATA.items()})
+
+# Nominal pitch (mm) and minimum tensile strength (N) per chain size
+CHAIN_DATA = {
+    '415': {'pitch': 12.7, 'strength_N': 15700},
+    '420': {'pitch': 12.7, 'strength_N': 17800},
+    '428': {'pitch': 12.7, 'strength_N': 20600},
+    '520': {'pitch': 15.875, 'strength_N': 35000},
+    '525': {'pitch': 15.875, 'strength_N': 40000},
+    '530': {'pitch': 15.875, 'strength_N': 45000},
+    '532': {'pitch': 15.875, 'strength_N': 50000},
+    '630': {'pitch': 19.05, 'strength_N': 62000},
+}
+CHAINS = Table('chains', CHAIN_DATA, {key: f'{key[0]}xx' for key in CHAIN_DATA})
+
+# Tread thickness (mm) by bike type
+TREADS = Table('treads', {
+    'commuter': {'tread_thickness': 7},
+    'sports': {'tread_thickness': 8},
+    'superbike': {'tread_thickness': 8.5},
+    'cruiser_touring': {'tread_thickness': 9},
+    'offroad': {'tread_thickness': 11},
+}, {'commuter': 'road', 'sports': 'road', 'superbike': 'road', 'cruiser_touring': 'road', 'offroad': 'offroad'})
+
+# Rim width (in): design, minimum and maximum per tyre section width band (mm)
+RIM_WIDTH_DATA = (
+    (90, 100, 2.50, 2.15, 2.75),
+    (110, 120, 3.50, 3.00, 3.75),
+    (130, 140, 4.00, 3.50, 4.50),
+    (150, 160, 4.50, 4.25, 5.00),
+    (170, 180, 5.50, 5.00, 6.00),
+    (190, 200, 6.00, 5.50, 6.50),
+)
+RIM_WIDTHS = Table('rim_widths', {
+    f'{low}-{high}': {'tyre_width_min': low, 'tyre_width_max': high, 'design': design, 'min': least, 'max': most}
+    for low, high, design, least, most in RIM_WIDTH_DATA
+}, {f'{low}-{high}': 'rim width' for low, high, *_ in RIM_WIDTH_DATA})
+
+CATALOGUE = {table.name: table for table in (MATERIALS, FRICTION, CHAINS, TREADS, RIM_WIDTHS)}
+
+# --- Input references ---
+@lru_cache(maxsize=None)
+def references(input_class) -> dict:
+    # {record key: [(field name, table, property)]} for the fields of an input class
+    found = {}
+    for f in fields(input_class):
+        reference = f.metadata.get('catalogue')
+        if reference is not None:
+            key, table, name = reference
+            found.setdefault(key, []).append((f.name, table, name))
+    return found
+
+def resolve_columns(input_class, columns: dict) -> dict:
+    # Batch columns with every linked field that is not given filled from the id column of
+    # its record key, e.g. a 'material' column of catalogue ids; one binary search per key
+    resolved = dict(columns)
+    for key, linked in references(input_class).items():
+        if key not in columns:
+            continue
+        keys = np.asarray(columns[key]).astype(str)
+        for name, table, property_name in linked:
+            if name not in columns:
+                resolved[name] = table.lookup(property_name, keys)
+    return resolved
@@ -1,36 +1,72 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import CHAINS
+from calculations.results import quantity
+from calculations.schema import parameter
+
+# --- Chain and sprocket tables (built once at import) ---
+# Chain pitch (mm) and strength (N) columns come from the chain catalogue
+CHAIN_TYPES = CHAINS.ids
+CHAIN_PITCH = CHAINS.columns['pitch']
+CHAIN_STRENGTH = CHAINS.columns['strength_N']
+CHAIN_INDEX = CHAINS.index
+
+MIN_SPROCKET_TEETH = 10
+MAX_SPROCKET_TEETH = 70
+SPROCKET_TEETH = np.arange(MIN_SPROCKET_TEETH, MAX_SPROCKET_TEETH + 1)
 
 @dataclass
 class ChainSprocketInput:
-    max_engine_power: float
-    small_sprocket_rpm: float
-    chain_type: str
-    small_sprocket_teeth: int
-    large_sprocket_teeth: int
-    center_distance_mm: float
+    max_engine_power: float = parameter('kW', gt=0)
+    small_sprocket_rpm: float = parameter('rpm', gt=0)
+    chain_type: str = parameter(choices=CHAINS)
+    small_sprocket_teeth: int = parameter('', ge=MIN_SPROCKET_TEETH, le=MAX_SPROCKET_TEETH)
+    large_sprocket_teeth: int = parameter('', ge=MIN_SPROCKET_TEETH, le=MAX_SPROCKET_TEETH)
+    center_distance_mm: float = parameter('mm', gt=0)
 
-@dataclass
+# PCD and OD per unit pitch, and the tooth-count terms of the chain length formula
+PCD_PER_PITCH = 1 / np.sin(np.pi / SPROCKET_TEETH)
+OD_PER_PITCH = 0.6 + 1 / np.tan(np.pi / SPROCKET_TEETH)
+_T1, _T2 = np.meshgrid(SPROCKET_TEETH, SPROCKET_TEETH, indexing='ij')
+LINK_TOOTH_TERM = (_T1 + _T2) / 2
+LINK_SPAN_TERM = ((_T2 - _T1) / (2 * np.pi))**2
+
+def _per_pitch(T: int) -> tuple:
+    # Table lookup inside the catalogue range, closed form outside it
+    # (sweeps and batch calls are not held to the schema bounds)
+    if MIN_SPROCKET_TEETH <= T <= MAX_SPROCKET_TEETH:
+        return PCD_PER_PITCH[T - MIN_SPROCKET_TEETH], OD_PER_PITCH[T - MIN_SPROCKET_TEETH]
+    return 1 / np.sin(np.pi / T), 0.6 + 1 / np.tan(np.pi / T)
+
+@dataclass(slots=True)
 class ChainSprocketOutput:
-    final_drive_ratio: str
-    chain_pitch_mm: str
+    final_drive_ratio: float = quantity('', template='{:.2f}:1')
+    chain_pitch_mm: float = quantity('mm', precision=3)
     chain_length_links: int
-    chain_length_mm: str
-    small_sprocket_pcd: str
-    small_sprocket_od: str
-    large_sprocket_pcd: str
-    large_sprocket_od: str
-    factor_of_safety: str
+    chain_length_mm: float = quantity('mm')
+    small_sprocket_pcd: float = quantity('mm')
+    small_sprocket_od: float = quantity('mm')
+    large_sprocket_pcd: float = quantity('mm')
+    large_sprocket_od: float = quantity('mm')
+    factor_of_safety: float = quantity('')
     viability_note: str
     viability_class: str
 
+@dataclass(slots=True)
+class ChainSelection:
+    chain_type: str
+    small_sprocket_teeth: int
+    large_sprocket_teeth: int
+    final_drive_ratio: float = quantity('', template='{:.2f}:1')
+    chain_length_links: int
+    chain_length_mm: float = quantity('mm')
+    small_sprocket_od: float = quantity('mm')
+    large_sprocket_od: float = quantity('mm')
+    factor_of_safety: float = quantity('')
+
 def calculate_chain_sprocket(inputs: ChainSprocketInput) -> ChainSprocketOutput:
-    chain_data = {
-        '520': {'pitch': 15.875, 'strength_N': 35000},
-        '525': {'pitch': 15.875, 'strength_N': 40000},
-        '530': {'pitch': 15.875, 'strength_N': 45000}
-    }
-    P = chain_data[inputs.chain_type]['pitch']
+    chain = CHAIN_INDEX[inputs.chain_type]
+    P = float(CHAIN_PITCH[chain])
     T1 = inputs.small_sprocket_teeth
     T2 = inputs.large_sprocket_teeth
     C = inputs.center_distance_mm
@@ -38,15 +74,17 @@ def calculate_chain_sprocket(inputs: ChainSprocketInput) -> ChainSprocketOutput:
     L_p = 2*(C/P) + (T1+T2)/2 + ((T2-T1)/(2*np.pi))**2 * (P/C)
     chain_length_links = int(np.ceil(L_p / 2.) * 2)
     chain_length_mm = chain_length_links * P
-    small_sprocket_pcd = P / np.sin(np.deg2rad(180 / T1))
-    small_sprocket_od = P * (0.6 + (1 / np.tan(np.deg2rad(180 / T1))))
-    large_sprocket_pcd = P / np.sin(np.deg2rad(180 / T2))
-    large_sprocket_od = P * (0.6 + (1 / np.tan(np.deg2rad(180 / T2))))
+    small_pcd, small_od = _per_pitch(T1)
+    large_pcd, large_od = _per_pitch(T2)
+    small_sprocket_pcd = P * small_pcd
+    small_sprocket_od = P * small_od
+    large_sprocket_pcd = P * large_pcd
+    large_sprocket_od = P * large_od
     service_factor = 1.2
     design_power_kw = inputs.max_engine_power * service_factor
     chain_velocity_ms = (inputs.small_sprocket_rpm * T1 * P) / (60 * 1000)
     working_load_N = (design_power_kw * 1000) / chain_velocity_ms if chain_velocity_ms > 0 else 0
-    breaking_strength_N = chain_data[inputs.chain_type]['strength_N']
+    breaking_strength_N = float(CHAIN_STRENGTH[chain])
     factor_of_safety = breaking_strength_N / working_load_N if working_load_N > 0 else float('inf')
 
     if factor_of_safety > 10:
@@ -57,15 +95,60 @@ def calculate_chain_sprocket(inputs: ChainSprocketInput) -> ChainSprocketOutput:
         viability_class = "not-viable"
 
     return ChainSprocketOutput(
-        final_drive_ratio=f'{final_drive_ratio:.2f}:1',
-        chain_pitch_mm=f'{P:.3f} mm',
+        final_drive_ratio=final_drive_ratio,
+        chain_pitch_mm=P,
         chain_length_links=chain_length_links,
-        chain_length_mm=f'{chain_length_mm:.2f}',
-        small_sprocket_pcd=f'{small_sprocket_pcd:.2f} mm',
-        small_sprocket_od=f'{small_sprocket_od:.2f} mm',
-        large_sprocket_pcd=f'{large_sprocket_pcd:.2f} mm',
-        large_sprocket_od=f'{large_sprocket_od:.2f} mm',
-        factor_of_safety=f'{factor_of_safety:.2f}',
+        chain_length_mm=chain_length_mm,
+        small_sprocket_pcd=small_sprocket_pcd,
+        small_sprocket_od=small_sprocket_od,
+        large_sprocket_pcd=large_sprocket_pcd,
+        large_sprocket_od=large_sprocket_od,
+        factor_of_safety=factor_of_safety,
         viability_note=viability_note,
         viability_class=viability_class
     )
+
+def select_chain_sprocket(max_engine_power: float, small_sprocket_rpm: float, target_ratio: float,
+                          center_distance_mm: float, ratio_tolerance: float = 0.03,
+                          min_factor_of_safety: float = 10, top_n: int = 10) -> list:
+    # Every catalogue chain against every sprocket pair, scored in one pass over
+    # the precomputed tables: (chains, small teeth, large teeth)
+    P = CHAIN_PITCH[:, None, None]
+    T1 = SPROCKET_TEETH[None, :, None]
+    T2 = SPROCKET_TEETH[None, None, :]
+    C = center_distance_mm
+
+    ratio = T2 / T1
+    ratio_ok = np.abs(ratio - target_ratio) <= ratio_tolerance * target_ratio
+
+    service_factor = 1.2
+    design_power_kw = max_engine_power * service_factor
+    chain_velocity_ms = (small_sprocket_rpm * T1 * P) / (60 * 1000)
+    working_load_N = (design_power_kw * 1000) / chain_velocity_ms
+    factor_of_safety = CHAIN_STRENGTH[:, None, None] / working_load_N
+
+    L_p = 2 * (C / P) + LINK_TOOTH_TERM[None] + LINK_SPAN_TERM[None] * (P / C)
+    chain_length_links = (np.ceil(L_p / 2.) * 2).astype(int)
+    chain_length_mm = chain_length_links * P
+    small_sprocket_od = OD_PER_PITCH[None, :, None] * P
+    large_sprocket_od = OD_PER_PITCH[None, None, :] * P
+
+    # Sprockets must clear each other at the given center distance
+    feasible = ratio_ok & (factor_of_safety >= min_factor_of_safety) & ((small_sprocket_od + large_sprocket_od) / 2 < C)
+    c, i, j = np.nonzero(feasible)
+    # Rank by factor of safety (to 0.1), then chain length, then large sprocket OD
+    order = np.lexsort((large_sprocket_od[c, 0, j], chain_length_mm[c, i, j], -np.round(factor_of_safety[c, i, 0], 1)))[:top_n]
+    return [
+        ChainSelection(
+            chain_type=str(CHAIN_TYPES[c[k]]),
+            small_sprocket_teeth=int(SPROCKET_TEETH[i[k]]),
+            large_sprocket_teeth=int(SPROCKET_TEETH[j[k]]),
+            final_drive_ratio=float(ratio[0, i[k], j[k]]),
+            chain_length_links=int(chain_length_links[c[k], i[k], j[k]]),
+            chain_length_mm=float(chain_length_mm[c[k], i[k], j[k]]),
+            small_sprocket_od=float(small_sprocket_od[c[k], i[k], 0]),
+            large_sprocket_od=float(large_sprocket_od[c[k], 0, j[k]]),
+            factor_of_safety=float(factor_of_safety[c[k], i[k], 0]),
+        )
+        for k in order
+    ]
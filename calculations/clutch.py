@@ -1,22 +1,25 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import FRICTION
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class ClutchInput:
-    max_engine_torque: float
-    outer_diameter: float
-    friction_coefficient: float
-    allowable_surface_pressure: float
-    safety_factor: float
+    max_engine_torque: float = parameter('Nm', gt=0)
+    outer_diameter: float = parameter('mm', gt=0)
+    friction_coefficient: float = parameter('', gt=0, le=1, catalogue=('facing', FRICTION, 'friction_coefficient'))
+    allowable_surface_pressure: float = parameter('MPa', gt=0)
+    safety_factor: float = parameter('', gt=0)
 
-@dataclass
+@dataclass(slots=True)
 class ClutchOutput:
     clutch_type: str
-    torque_capacity: str
-    inner_diameter: str
-    mean_radius: str
-    required_clamping_force: str
-    actual_surface_pressure: str
+    torque_capacity: float = quantity('Nm')
+    inner_diameter: float = quantity('mm')
+    mean_radius: float = quantity('mm')
+    required_clamping_force: float = quantity('N')
+    actual_surface_pressure: float = quantity('MPa', precision=3)
     viability_note: str
     viability_class: str
 
@@ -33,20 +36,18 @@ def calculate_clutch(inputs: ClutchInput) -> ClutchOutput:
     actual_surface_pressure = required_clamping_force / face_area
     actual_surface_pressure_mpa = actual_surface_pressure / 1e6
 
-    if actual_surface_pressure_mpa <= inputs.allowable_surface_pressure:
-        viability_note = "Design is viable. Surface pressure is within allowable limits."
-        viability_class = "viable"
-    else:
-        viability_note = "Design NOT viable. Surface pressure exceeds limits. Increase outer diameter or check parameters."
-        viability_class = "not-viable"
+    viable = actual_surface_pressure_mpa <= inputs.allowable_surface_pressure
+    viability_note = np.where(viable, "Design is viable. Surface pressure is within allowable limits.",
+                              "Design NOT viable. Surface pressure exceeds limits. Increase outer diameter or check parameters.")[()]
+    viability_class = np.where(viable, "viable", "not-viable")[()]
 
     return ClutchOutput(
         clutch_type='Single Plate Dry Clutch',
-        torque_capacity=f'{torque_capacity:.2f} Nm',
-        inner_diameter=f'{inner_diameter_mm:.2f} mm',
-        mean_radius=f'{mean_radius_mm:.2f} mm',
-        required_clamping_force=f'{required_clamping_force:.2f} N',
-        actual_surface_pressure=f'{actual_surface_pressure_mpa:.3f} MPa',
+        torque_capacity=torque_capacity,
+        inner_diameter=inner_diameter_mm,
+        mean_radius=mean_radius_mm,
+        required_clamping_force=required_clamping_force,
+        actual_surface_pressure=actual_surface_pressure_mpa,
         viability_note=viability_note,
         viability_class=viability_class
     )
@@ -1,36 +1,43 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import MATERIALS
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class ConnectingRodInput:
-    piston_diameter: float
-    max_combustion_pressure: float
-    reciprocating_mass: float
-    crank_radius: float
-    piston_pin_diameter: float
-    crankpin_diameter: float
-    max_engine_rpm: float
-    rod_material_yield_strength: float
-    bolt_material_yield_strength: float
-    safety_factor: float
+    piston_diameter: float = parameter('mm', gt=0)
+    max_combustion_pressure: float = parameter('MPa', gt=0)
+    reciprocating_mass: float = parameter('kg', gt=0)
+    crank_radius: float = parameter('mm', gt=0)
+    piston_pin_diameter: float = parameter('mm', gt=0)
+    crankpin_diameter: float = parameter('mm', gt=0)
+    max_engine_rpm: float = parameter('rpm', gt=0)
+    rod_material_yield_strength: float = parameter('MPa', gt=0, catalogue=('rod_material', MATERIALS, 'yield_strength'))
+    bolt_material_yield_strength: float = parameter('MPa', gt=0, catalogue=('bolt_material', MATERIALS, 'yield_strength'))
+    safety_factor: float = parameter('', gt=0)
+    # Peak loads from a crank-angle analysis (N); 0 keeps the single-point estimates
+    design_compressive_load: float = parameter('N', default=0.0, ge=0)
+    design_bolt_load: float = parameter('N', default=0.0, ge=0)
 
-@dataclass
+@dataclass(slots=True)
 class ConnectingRodOutput:
-    big_end_shank_height: str
-    big_end_flange_width: str
-    small_end_shank_height: str
-    small_end_flange_width: str
-    web_and_flange_thickness: str
-    bolt_diameter: str
-    small_end_outer_diameter: str
-    small_end_wall_thickness: str
-    big_end_outer_diameter: str
-    big_end_wall_thickness: str
+    big_end_shank_height: float = quantity('mm')
+    big_end_flange_width: float = quantity('mm')
+    small_end_shank_height: float = quantity('mm')
+    small_end_flange_width: float = quantity('mm')
+    web_and_flange_thickness: float = quantity('mm')
+    bolt_diameter: float = quantity('mm')
+    small_end_outer_diameter: float = quantity('mm')
+    small_end_wall_thickness: float = quantity('mm')
+    big_end_outer_diameter: float = quantity('mm')
+    big_end_wall_thickness: float = quantity('mm')
 
 def calculate_connecting_rod(inputs: ConnectingRodInput) -> ConnectingRodOutput:
     max_gas_force = inputs.max_combustion_pressure * (np.pi * inputs.piston_diameter**2 / 4)
     allowable_compressive_stress = inputs.rod_material_yield_strength / inputs.safety_factor
-    shank_area = max_gas_force / allowable_compressive_stress
+    compressive_load = np.where(inputs.design_compressive_load > 0, inputs.design_compressive_load, max_gas_force)[()]
+    shank_area = compressive_load / allowable_compressive_stress
     t = np.sqrt(shank_area / 11)
     web_and_flange_thickness = t
     big_end_shank_height = 5 * t
@@ -40,7 +47,8 @@ def calculate_connecting_rod(inputs: ConnectingRodInput) -> ConnectingRodOutput:
     small_end_flange_width = big_end_flange_width * taper_ratio
     angular_velocity = inputs.max_engine_rpm * 2 * np.pi / 60
     max_inertial_force = inputs.reciprocating_mass * (inputs.crank_radius / 1000) * angular_velocity**2
-    force_per_bolt = max_inertial_force / 2
+    bolt_load = np.where(inputs.design_bolt_load > 0, inputs.design_bolt_load, max_inertial_force)[()]
+    force_per_bolt = bolt_load / 2
     allowable_bolt_stress = inputs.bolt_material_yield_strength / inputs.safety_factor
     required_bolt_core_area = force_per_bolt / allowable_bolt_stress
     bolt_core_diameter = np.sqrt(4 * required_bolt_core_area / np.pi)
@@ -51,14 +59,14 @@ def calculate_connecting_rod(inputs: ConnectingRodInput) -> ConnectingRodOutput:
     big_end_outer_diameter = inputs.crankpin_diameter + (2 * big_end_wall_thickness)
 
     return ConnectingRodOutput(
-        big_end_shank_height=f'{big_end_shank_height:.2f} mm',
-        big_end_flange_width=f'{big_end_flange_width:.2f} mm',
-        small_end_shank_height=f'{small_end_shank_height:.2f} mm',
-        small_end_flange_width=f'{small_end_flange_width:.2f} mm',
-        web_and_flange_thickness=f'{web_and_flange_thickness:.2f} mm',
-        bolt_diameter=f'{bolt_diameter:.2f} mm',
-        small_end_outer_diameter=f'{small_end_outer_diameter:.2f} mm',
-        small_end_wall_thickness=f'{small_end_wall_thickness:.2f} mm',
-        big_end_outer_diameter=f'{big_end_outer_diameter:.2f} mm',
-        big_end_wall_thickness=f'{big_end_wall_thickness:.2f} mm'
+        big_end_shank_height=big_end_shank_height,
+        big_end_flange_width=big_end_flange_width,
+        small_end_shank_height=small_end_shank_height,
+        small_end_flange_width=small_end_flange_width,
+        web_and_flange_thickness=web_and_flange_thickness,
+        bolt_diameter=bolt_diameter,
+        small_end_outer_diameter=small_end_outer_diameter,
+        small_end_wall_thickness=small_end_wall_thickness,
+        big_end_outer_diameter=big_end_outer_diameter,
+        big_end_wall_thickness=big_end_wall_thickness
     )
@@ -1,23 +1,26 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import MATERIALS
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class CrankshaftInput:
-    piston_diameter: float
-    max_combustion_pressure: float
-    cylinder_bore_spacing: float
-    crankshaft_material_yield_strength: float
-    allowable_bearing_pressure: float
-    safety_factor: float
+    piston_diameter: float = parameter('mm', gt=0)
+    max_combustion_pressure: float = parameter('MPa', gt=0)
+    cylinder_bore_spacing: float = parameter('mm', gt=0)
+    crankshaft_material_yield_strength: float = parameter('MPa', gt=0, catalogue=('material', MATERIALS, 'yield_strength'))
+    allowable_bearing_pressure: float = parameter('MPa', gt=0)
+    safety_factor: float = parameter('', gt=0)
 
-@dataclass
+@dataclass(slots=True)
 class CrankshaftOutput:
-    crankpin_diameter: str
-    crankpin_length: str
-    main_journal_diameter: str
-    main_journal_length: str
-    crank_web_thickness: str
-    crank_web_width: str
+    crankpin_diameter: float = quantity('mm')
+    crankpin_length: float = quantity('mm')
+    main_journal_diameter: float = quantity('mm')
+    main_journal_length: float = quantity('mm')
+    crank_web_thickness: float = quantity('mm')
+    crank_web_width: float = quantity('mm')
 
 def calculate_crankshaft(inputs: CrankshaftInput) -> CrankshaftOutput:
     max_gas_force = inputs.max_combustion_pressure * (np.pi * inputs.piston_diameter**2 / 4)
@@ -36,10 +39,10 @@ def calculate_crankshaft(inputs: CrankshaftInput) -> CrankshaftOutput:
     crank_web_width = 1.25 * crankpin_diameter
 
     return CrankshaftOutput(
-        crankpin_diameter=f'{crankpin_diameter:.2f} mm',
-        crankpin_length=f'{crankpin_length:.2f} mm',
-        main_journal_diameter=f'{main_journal_diameter:.2f} mm',
-        main_journal_length=f'{main_journal_length:.2f} mm',
-        crank_web_thickness=f'{crank_web_thickness:.2f} mm',
-        crank_web_width=f'{crank_web_width:.2f} mm'
+        crankpin_diameter=crankpin_diameter,
+        crankpin_length=crankpin_length,
+        main_journal_diameter=main_journal_diameter,
+        main_journal_length=main_journal_length,
+        crank_web_thickness=crank_web_thickness,
+        crank_web_width=crank_web_width
     )
@@ -1,21 +1,23 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class CylinderInput:
-    cylinder_bore_diameter: float
-    stroke_length: float
-    max_combustion_pressure: float
-    cylinder_material_strength: float
-    safety_factor: float
+    cylinder_bore_diameter: float = parameter('mm', gt=0)
+    stroke_length: float = parameter('mm', gt=0)
+    max_combustion_pressure: float = parameter('MPa', gt=0)
+    cylinder_material_strength: float = parameter('MPa', gt=0)
+    safety_factor: float = parameter('', gt=0)
 
-@dataclass
+@dataclass(slots=True)
 class CylinderOutput:
-    cylinder_wall_thickness: str
-    outer_cylinder_diameter: str
-    cylinder_length: str
-    cylinder_flange_diameter: str
-    cylinder_flange_thickness: str
+    cylinder_wall_thickness: float = quantity('mm')
+    outer_cylinder_diameter: float = quantity('mm')
+    cylinder_length: float = quantity('mm')
+    cylinder_flange_diameter: float = quantity('mm')
+    cylinder_flange_thickness: float = quantity('mm')
     fin_note: str
 
 def calculate_cylinder(inputs: CylinderInput) -> CylinderOutput:
@@ -29,10 +31,10 @@ def calculate_cylinder(inputs: CylinderInput) -> CylinderOutput:
     fin_note = "For air-cooled engines, fins are required. Typical dimensions are: Thickness (1.5-3mm), Height (25-50mm), and Spacing (2-5mm). Their final design requires detailed heat transfer analysis."
 
     return CylinderOutput(
-        cylinder_wall_thickness=f'{wall_thickness:.2f} mm',
-        outer_cylinder_diameter=f'{outer_cylinder_diameter:.2f} mm',
-        cylinder_length=f'{cylinder_length:.2f} mm',
-        cylinder_flange_diameter=f'{flange_diameter:.2f} mm',
-        cylinder_flange_thickness=f'{flange_thickness:.2f} mm',
+        cylinder_wall_thickness=wall_thickness,
+        outer_cylinder_diameter=outer_cylinder_diameter,
+        cylinder_length=cylinder_length,
+        cylinder_flange_diameter=flange_diameter,
+        cylinder_flange_thickness=flange_thickness,
         fin_note=fin_note
     )
@@ -1,38 +1,57 @@
+import math
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import FRICTION, MATERIALS
+from calculations.results import input_arrays, quantity
+from calculations.schema import parameter
+from calculations.thermal import CURVE_NAMES, curve_rows, final_temperature, yield_strength_ratio
 
 @dataclass
 class DiscInput:
-    mass_vehicle: float
-    mass_rider: float
-    initial_velocity: float
-    stopping_distance: float
-    wheel_radius: float
-    friction_coefficient: float
-    caliper_piston_area: float
-    hydraulic_pressure: float
-    number_of_discs: int
-    material_density: float
-    material_specific_heat: float
-    material_yield_strength: float
-    max_outer_diameter: float
-    initial_disc_thickness: float
+    mass_vehicle: float = parameter('kg', gt=0)
+    mass_rider: float = parameter('kg', ge=0)
+    initial_velocity: float = parameter('km/h', gt=0)
+    stopping_distance: float = parameter('m', gt=0)
+    wheel_radius: float = parameter('m', gt=0)
+    friction_coefficient: float = parameter('', gt=0, le=1, catalogue=('pad', FRICTION, 'friction_coefficient'))
+    caliper_piston_area: float = parameter('cm²', gt=0)
+    hydraulic_pressure: float = parameter('MPa', gt=0)
+    number_of_discs: int = parameter('', ge=1)
+    material_density: float = parameter('kg/m³', gt=0, catalogue=('material', MATERIALS, 'density'))
+    material_specific_heat: float = parameter('J/kg·K', gt=0, catalogue=('material', MATERIALS, 'specific_heat'))
+    material_yield_strength: float = parameter('MPa', gt=0, catalogue=('material', MATERIALS, 'yield_strength'))
+    max_outer_diameter: float = parameter('mm', gt=0)
+    initial_disc_thickness: float = parameter('mm', gt=0)
+    inner_diameter_ratio: float = parameter('', default=0.6, gt=0, lt=1)  # Placeholder for hub geometry
+    min_thickness_ratio: float = parameter('', default=0.8, gt=0, le=1)   # 20% wear allowance
+    # Temperature-dependent specific heat and yield strength (see calculations.thermal); blank keeps them constant
+    thermal_curve: str = parameter(default='', choices=('',) + CURVE_NAMES)
+    initial_temperature: float = parameter('°C', default=20.0, gt=-273.15)
 
-@dataclass
+@dataclass(slots=True)
 class DiscOutput:
-    braking_force: str
-    braking_torque: str
-    effective_radius: str
-    outer_diameter: str
-    inner_diameter: str
-    thickness: str
-    min_service_thickness: str
-    disc_mass: str
-    heat_energy: str
-    temp_rise: str
-    safety_factor: str
+    braking_force: float = quantity('N')
+    braking_torque: float = quantity('Nm')
+    effective_radius: float = quantity('mm')
+    outer_diameter: float = quantity('mm')
+    inner_diameter: float = quantity('mm')
+    thickness: float = quantity('mm')
+    min_service_thickness: float = quantity('mm')
+    disc_mass: float = quantity('kg')
+    heat_energy: float = quantity('kJ')
+    temp_rise: float = quantity('°C', difference=True)
+    peak_temperature: float = quantity('°C')
+    safety_factor: float = quantity('', template='{:.2f} (Simplified)')
 
-def calculate_disc(inputs: DiscInput) -> DiscOutput:
+def _divide(numerator, denominator, fallback):
+    # numerator / denominator, or fallback where the denominator is not positive;
+    # plain floats for one design, NumPy columns for a batch
+    if isinstance(denominator, np.ndarray):
+        return np.where(denominator > 0, numerator / denominator, fallback)
+    return numerator / denominator if denominator > 0 else fallback
+
+def _disc_quantities(inputs: DiscInput) -> dict:
+    # The disc calculation for one design (plain values) or a batch (equally shaped NumPy columns)
     # --- Unit Conversions ---
     initial_velocity_ms = inputs.initial_velocity * 1000 / 3600
     caliper_piston_area_m2 = inputs.caliper_piston_area / 10000
@@ -49,32 +68,58 @@ def calculate_disc(inputs: DiscInput) -> DiscOutput:
 
     # Disc geometry
     outer_diameter_m = max_outer_diameter_m
-    inner_diameter_m = outer_diameter_m * 0.6  # Placeholder
+    inner_diameter_m = outer_diameter_m * inputs.inner_diameter_ratio
     thickness_m = initial_disc_thickness_m
     effective_radius_m = (outer_diameter_m + inner_diameter_m) / 2 # Approximation
 
     # Performance calculations
-    min_service_thickness_m = thickness_m * 0.8 # 20% wear
-    disc_mass = np.pi * ((outer_diameter_m/2)**2 - (inner_diameter_m/2)**2) * thickness_m * inputs.material_density
+    min_service_thickness_m = thickness_m * inputs.min_thickness_ratio
+    disc_mass = math.pi * ((outer_diameter_m/2)**2 - (inner_diameter_m/2)**2) * thickness_m * inputs.material_density
     heat_energy = 0.5 * total_mass * initial_velocity_ms**2
-    temp_rise = heat_energy / (disc_mass * inputs.material_specific_heat) if disc_mass > 0 else 0
+    temp_rise = _divide(heat_energy, disc_mass * inputs.material_specific_heat, 0.0)
+
+    # Temperature-dependent properties: the specific heat curve is integrated
+    # through the stop and the yield strength taken at the peak temperature; a batch may
+    # mix curves and blank (constant) rows. One design without a curve skips the NumPy work.
+    curves = inputs.thermal_curve
+    constant = curves == '' if isinstance(curves, str) else np.asarray(curves) == ''
+    if constant is not True and not np.all(constant):
+        rows = curve_rows(np.where(constant, CURVE_NAMES[0], curves))
+        curve_rise = final_temperature(rows, inputs.initial_temperature, temp_rise) - inputs.initial_temperature
+        temp_rise = np.where(constant, temp_rise, curve_rise)
+        material_yield_strength_pa = material_yield_strength_pa * np.where(
+            constant, 1.0, yield_strength_ratio(rows, inputs.initial_temperature + temp_rise))
+    peak_temperature = inputs.initial_temperature + temp_rise
 
     # Stress and safety factor
     clamping_force = hydraulic_pressure_pa * caliper_piston_area_m2
     frictional_force = 2 * clamping_force * inputs.friction_coefficient # For one disc with two pads
-    max_stress = (frictional_force * effective_radius_m) / (np.pi * (outer_diameter_m**2 - inner_diameter_m**2) * thickness_m) if (outer_diameter_m**2 - inner_diameter_m**2) > 0 else 0
-    safety_factor = material_yield_strength_pa / max_stress if max_stress > 0 else float('inf')
+    annulus = outer_diameter_m**2 - inner_diameter_m**2
+    max_stress = _divide(frictional_force * effective_radius_m, math.pi * annulus * thickness_m, 0.0)
+    safety_factor = _divide(material_yield_strength_pa, max_stress, math.inf)
+
+    return {
+        'braking_force': braking_force,
+        'braking_torque': braking_torque,
+        'effective_radius': effective_radius_m * 1000,
+        'outer_diameter': outer_diameter_m * 1000,
+        'inner_diameter': inner_diameter_m * 1000,
+        'thickness': thickness_m * 1000,
+        'min_service_thickness': min_service_thickness_m * 1000,
+        'disc_mass': disc_mass,
+        'heat_energy': heat_energy / 1000,
+        'temp_rise': temp_rise,
+        'peak_temperature': peak_temperature,
+        'safety_factor': safety_factor,
+    }
+
+def calculate_disc(inputs: DiscInput) -> DiscOutput:
+    # One design: the values come back as plain floats
+    return DiscOutput(**{name: float(value) for name, value in _disc_quantities(inputs).items()})
 
-    return DiscOutput(
-        braking_force=f'{braking_force:.2f} N',
-        braking_torque=f'{braking_torque:.2f} Nm',
-        effective_radius=f'{effective_radius_m * 1000:.2f} mm',
-        outer_diameter=f'{outer_diameter_m * 1000:.2f} mm',
-        inner_diameter=f'{inner_diameter_m * 1000:.2f} mm',
-        thickness=f'{thickness_m * 1000:.2f} mm',
-        min_service_thickness=f'{min_service_thickness_m * 1000:.2f} mm',
-        disc_mass=f'{disc_mass:.2f} kg',
-        heat_energy=f'{heat_energy / 1000:.2f} kJ',
-        temp_rise=f'{temp_rise:.2f} °C',
-        safety_factor=f'{safety_factor:.2f} (Simplified)'
-    )
+def calculate_disc_batch(columns) -> dict:
+    # columns: mapping or structured array with one entry per DiscInput field.
+    # Scalars broadcast against the array columns, so fixed parameters need not be repeated.
+    # Returns a numeric result table {output name: ndarray} in the units DiscOutput declares.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _disc_quantities(DiscInput(**input_arrays(DiscInput, columns, dtype=float)))
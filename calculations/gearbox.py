@@ -1,49 +1,253 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import numpy as np
+from calculations.results import input_arrays, quantity
+from calculations.schema import parameter
+
+# --- Tooth count and face width limits ---
+MIN_TEETH = 12   # below this the Lewis factor goes non-physical (undercut)
+MAX_TEETH = 80
+STANDARD_MODULES = np.array([1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0])
+
+# Per-gear checks, indexed by a bit mask of the failed ones (bit 0 = first check)
+GEAR_CHECKS = (f'Undercut: fewer than {MIN_TEETH} teeth', 'Contact stress above allowable', 'Face width above 12 × module')
+GEAR_NOTES = np.array(['; '.join(text for bit, text in enumerate(GEAR_CHECKS) if mask >> bit & 1) or 'OK'
+                       for mask in range(2**len(GEAR_CHECKS))])
 
 @dataclass
 class GearboxInput:
-    max_engine_torque: float
-    primary_drive_ratio: float
-    first_gear_ratio: float
-    top_gear_ratio: float
-    number_of_gears: int
-    gear_material_strength: float
-    safety_factor: float
-    module: float
-    pinion_teeth_1st_gear: int
+    max_engine_torque: float = parameter('Nm', gt=0)
+    primary_drive_ratio: float = parameter('', gt=0)
+    first_gear_ratio: float = parameter('', gt=0)
+    top_gear_ratio: float = parameter('', gt=0)
+    number_of_gears: int = parameter('', ge=2)
+    gear_material_strength: float = parameter('MPa', gt=0)
+    safety_factor: float = parameter('', gt=0)
+    module: float = parameter('mm', gt=0)
+    pinion_teeth_1st_gear: int = parameter('', ge=MIN_TEETH)
+    # Speed-dependent dynamic factor and contact (Hertz) stress for every gear pair
+    max_torque_rpm: float = parameter('rpm', default=7000.0, gt=0)   # Engine speed at max torque
+    gear_contact_strength: float = parameter('MPa', default=1500.0, gt=0)  # Case-hardened steel
+    gear_elastic_modulus: float = parameter('GPa', default=206.0, gt=0)
+    gear_poisson_ratio: float = parameter('', default=0.3, ge=0, lt=0.5)
+    pressure_angle: float = parameter('°', default=20.0, gt=0, lt=45)
+    quality_number: int = parameter('', default=7, ge=5, le=11)      # AGMA transmission accuracy level Qv
 
-@dataclass
+
+@dataclass(slots=True)
 class GearboxOutput:
-    all_gear_ratios: list
+    all_gear_ratios: list = quantity('', precision=3, template='{:.3f}:1')
     pinion_teeth: int
     gear_teeth: int
-    face_width: str
-    pinion_pitch_diameter: str
-    gear_pitch_diameter: str
-    center_distance: str
+    face_width: float = quantity('mm')
+    pinion_pitch_diameter: float = quantity('mm')
+    gear_pitch_diameter: float = quantity('mm')
+    center_distance: float = quantity('mm')
+    # One entry per gear, every pair on the 1st gear center distance
+    input_teeth: list
+    output_teeth: list
+    actual_ratios: list = quantity('', precision=3, template='{:.3f}:1')
+    pitch_line_velocities: list = quantity('m/s')
+    dynamic_factors: list = quantity('', precision=3)
+    tangential_forces: list = quantity('N')
+    face_widths: list = quantity('mm')
+    bending_stresses: list = quantity('MPa')
+    contact_stresses: list = quantity('MPa')
+    contact_safety_factors: list = quantity('')
+    gear_notes: list
 
-def calculate_gearbox(inputs: GearboxInput) -> GearboxOutput:
+@dataclass(slots=True)
+class GearSet:
+    module: float = quantity('mm')
+    center_distance: float = quantity('mm')
+    input_teeth: list
+    output_teeth: list
+    ratios: list = quantity('', precision=3, template='{:.3f}:1')
+    face_widths: list = quantity('mm')
+    max_ratio_error: float = quantity('%', precision=3)
+    total_face_width: float = quantity('mm')
+
+def gear_ratio_progression(inputs: GearboxInput) -> list:
     progression_factor = (inputs.first_gear_ratio / inputs.top_gear_ratio)**(1 / (inputs.number_of_gears - 1))
-    all_gear_ratios = [inputs.first_gear_ratio / (progression_factor**(n)) for n in range(inputs.number_of_gears)]
-    torque_input_shaft = inputs.max_engine_torque * inputs.primary_drive_ratio
-    z1 = inputs.pinion_teeth_1st_gear
-    z2 = round(z1 * inputs.first_gear_ratio)
-    d1 = inputs.module * z1
-    d2 = inputs.module * z2
-    tangential_force = torque_input_shaft / (d1 / 2 / 1000)
-    lewis_form_factor = 0.484 - (2.87 / z1)
-    allowable_stress = inputs.gear_material_strength / inputs.safety_factor
-    face_width_m = tangential_force / ((allowable_stress * 1e6) * np.pi * (inputs.module / 1000) * lewis_form_factor)
-    face_width_mm = face_width_m * 1000
-    center_distance = (d1 + d2) / 2
+    return [inputs.first_gear_ratio / (progression_factor**(n)) for n in range(inputs.number_of_gears)]
+
+def _input_teeth(tooth_sums, targets):
+    # Input-gear tooth count whose pair ratio is nearest each target, trying both roundings
+    exact = tooth_sums / (1 + targets)
+    low, high = np.floor(exact), np.ceil(exact)
+    error = lambda z_in: np.abs((tooth_sums - z_in) / np.maximum(z_in, 1) - targets) / targets
+    return np.where(error(low) <= error(high), low, high).astype(int)
+
+def _lewis_bending(module, z_in, z_out, torque_input_shaft, input_shaft_rpm, quality_number) -> tuple:
+    # Bending model shared by the sizing and the synthesis: Lewis equation on the
+    # weaker (fewer-toothed) gear of each pair with the AGMA dynamic factor Kv.
+    # Returns tangential force (N), pitch-line velocity (m/s), Kv and the bending
+    # load, i.e. bending stress (MPa) times face width (mm).
+    d_in = module * z_in
+    tangential_force = torque_input_shaft / (d_in / 2 / 1000)
+    pitch_line_velocity = np.pi * d_in / 1000 * input_shaft_rpm / 60
+    b = 0.25 * (12 - quality_number)**(2 / 3)
+    a = 50 + 56 * (1 - b)
+    dynamic_factor = ((a + np.sqrt(200 * pitch_line_velocity)) / a)**b
+    lewis_form_factor = 0.484 - 2.87 / np.minimum(z_in, z_out)
+    bending_load = dynamic_factor * tangential_force / (np.pi * module * lewis_form_factor)
+    return tangential_force, pitch_line_velocity, dynamic_factor, bending_load
+
+def _gear_train(inputs: GearboxInput) -> dict:
+    # Every gear of one design or of a batch of designs at once: inputs hold scalars
+    # or equally shaped columns, and the per-gear results gain a trailing gear axis,
+    # padded with NaN past a design's number_of_gears.
+    column = lambda value: value[..., None] if isinstance(value, np.ndarray) else value
+    number_of_gears = column(inputs.number_of_gears)
+    gear = np.arange(int(np.max(number_of_gears)))
+    present = gear < number_of_gears
+    first, top = column(inputs.first_gear_ratio), column(inputs.top_gear_ratio)
+    module = column(inputs.module)
+    # Constant mesh: every pair keeps the 1st gear pair's tooth sum, so one center distance
+    tooth_sum = inputs.pinion_teeth_1st_gear + np.round(inputs.pinion_teeth_1st_gear * inputs.first_gear_ratio)
+    center_distance = inputs.module * tooth_sum / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        progression_factor = (first / top)**(1 / (number_of_gears - 1))
+        target_ratios = first / progression_factor**gear
+        z_in = _input_teeth(column(tooth_sum), np.where(present, target_ratios, 1.0))
+        z_in[..., 0] = inputs.pinion_teeth_1st_gear
+        z_out = column(tooth_sum) - z_in
+
+        # Kv-adjusted Lewis bending, input shaft at max torque; at least 8 modules wide
+        torque_input_shaft = column(inputs.max_engine_torque) * column(inputs.primary_drive_ratio)
+        input_shaft_rpm = column(inputs.max_torque_rpm) / column(inputs.primary_drive_ratio)
+        tangential_force, pitch_line_velocity, dynamic_factor, bending_load = _lewis_bending(
+            module, z_in, z_out, torque_input_shaft, input_shaft_rpm, column(inputs.quality_number))
+        allowable_stress = column(inputs.gear_material_strength) / column(inputs.safety_factor)
+        face_width = np.maximum(bending_load / allowable_stress, 8 * module)
+        bending_stress = bending_load / face_width
 
+        # AGMA contact stress at the smaller gear's pitch diameter: elastic coefficient
+        # for two gears of one material and the spur-gear geometry factor I
+        z_small, z_large = np.minimum(z_in, z_out), np.maximum(z_in, z_out)
+        elastic_modulus_mpa = column(inputs.gear_elastic_modulus) * 1000
+        elastic_coefficient = np.sqrt(elastic_modulus_mpa / (2 * np.pi * (1 - column(inputs.gear_poisson_ratio)**2)))
+        pressure_angle = np.radians(column(inputs.pressure_angle))
+        geometry_factor = np.cos(pressure_angle) * np.sin(pressure_angle) / 2 * z_large / (z_small + z_large)
+        contact_stress = elastic_coefficient * np.sqrt(dynamic_factor * tangential_force
+                                                       / (face_width * module * z_small * geometry_factor))
+        contact_safety_factor = column(inputs.gear_contact_strength) / contact_stress
+        actual_ratio = z_out / z_in
+
+    table = {
+        'all_gear_ratios': target_ratios,
+        'input_teeth': z_in,
+        'output_teeth': z_out,
+        'actual_ratios': actual_ratio,
+        'pitch_line_velocities': pitch_line_velocity,
+        'dynamic_factors': dynamic_factor,
+        'tangential_forces': tangential_force,
+        'face_widths': face_width,
+        'bending_stresses': bending_stress,
+        'contact_stresses': contact_stress,
+        'contact_safety_factors': contact_safety_factor,
+    }
+    if not present.all():
+        table = {name: np.where(present, value, np.nan) for name, value in table.items()}
+    # Face widths are sized on bending and rounded up to 8 modules, so contact (pitting)
+    # and the 12-module limit are checked here rather than sized for
+    undercut = (z_in < MIN_TEETH) | (z_out < MIN_TEETH)
+    table['gear_notes'] = GEAR_NOTES[undercut * 1 + (contact_safety_factor < 1) * 2 + (face_width > 12 * module) * 4]
+    table['center_distance'] = center_distance
+    return table
+
+def calculate_gearbox(inputs: GearboxInput) -> GearboxOutput:
+    table = _gear_train(inputs)
+    per_gear = {name: value.tolist() for name, value in table.items() if name != 'center_distance'}
+    per_gear['input_teeth'] = [int(z) for z in per_gear['input_teeth']]
+    per_gear['output_teeth'] = [int(z) for z in per_gear['output_teeth']]
     return GearboxOutput(
-        all_gear_ratios=[f'{r:.3f}:1' for r in all_gear_ratios],
-        pinion_teeth=z1,
-        gear_teeth=z2,
-        face_width=f'{face_width_mm:.2f} mm',
-        pinion_pitch_diameter=f'{d1:.2f} mm',
-        gear_pitch_diameter=f'{d2:.2f} mm',
-        center_distance=f'{center_distance:.2f} mm'
+        **per_gear,
+        pinion_teeth=inputs.pinion_teeth_1st_gear,
+        gear_teeth=per_gear['output_teeth'][0],
+        face_width=per_gear['face_widths'][0],
+        pinion_pitch_diameter=inputs.module * inputs.pinion_teeth_1st_gear,
+        gear_pitch_diameter=inputs.module * per_gear['output_teeth'][0],
+        center_distance=float(table['center_distance']),
     )
+
+def calculate_gearbox_batch(columns) -> dict:
+    # columns: mapping or structured array with one entry per GearboxInput field.
+    # Every design is sized in one pass over a (designs, gears) array; per-gear
+    # outputs come back as object columns holding one list per design.
+    inputs = GearboxInput(**input_arrays(GearboxInput, columns, dtype=float))
+    table = _gear_train(inputs)
+    for name in ('input_teeth', 'output_teeth'):
+        table[name] = np.nan_to_num(table[name]).astype(np.int64)
+    # Designs with the same number of gears are turned into lists together
+    counts = inputs.number_of_gears.astype(int).ravel()
+    groups = [(np.flatnonzero(counts == count), count) for count in np.unique(counts).tolist()]
+    results = {}
+    for name, value in table.items():
+        if name == 'center_distance':
+            continue
+        rows = value.reshape(-1, value.shape[-1])
+        column = np.empty(counts.size, dtype=object)
+        for index, count in groups:
+            column[index] = rows[index, :count].tolist()
+        results[name] = column.reshape(inputs.number_of_gears.shape)
+    gear_teeth = table['output_teeth'][..., 0]
+    results.update({
+        'pinion_teeth': inputs.pinion_teeth_1st_gear.astype(np.int64),
+        'gear_teeth': gear_teeth,
+        'face_width': table['face_widths'][..., 0],
+        'pinion_pitch_diameter': inputs.module * inputs.pinion_teeth_1st_gear,
+        'gear_pitch_diameter': inputs.module * gear_teeth,
+        'center_distance': table['center_distance'],
+    })
+    return {f.name: results[f.name] for f in fields(GearboxOutput)}
+
+def synthesize_gear_sets(inputs: GearboxInput, top_n: int = 10, modules=STANDARD_MODULES) -> list:
+    # Constant-mesh layout: every pair in a set shares one module and one center
+    # distance, so its tooth counts sum to the same total. All (module, tooth sum,
+    # gear) combinations are scored at once as one broadcast array.
+    targets = np.array(gear_ratio_progression(inputs))                   # (gears,)
+    modules = np.asarray(modules, dtype=float)[:, None, None]            # (modules, 1, 1)
+    tooth_sums = np.arange(2 * MIN_TEETH, 2 * MAX_TEETH + 1)[None, :, None]  # (1, sums, 1)
+
+    z_in = _input_teeth(tooth_sums, targets)
+    z_out = tooth_sums - z_in
+    ratio_error = np.abs(z_out / z_in - targets) / targets
+
+    # Prune: both gears of every pair must have an allowed tooth count
+    allowed = (z_in >= MIN_TEETH) & (z_out >= MIN_TEETH) & (z_in <= MAX_TEETH) & (z_out <= MAX_TEETH)
+    set_allowed = allowed.all(axis=-1)
+
+    # Face width for every pair from the same Kv-adjusted Lewis model calculate_gearbox sizes with
+    torque_input_shaft = inputs.max_engine_torque * inputs.primary_drive_ratio
+    input_shaft_rpm = inputs.max_torque_rpm / inputs.primary_drive_ratio
+    allowable_stress = inputs.gear_material_strength / inputs.safety_factor
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bending_load = _lewis_bending(modules, z_in, z_out, torque_input_shaft, input_shaft_rpm, inputs.quality_number)[3]
+        required_face_width = bending_load / allowable_stress
+    # Rule of thumb 8m <= b <= 12m: prune pairs needing more, round thinner ones up to 8m
+    set_allowed = set_allowed & (required_face_width <= 12 * modules).all(axis=-1)
+    face_width = np.maximum(required_face_width, 8 * modules)
+
+    shape = set_allowed.shape  # (modules, sums)
+    max_error = np.broadcast_to(ratio_error.max(axis=-1), shape)
+    total_face_width = face_width.sum(axis=-1)
+    center_distance = modules[..., 0] * tooth_sums[..., 0] / 2
+
+    candidates = np.flatnonzero(set_allowed)
+    # Rank by ratio error (to 0.01 %), then total face width, then center distance
+    order = np.lexsort((center_distance.ravel()[candidates], total_face_width.ravel()[candidates],
+                        np.round(max_error.ravel()[candidates], 4)))
+    gear_sets = []
+    for flat in candidates[order[:top_n]]:
+        m, k = np.unravel_index(flat, shape)
+        gear_sets.append(GearSet(
+            module=float(modules[m, 0, 0]),
+            center_distance=float(center_distance[m, k]),
+            input_teeth=z_in[0, k].tolist(),
+            output_teeth=z_out[0, k].tolist(),
+            ratios=(z_out[0, k] / z_in[0, k]).tolist(),
+            face_widths=face_width[m, k].tolist(),
+            max_ratio_error=float(max_error[m, k] * 100),
+            total_face_width=float(total_face_width[m, k]),
+        ))
+    return gear_sets
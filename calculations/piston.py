@@ -1,26 +1,30 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class PistonInput:
-    cylinder_bore: float
-    stroke_length: float
-    connecting_rod_length: float
-    deck_height: float
-    max_combustion_pressure: float
-    piston_material_strength: float
-    safety_factor: float
+    cylinder_bore: float = parameter('mm', gt=0)
+    stroke_length: float = parameter('mm', gt=0)
+    connecting_rod_length: float = parameter('mm', gt=0)
+    deck_height: float = parameter('mm', gt=0)
+    max_combustion_pressure: float = parameter('MPa', gt=0)
+    piston_material_strength: float = parameter('MPa', gt=0)
+    safety_factor: float = parameter('', gt=0)
+    # Peak side thrust from a crank-angle analysis (N); 0 keeps the single-point estimate
+    design_side_thrust: float = parameter('N', default=0.0, ge=0)
 
-@dataclass
+@dataclass(slots=True)
 class PistonOutput:
-    piston_diameter: str
-    piston_clearance: str
-    compression_height: str
-    crown_thickness: str
-    max_piston_force: str
-    gudgeon_pin_outer_diameter: str
-    gudgeon_pin_inner_diameter: str
-    piston_skirt_length: str
+    piston_diameter: float = quantity('mm')
+    piston_clearance: float = quantity('mm', precision=4)
+    compression_height: float = quantity('mm')
+    crown_thickness: float = quantity('mm')
+    max_piston_force: float = quantity('N')
+    gudgeon_pin_outer_diameter: float = quantity('mm')
+    gudgeon_pin_inner_diameter: float = quantity('mm')
+    piston_skirt_length: float = quantity('mm')
 
 def calculate_piston(inputs: PistonInput) -> PistonOutput:
     piston_clearance = 0.00075 * inputs.cylinder_bore
@@ -32,27 +36,22 @@ def calculate_piston(inputs: PistonInput) -> PistonOutput:
     gudgeon_pin_outer_diameter = 0.25 * inputs.cylinder_bore
     bending_moment = (max_piston_force * inputs.cylinder_bore) / 8
     required_section_modulus = bending_moment / allowable_stress
-    try:
-        gudgeon_pin_inner_diameter_calc = (gudgeon_pin_outer_diameter**4 - (32 * required_section_modulus * gudgeon_pin_outer_diameter) / np.pi)**(1/4)
-        if isinstance(gudgeon_pin_inner_diameter_calc, complex):
-            gudgeon_pin_inner_diameter = 'Invalid'
-        else:
-            gudgeon_pin_inner_diameter = f'{gudgeon_pin_inner_diameter_calc:.2f} mm'
-    except (ValueError, TypeError):
-        gudgeon_pin_inner_diameter = 'Invalid'
+    # NaN (rendered as 'Invalid') when the required section modulus leaves no room for a bore
+    with np.errstate(invalid='ignore'):
+        gudgeon_pin_inner_diameter = np.sqrt(np.sqrt(gudgeon_pin_outer_diameter**4 - (32 * required_section_modulus * gudgeon_pin_outer_diameter) / np.pi))
     max_rod_angle = np.arcsin((inputs.stroke_length / 2) / inputs.connecting_rod_length)
-    max_thrust = max_piston_force * np.tan(max_rod_angle)
+    max_thrust = np.where(inputs.design_side_thrust > 0, inputs.design_side_thrust, max_piston_force * np.tan(max_rod_angle))[()]
     allowable_bearing_pressure = 0.7
     skirt_area = max_thrust / allowable_bearing_pressure
     piston_skirt_length = skirt_area / inputs.cylinder_bore
 
     return PistonOutput(
-        piston_diameter=f'{piston_diameter:.2f} mm',
-        piston_clearance=f'{piston_clearance:.4f} mm',
-        compression_height=f'{compression_height:.2f} mm',
-        crown_thickness=f'{crown_thickness:.2f} mm',
-        max_piston_force=f'{max_piston_force:.2f} N',
-        gudgeon_pin_outer_diameter=f'{gudgeon_pin_outer_diameter:.2f} mm',
+        piston_diameter=piston_diameter,
+        piston_clearance=piston_clearance,
+        compression_height=compression_height,
+        crown_thickness=crown_thickness,
+        max_piston_force=max_piston_force,
+        gudgeon_pin_outer_diameter=gudgeon_pin_outer_diameter,
         gudgeon_pin_inner_diameter=gudgeon_pin_inner_diameter,
-        piston_skirt_length=f'{piston_skirt_length:.2f} mm'
+        piston_skirt_length=piston_skirt_length
     )
@@ -0,0 +1,92 @@
+from dataclasses import dataclass, fields
+import numpy as np
+
+from calculations.catalogue import references, resolve_columns
+from calculations.results import as_dict, input_arrays
+from calculations.schema import schema_for
+from calculations.units import convert_values, input_conversions, output_conversions
+from calculations.disc import DiscInput, DiscOutput, calculate_disc, calculate_disc_batch
+from calculations.caliper import CaliperInput, CaliperOutput, calculate_caliper
+from calculations.brakepad import BrakePadInput, BrakePadOutput, calculate_brakepad
+from calculations.tyre import TyreInput, TyreOutput, calculate_tyre
+from calculations.piston import PistonInput, PistonOutput, calculate_piston
+from calculations.connecting_rod import ConnectingRodInput, ConnectingRodOutput, calculate_connecting_rod
+from calculations.crankshaft import CrankshaftInput, CrankshaftOutput, calculate_crankshaft
+from calculations.clutch import ClutchInput, ClutchOutput, calculate_clutch
+from calculations.gearbox import GearboxInput, GearboxOutput, calculate_gearbox, calculate_gearbox_batch
+from calculations.chain_sprocket import ChainSprocketInput, ChainSprocketOutput, calculate_chain_sprocket
+from calculations.rim import RimInput, RimOutput, calculate_rim_compatibility
+from calculations.cylinder import CylinderInput, CylinderOutput, calculate_cylinder
+from calculations.wrist_pin import WristPinInput, WristPinOutput, calculate_wrist_pin
+
+@dataclass(frozen=True)
+class Calculator:
+    input_class: type
+    output_class: type
+    function: object
+    # Takes column arrays for every input field, returns {output name: ndarray}
+    batch_function: object = None
+    # True when function itself accepts NumPy columns in place of scalars
+    vectorized: bool = False
+
+# Keyed by the same names as the HTML routes in app.py
+CALCULATORS = {
+    'disc': Calculator(DiscInput, DiscOutput, calculate_disc, batch_function=calculate_disc_batch),
+    'caliper': Calculator(CaliperInput, CaliperOutput, calculate_caliper),
+    'brakepad': Calculator(BrakePadInput, BrakePadOutput, calculate_brakepad),
+    'tyre': Calculator(TyreInput, TyreOutput, calculate_tyre),
+    'piston': Calculator(PistonInput, PistonOutput, calculate_piston, vectorized=True),
+    'connectingrod': Calculator(ConnectingRodInput, ConnectingRodOutput, calculate_connecting_rod, vectorized=True),
+    'crankshaft': Calculator(CrankshaftInput, CrankshaftOutput, calculate_crankshaft, vectorized=True),
+    'clutch': Calculator(ClutchInput, ClutchOutput, calculate_clutch, vectorized=True),
+    'gearbox': Calculator(GearboxInput, GearboxOutput, calculate_gearbox, batch_function=calculate_gearbox_batch),
+    'chainsprocket': Calculator(ChainSprocketInput, ChainSprocketOutput, calculate_chain_sprocket),
+    'rim': Calculator(RimInput, RimOutput, calculate_rim_compatibility),
+    'cylinder': Calculator(CylinderInput, CylinderOutput, calculate_cylinder, vectorized=True),
+    'wristpin': Calculator(WristPinInput, WristPinOutput, calculate_wrist_pin),
+}
+
+# Input parsers are compiled here, at import, rather than on the first request
+SCHEMAS = {name: schema_for(calculator.input_class) for name, calculator in CALCULATORS.items()}
+
+def evaluate_batch(name: str, columns, units=None, output_units=None) -> dict:
+    # columns: mapping or structured array holding one entry per input field.
+    # Uses the calculator's vectorized path where it has one and a row loop otherwise.
+    # units / output_units: unit choices (see calculations.units) for the given
+    # columns and the returned table; each converted column costs one multiply-add.
+    # Columns of catalogue ids (e.g. 'material') fill the fields linked to them.
+    calculator = CALCULATORS[name]
+    if references(calculator.input_class) and not isinstance(columns, np.ndarray):
+        columns = resolve_columns(calculator.input_class, columns)
+    if units:
+        names = columns.dtype.names if isinstance(columns, np.ndarray) else columns
+        columns = convert_values({key: np.asarray(columns[key]) for key in names},
+                                 input_conversions(calculator.input_class, units))
+    table = _evaluate(calculator, columns)
+    if output_units:
+        table = convert_values(table, output_conversions(calculator.output_class, output_units))
+    return table
+
+def _evaluate(calculator: Calculator, columns) -> dict:
+    if calculator.batch_function is not None:
+        return calculator.batch_function(columns)
+    if calculator.vectorized:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arrays = input_arrays(calculator.input_class, columns, dtype=float)
+            shape = next(iter(arrays.values())).shape
+            results = as_dict(calculator.function(calculator.input_class(**arrays)))
+        return {key: np.broadcast_to(value, shape) for key, value in results.items()}
+    arrays = input_arrays(calculator.input_class, columns)
+    shape = next(iter(arrays.values())).shape
+    rows = [as_dict(calculator.function(calculator.input_class(*(field.type(value) for field, value in zip(fields(calculator.input_class), row)))))
+            for row in zip(*(array.ravel() for array in arrays.values()))]
+    table = {}
+    for field in fields(calculator.output_class):
+        if field.type in (float, int):
+            column = np.array([row[field.name] for row in rows], dtype=field.type)
+        else:
+            # Text and list outputs stay one Python object per row
+            column = np.empty(len(rows), dtype=object)
+            column[:] = [row[field.name] for row in rows]
+        table[field.name] = column.reshape(shape)
+    return table
@@ -0,0 +1,77 @@
+from dataclasses import MISSING, field, fields
+from functools import lru_cache
+import math
+import re
+import numpy as np
+
+from calculations.units import convert_value
+
+# Output dataclasses keep plain numbers; the unit and display template of each
+# numeric field travel as dataclass field metadata and are only applied by
+# format_results() when a page is rendered, optionally converted to other
+# units (calculations.units.output_conversions).
+
+def quantity(unit: str, precision: int = 2, template: str = None, difference: bool = False):
+    # difference: the value is a change (a temperature rise), converted without the offset
+    if template is None:
+        template = f'{{:.{precision}f}} {unit}' if unit else f'{{:.{precision}f}}'
+    return field(metadata={'unit': unit, 'template': template, 'difference': difference})
+
+def result_units(output_dataclass) -> dict:
+    return {f.name: f.metadata['unit'] for f in fields(output_dataclass) if 'unit' in f.metadata}
+
+def as_dict(results) -> dict:
+    # Shallow alternative to dataclasses.asdict, which deep-copies array columns
+    return {f.name: getattr(results, f.name) for f in fields(results)}
+
+def input_arrays(input_dataclass, columns, dtype=None) -> dict:
+    # Batch paths take a mapping or structured array of columns; fields with a
+    # default may be left out. All columns are broadcast to a common shape.
+    available = columns.dtype.names if isinstance(columns, np.ndarray) else columns
+    values = {}
+    for f in fields(input_dataclass):
+        if f.name in available:
+            values[f.name] = columns[f.name]
+        elif f.default is not MISSING:
+            values[f.name] = f.default
+        else:
+            raise KeyError(f.name)
+    # dtype applies to the numeric fields; text fields keep their own
+    types = {f.name: f.type for f in fields(input_dataclass)}
+    arrays = np.broadcast_arrays(*(np.asarray(value, dtype=dtype if types[name] is not str else None)
+                                   for name, value in values.items()))
+    return dict(zip(values, arrays))
+
+def format_results(results, conversions=None) -> dict:
+    # conversions: {field: (scale, offset, unit)} from output_conversions()
+    formatted = {}
+    for f in fields(results):
+        value = getattr(results, f.name)
+        template = f.metadata.get('template')
+        if conversions and f.name in conversions:
+            scale, offset, unit = conversions[f.name]
+            value = convert_value(value, scale, offset)
+            template = _unit_template(template, f.metadata['unit'], unit, scale)
+        if template is None:
+            formatted[f.name] = value
+        elif isinstance(value, (list, tuple)):
+            formatted[f.name] = [_format_value(template, v) for v in value]
+        else:
+            formatted[f.name] = _format_value(template, value)
+    return formatted
+
+@lru_cache(maxsize=1024)
+def _unit_template(template: str, declared: str, unit: str, scale: float) -> str:
+    # The display template with its trailing unit replaced, and a decimal place
+    # more per factor of ten the new unit is larger (mm shown as in keeps its resolution)
+    extra = max(0, round(-math.log10(scale)))
+    if extra:
+        template = re.sub(r'\{:\.(\d+)f\}', lambda match: f'{{:.{int(match.group(1)) + extra}f}}', template)
+    if template.endswith(f' {declared}'):
+        return f'{template[:-len(declared)]}{unit}'
+    return f'{template} {unit}'
+
+def _format_value(template: str, value) -> str:
+    if np.isnan(value):
+        return 'Invalid'
+    return template.format(value)
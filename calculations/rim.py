@@ -1,38 +1,31 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import RIM_WIDTHS
+from calculations.results import quantity
+from calculations.schema import parameter
+
+# Design, minimum and maximum rim width (in) per row of the rim width catalogue
+RIM_DATA = [{key: RIM_WIDTHS.value(band, key) for key in ('design', 'min', 'max')} for band in RIM_WIDTHS]
 
 @dataclass
 class RimInput:
-    tyre_width_mm: int
-    tyre_aspect_ratio: int
-    rim_diameter_inches: float
-    proposed_rim_width_inches: float
+    tyre_width_mm: int = parameter('mm', gt=0)
+    tyre_aspect_ratio: int = parameter('%', gt=0, le=100)
+    rim_diameter_inches: float = parameter('in', gt=0)
+    proposed_rim_width_inches: float = parameter('in', gt=0)
 
-@dataclass
+@dataclass(slots=True)
 class RimOutput:
     tyre_designation: str
     recommended_rim_width_range: str
     compatibility_note: str
     compatibility_class: str
-    bead_seat_diameter_mm: str
-    flange_height_mm: str
+    bead_seat_diameter_mm: float = quantity('mm')
+    flange_height_mm: float = quantity('mm', precision=1)
 
 def calculate_rim_compatibility(inputs: RimInput) -> RimOutput:
-    rim_data = {}
-    if 90 <= inputs.tyre_width_mm <= 100:
-        rim_data = {'design': 2.50, 'min': 2.15, 'max': 2.75}
-    elif 110 <= inputs.tyre_width_mm <= 120:
-        rim_data = {'design': 3.50, 'min': 3.00, 'max': 3.75}
-    elif 130 <= inputs.tyre_width_mm <= 140:
-        rim_data = {'design': 4.00, 'min': 3.50, 'max': 4.50}
-    elif 150 <= inputs.tyre_width_mm <= 160:
-        rim_data = {'design': 4.50, 'min': 4.25, 'max': 5.00}
-    elif 170 <= inputs.tyre_width_mm <= 180:
-        rim_data = {'design': 5.50, 'min': 5.00, 'max': 6.00}
-    elif 190 <= inputs.tyre_width_mm <= 200:
-        rim_data = {'design': 6.00, 'min': 5.50, 'max': 6.50}
-    else:
-        rim_data = None
+    band = RIM_WIDTHS.containing('tyre_width_min', 'tyre_width_max', inputs.tyre_width_mm)
+    rim_data = RIM_DATA[band] if band >= 0 else None
 
     if rim_data:
         recommended_range = f'{rim_data["min"]:.2f}" to {rim_data["max"]:.2f}" (Ideal: {rim_data["design"]:.2f}")'
@@ -59,6 +52,6 @@ def calculate_rim_compatibility(inputs: RimInput) -> RimOutput:
         recommended_rim_width_range=recommended_range,
         compatibility_note=compatibility_note,
         compatibility_class=compatibility_class,
-        bead_seat_diameter_mm=f'{bead_seat_diameter_mm:.2f} mm',
-        flange_height_mm=f'{flange_height_mm:.1f} mm'
+        bead_seat_diameter_mm=bead_seat_diameter_mm,
+        flange_height_mm=flange_height_mm
     )
@@ -0,0 +1,309 @@
+from dataclasses import MISSING, field, fields
+import operator
+import numpy as np
+
+from calculations.units import UnitError, input_conversions, unit_spec
+
+# Input dataclasses declare the unit, bounds and allowed choices of each field
+# as metadata, the way output fields carry quantity(). schema_for() compiles a
+# class once into a Schema that converts and checks a form or JSON record, or a
+# whole batch of records column by column, and reports every bad field at once
+# so that invalid inputs never reach the numeric code. A record may give its
+# values in other units (a 'units' entry, see calculations.units); they are
+# converted to the declared units before the bounds are checked.
+
+def parameter(unit: str = '', default=MISSING, gt=None, ge=None, lt=None, le=None, choices=None, catalogue=None):
+    # catalogue: (record key, Table, property); a record naming a catalogue id under
+    # that key fills the field when it is left blank
+    bounds = tuple((name, limit) for name, limit in (('gt', gt), ('ge', ge), ('lt', lt), ('le', le)) if limit is not None)
+    return field(default=default, metadata={'unit': unit, 'bounds': bounds, 'catalogue': catalogue,
+                                            'choices': tuple(choices) if choices is not None else None})
+
+class InputError(ValueError):
+    # errors: {field: message}; the text lists them all
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__('; '.join(f'{name} {message}' for name, message in errors.items()))
+
+BOUND_CHECKS = {
+    'gt': (operator.gt, '>', 'must be greater than {}'),
+    'ge': (operator.ge, '>=', 'must be at least {}'),
+    'lt': (operator.lt, '<', 'must be less than {}'),
+    'le': (operator.le, '<=', 'must be at most {}'),
+}
+TYPE_ERRORS = {float: 'must be a number', int: 'must be a whole number', str: 'must be text'}
+
+def _to_int(value) -> int:
+    # Accepts 6, '6', 6.0 and '6.0', but not 6.5
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, float):
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            pass
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(value)
+    return int(number)
+
+class _Field:
+    __slots__ = ('name', 'kind', 'required', 'default', 'unit', 'bounds', 'checks', 'choices', 'choice_error', 'catalogue')
+
+    def __init__(self, f):
+        self.name = f.name
+        self.kind = f.type
+        self.required = f.default is MISSING
+        self.default = f.default
+        self.unit = f.metadata.get('unit', '')
+        self.bounds = f.metadata.get('bounds', ())
+        # (compare, symbol, limit, message) per bound
+        self.checks = tuple((compare, symbol, limit, message.format(limit))
+                            for (compare, symbol, message), limit in ((BOUND_CHECKS[name], limit) for name, limit in self.bounds))
+        choices = f.metadata.get('choices')
+        self.choices = frozenset(choices) if choices is not None else None
+        self.choice_error = f'must be one of {", ".join(sorted(self.choices))}' if choices is not None else None
+        self.catalogue = f.metadata.get('catalogue')
+
+class Schema:
+    def __init__(self, input_class):
+        self.input_class = input_class
+        self.fields = tuple(_Field(f) for f in fields(input_class))
+        # parse(data): an input instance from a form or JSON record; blank optional
+        # fields keep their default. Raises InputError naming every bad field.
+        self.parse = self._compile()
+
+    def describe(self) -> dict:
+        description = {}
+        for spec in self.fields:
+            entry = {'type': spec.kind.__name__, 'unit': spec.unit, 'required': spec.required}
+            if not spec.required:
+                entry['default'] = spec.default
+            entry.update(spec.bounds)
+            if spec.choices is not None:
+                entry['choices'] = sorted(spec.choices)
+            if spec.catalogue is not None:
+                key, table, name = spec.catalogue
+                entry['catalogue'] = {'key': key, 'table': table.name, 'property': name}
+            description[spec.name] = entry
+        return description
+
+    # --- One record ---
+    def _compile(self):
+        # Generates a parser for this class with every name, bound and message
+        # inlined, the way dataclasses generates __init__; runs once per class
+        namespace = {'InputError': InputError, 'UnitError': UnitError, 'input_class': self.input_class,
+                     'to_int': _to_int, 'input_conversions': input_conversions}
+        lines = ['def parse(data, units=None):', '    errors = {}',
+                 "    units = data.get('units') or units",
+                 '    conversions = None',
+                 '    if units:',
+                 '        try:',
+                 '            conversions = input_conversions(input_class, units) or None',
+                 '        except UnitError as e:',
+                 '            errors.update(e.errors)']
+        # Catalogue ids named by the record: row_<key> is the row, or None
+        keys = {}
+        for spec in self.fields:
+            if spec.catalogue is not None:
+                key, table, _ = spec.catalogue
+                if key not in keys:
+                    k = keys[key] = len(keys)
+                    namespace[f'index_{k}'] = table.index
+                    namespace[f'unknown_{k}'] = f'is not in the {table.name} catalogue'
+                    # An unknown id is reported once, as row -1, rather than as every linked field missing
+                    lines += [f'    reference = data.get({key!r})',
+                              f'    row_{k} = None',
+                              '    if reference:',
+                              f'        row_{k} = index_{k}.get(reference, -1) if isinstance(reference, str) else -1',
+                              f'        if row_{k} == -1:',
+                              f'            errors[{key!r}] = unknown_{k}']
+        for i, spec in enumerate(self.fields):
+            name = repr(spec.name)
+            namespace[f'default_{i}'] = spec.default
+            namespace[f'type_error_{i}'] = TYPE_ERRORS[spec.kind]
+            lines.append(f'    raw = data.get({name})')
+            blank = "if raw is None or raw == '':"
+            if spec.catalogue is not None:
+                key, table, property_name = spec.catalogue
+                k = keys[key]
+                # Catalogue values are in the declared unit; NaN (a property the entry
+                # lacks) becomes None, leaving the field required. The trailing None
+                # answers row -1.
+                namespace[f'catalogue_{i}'] = [None if value != value else value
+                                               for value in table.columns[property_name].tolist()] + [None]
+                lines += [f"    if (raw is None or raw == '') and row_{k} is not None and catalogue_{i}[row_{k}] is not None:",
+                          f'        v{i} = catalogue_{i}[row_{k}]']
+                blank = f'el{blank}'
+            if not spec.required:
+                missing = f'        v{i} = default_{i}'
+            elif spec.catalogue is not None:
+                missing = f"        if row_{k} != -1: errors[{name}] = 'is required'"
+            else:
+                missing = f"        errors[{name}] = 'is required'"
+            lines += [f'    {blank}',
+                      missing,
+                      '    else:',
+                      '        try:']
+            if spec.kind is float:
+                # x - x is NaN for infinities and NaN
+                lines += [f'            v{i} = float(raw)', f'            if v{i} - v{i} != 0: raise ValueError']
+                if spec.unit:
+                    lines += [f'            if conversions is not None and {name} in conversions:',
+                              f'                scale, offset, _ = conversions[{name}]',
+                              f'                v{i} = v{i} * scale + offset']
+            elif spec.kind is int:
+                lines.append(f'            v{i} = to_int(raw)')
+            else:
+                lines.append(f'            v{i} = str(raw)')
+            lines += ['        except (ValueError, TypeError, OverflowError):',
+                      f'            errors[{name}] = type_error_{i}']
+            conditions = []
+            for k, (_, symbol, limit, message) in enumerate(spec.checks):
+                namespace[f'limit_{i}_{k}'], namespace[f'message_{i}_{k}'] = limit, message
+                conditions.append((f'not v{i} {symbol} limit_{i}_{k}', f'message_{i}_{k}'))
+            if spec.choices is not None:
+                namespace[f'choices_{i}'] = spec.choices
+                namespace[f'choice_error_{i}'] = spec.choice_error
+                conditions.append((f'v{i} not in choices_{i}', f'choice_error_{i}'))
+            if conditions:
+                lines.append('        else:')
+                for k, (condition, message) in enumerate(conditions):
+                    lines += [f"            {'if' if k == 0 else 'elif'} {condition}:", f'                errors[{name}] = {message}']
+        lines += ['    if errors:', '        raise InputError(errors)',
+                  f"    return input_class({', '.join(f'v{i}' for i in range(len(self.fields)))})"]
+        exec('\n'.join(lines), namespace)
+        return namespace['parse']
+
+    # --- Batches ---
+    def parse_columns(self, records: list, units=None) -> tuple:
+        # ({field: column}, [{field: message} or None per record]) for a list of record
+        # dicts; conversion and checks run on whole columns, rows are only visited for errors.
+        # units applies to records without a 'units' entry of their own.
+        count = len(records)
+        columns, errors = {}, [None] * count
+
+        def reject(rows, name, message):
+            for row in rows:
+                if errors[row] is None:
+                    errors[row] = {}
+                errors[row].setdefault(name, message)
+
+        factors = self._unit_factors(records, units, reject)
+        references = self._catalogue_rows(records, reject)
+
+        for spec in self.fields:
+            raw = [record.get(spec.name) for record in records]
+            missing = np.fromiter((value is None or value == '' for value in raw), bool, count)
+            filled = None
+            # Rows naming an unknown catalogue id were reported under its key
+            unknown = references[spec.catalogue[0]] == -2 if spec.catalogue is not None else False
+            if spec.catalogue is not None and missing.any():
+                key, table, property_name = spec.catalogue
+                rows = references[key]
+                values = table.columns[property_name][np.maximum(rows, 0)]
+                filled = missing & (rows >= 0) & ~np.isnan(values)
+                raw = [value if fill else item for item, value, fill in zip(raw, values.tolist(), filled)]
+                missing &= ~filled
+            if missing.any():
+                if spec.required:
+                    reject(np.flatnonzero(missing & ~unknown), spec.name, 'is required')
+                raw = [spec.default if blank else value for value, blank in zip(raw, missing)]
+            if spec.kind is str:
+                column = np.array([str(value) for value in raw], dtype=object)
+                if spec.choices is not None:
+                    reject(np.flatnonzero(~missing & ~np.isin(column, list(spec.choices))), spec.name, spec.choice_error)
+                columns[spec.name] = column
+                continue
+            try:
+                column = np.array(raw, dtype=float)
+                bad = ~np.isfinite(column)
+            except (ValueError, TypeError):
+                # Only a column with a malformed entry is converted value by value
+                column, bad = np.empty(count), np.zeros(count, bool)
+                for row, value in enumerate(raw):
+                    try:
+                        column[row] = float(value)
+                    except (ValueError, TypeError, OverflowError):
+                        column[row], bad[row] = np.nan, True
+                bad |= ~np.isfinite(column)
+            if spec.kind is int:
+                bad |= ~bad & (column != np.round(column))
+            # Missing required values were reported above; setdefault keeps that message
+            reject(np.flatnonzero(bad & ~(missing & unknown)), spec.name, TYPE_ERRORS[spec.kind])
+            valid = ~bad
+            if spec.name in factors:
+                scale, offset = factors[spec.name]
+                # Defaults and catalogue values are already in the declared unit
+                declared = missing if filled is None else missing | filled
+                if declared.any():
+                    scale, offset = np.where(declared, 1.0, scale), np.where(declared, 0.0, offset)
+                column = column * scale + offset
+            for compare, _, limit, message in spec.checks:
+                with np.errstate(invalid='ignore'):
+                    reject(np.flatnonzero(valid & ~compare(column, limit)), spec.name, message)
+            columns[spec.name] = column.astype(np.int64) if spec.kind is int and not bad.any() else column
+        return columns, errors
+
+    def _catalogue_rows(self, records: list, reject) -> dict:
+        # {record key: catalogue row per record, -1 where none is named and -2 for an unknown id}
+        references = {}
+        for spec in self.fields:
+            if spec.catalogue is None or spec.catalogue[0] in references:
+                continue
+            key, table, _ = spec.catalogue
+            given = [record.get(key) for record in records]
+            rows = np.fromiter((-1 if not value else table.index.get(value, -2) if isinstance(value, str) else -2
+                                for value in given), np.int64, len(records))
+            reject(np.flatnonzero(rows == -2), key, f'is not in the {table.name} catalogue')
+            references[key] = rows
+        return references
+
+    def _unit_factors(self, records: list, units, reject) -> dict:
+        # {field: (scale, offset)} converting each column to the declared units: scalars
+        # when every record shares its units, otherwise one factor per row
+        groups = {}
+        for row, record in enumerate(records):
+            given = record.get('units') or units
+            groups.setdefault(unit_spec(given) if given else (), []).append(row)
+        conversions = {}
+        for spec, rows in groups.items():
+            try:
+                conversions[spec] = input_conversions(self.input_class, dict(spec)) if spec else {}
+            except UnitError as e:
+                for name, message in e.errors.items():
+                    reject(rows, name, message)
+                conversions[spec] = {}
+        names = {name for converted in conversions.values() for name in converted}
+        if len(groups) == 1:
+            converted = next(iter(conversions.values()))
+            return {name: converted[name][:2] for name in names}
+        factors = {}
+        for name in names:
+            scale, offset = np.ones(len(records)), np.zeros(len(records))
+            for spec, rows in groups.items():
+                if name in conversions[spec]:
+                    scale[rows], offset[rows] = conversions[spec][name][:2]
+            factors[name] = (scale, offset)
+        return factors
+
+    def parse_records(self, records: list, units=None) -> list:
+        # [(input instance or None, {field: message} or None)] for a list of record dicts
+        columns, errors = self.parse_columns(records, units)
+        items = {name: column.tolist() for name, column in columns.items()}
+        kinds = {spec.name: spec.kind for spec in self.fields}
+        parsed = []
+        for row, row_errors in enumerate(errors):
+            if row_errors:
+                parsed.append((None, row_errors))
+            else:
+                parsed.append((self.input_class(**{name: kinds[name](values[row]) for name, values in items.items()}), None))
+        return parsed
+
+_SCHEMAS = {}
+
+def schema_for(input_class) -> Schema:
+    schema = _SCHEMAS.get(input_class)
+    if schema is None:
+        schema = _SCHEMAS[input_class] = Schema(input_class)
+    return schema
@@ -0,0 +1,100 @@
+import numpy as np
+
+# Temperature-dependent specific heat and yield strength. Each curve set is
+# tabulated against temperature and resampled once, at import, onto a common
+# uniform grid as ratios to its value at REFERENCE_TEMPERATURE, so the material
+# inputs of a calculator keep meaning "value at room temperature" and the curve
+# only supplies the shape. The specific-heat ratio is integrated into an
+# enthalpy table; a stop's energy balance is then solved by inverting that
+# table, for one design or a whole batch with several curve sets, without any
+# per-row iteration.
+
+REFERENCE_TEMPERATURE = 20.0
+GRID_STEP = 2.0
+# From below absolute zero, so every initial temperature the disc input accepts is on the grid
+GRID = np.arange(-274.0, 1200.0 + GRID_STEP, GRID_STEP)
+
+# Temperature (°C), specific heat (J/kg·K) and yield strength (MPa) points;
+# outside the points a property keeps its first or last value
+THERMAL_CURVE_DATA = {
+    # Grey cast iron discs (GG-20/GG-25)
+    'grey-cast-iron': {
+        'temperature': (20, 100, 200, 300, 400, 500, 600, 700, 800),
+        'specific_heat': (460, 480, 505, 530, 555, 590, 630, 690, 760),
+        'yield_strength': (165, 163, 157, 152, 145, 125, 95, 55, 25),
+    },
+    # Martensitic stainless discs (AISI 410/420, X20Cr13)
+    'martensitic-stainless': {
+        'temperature': (20, 100, 200, 300, 400, 500, 600, 700, 800),
+        'specific_heat': (460, 480, 510, 540, 570, 610, 660, 730, 800),
+        'yield_strength': (345, 330, 312, 298, 283, 245, 170, 90, 40),
+    },
+    # Carbon and low-alloy steel, EN 1993-1-2 specific heat and yield reduction
+    'carbon-steel': {
+        'temperature': (20, 100, 200, 300, 400, 500, 600, 700, 735, 800, 900, 1000, 1100),
+        'specific_heat': (440, 488, 530, 565, 606, 667, 760, 1008, 1450, 803, 650, 650, 650),
+        'yield_strength': (355, 355, 355, 355, 355, 277, 167, 82, 60, 39, 21, 14, 7),
+    },
+    # 6000-series aluminium, EN 1999-1-2
+    'aluminium-6xxx': {
+        'temperature': (20, 100, 150, 200, 250, 300, 350, 400, 500),
+        'specific_heat': (911, 944, 965, 985, 1006, 1026, 1047, 1067, 1108),
+        'yield_strength': (276, 262, 251, 218, 152, 86, 28, 14, 0),
+    },
+}
+
+CURVE_NAMES = tuple(THERMAL_CURVE_DATA)
+CURVE_INDEX = {name: i for i, name in enumerate(CURVE_NAMES)}
+# Rows are curve sets, columns the grid points
+SPECIFIC_HEAT_RATIO = np.array([np.interp(GRID, data['temperature'], data['specific_heat'])
+                                / np.interp(REFERENCE_TEMPERATURE, data['temperature'], data['specific_heat'])
+                                for data in THERMAL_CURVE_DATA.values()])
+YIELD_STRENGTH_RATIO = np.array([np.interp(GRID, data['temperature'], data['yield_strength'])
+                                 / np.interp(REFERENCE_TEMPERATURE, data['temperature'], data['yield_strength'])
+                                 for data in THERMAL_CURVE_DATA.values()])
+# Enthalpy per unit reference specific heat (K) above the first grid point, trapezoidal rule
+ENTHALPY_RATIO = np.concatenate(
+    [np.zeros((len(CURVE_NAMES), 1)),
+     np.cumsum((SPECIFIC_HEAT_RATIO[:, 1:] + SPECIFIC_HEAT_RATIO[:, :-1]) / 2 * GRID_STEP, axis=1)], axis=1)
+# The rows laid end to end with a gap between them form one increasing array, so
+# the enthalpies of rows with different curves are inverted by a single search
+_ROW_OFFSET = (ENTHALPY_RATIO[:, -1].max() + 1.0) * np.arange(len(CURVE_NAMES))
+_FLAT_ENTHALPY = (ENTHALPY_RATIO + _ROW_OFFSET[:, None]).ravel()
+
+def _position(temperature):
+    # Grid cell and fraction within it; clamped to the grid
+    index = np.clip((np.asarray(temperature, dtype=float) - GRID[0]) / GRID_STEP, 0, len(GRID) - 1)
+    cell = np.minimum(index.astype(np.intp), len(GRID) - 2)
+    return cell, index - cell
+
+def _lookup(table: np.ndarray, rows, temperature):
+    cell, fraction = _position(temperature)
+    return table[rows, cell] * (1 - fraction) + table[rows, cell + 1] * fraction
+
+def curve_rows(names) -> np.ndarray:
+    # Row numbers for curve names (scalar or array)
+    names = np.asarray(names)
+    if names.ndim == 0:
+        return np.intp(CURVE_INDEX[str(names)])
+    # Distinct names are looked up once, however many rows share them
+    distinct, inverse = np.unique(names, return_inverse=True)
+    return np.array([CURVE_INDEX[str(name)] for name in distinct], dtype=np.intp)[inverse].reshape(names.shape)
+
+def yield_strength_ratio(rows, temperature):
+    return _lookup(YIELD_STRENGTH_RATIO, rows, temperature)
+
+def final_temperature(rows, initial_temperature, energy_per_capacity):
+    # Temperature reached when energy_per_capacity (J/kg over the reference specific
+    # heat, i.e. K) is absorbed from initial_temperature, by inverting the enthalpy table;
+    # above the grid the last specific heat is held
+    rows, initial_temperature, energy_per_capacity = np.broadcast_arrays(rows, initial_temperature, energy_per_capacity)
+    target = _lookup(ENTHALPY_RATIO, rows, initial_temperature) + energy_per_capacity
+    last = ENTHALPY_RATIO[rows, -1]
+    flat = np.clip(np.minimum(target, last) + _ROW_OFFSET[rows], _FLAT_ENTHALPY[0], None)
+    position = np.searchsorted(_FLAT_ENTHALPY, flat, 'right') - 1
+    cell = np.clip(position - rows * len(GRID), 0, len(GRID) - 2)
+    low = ENTHALPY_RATIO[rows, cell]
+    high = ENTHALPY_RATIO[rows, cell + 1]
+    temperature = GRID[cell] + (np.minimum(target, last) - low) / (high - low) * GRID_STEP
+    beyond = np.maximum(target - last, 0) / SPECIFIC_HEAT_RATIO[rows, -1]
+    return temperature + beyond
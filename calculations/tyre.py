@@ -1,36 +1,32 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import TREADS
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class TyreInput:
-    bike_type: str
-    vehicle_mass: float
-    rim_diameter: float
-    aspect_ratio: float
-    section_width: float
+    bike_type: str = parameter(choices=TREADS)
+    vehicle_mass: float = parameter('kg', gt=0)
+    rim_diameter: float = parameter('in', gt=0)
+    aspect_ratio: float = parameter('%', gt=0, le=100)
+    section_width: float = parameter('mm', gt=0)
 
-@dataclass
+@dataclass(slots=True)
 class TyreOutput:
-    section_height: str
-    overall_diameter: str
-    tread_thickness: str
-    sidewall_thickness: str
-    bead_size: str
-    crown_radius: str
-    contact_patch_area: str
+    section_height: float = quantity('mm')
+    overall_diameter: float = quantity('mm')
+    tread_thickness: float = quantity('mm')
+    sidewall_thickness: float = quantity('mm')
+    bead_size: float = quantity('mm')
+    crown_radius: float = quantity('mm')
+    contact_patch_area: float = quantity('m²', precision=4)
 
 def calculate_tyre(inputs: TyreInput) -> TyreOutput:
     section_height = (inputs.aspect_ratio / 100) * inputs.section_width
     overall_diameter = (2 * section_height) + (inputs.rim_diameter * 25.4)
 
-    tread_thickness_map = {
-        'commuter': 7,
-        'sports': 8,
-        'superbike': 8.5,
-        'cruiser_touring': 9,
-        'offroad': 11
-    }
-    tread_thickness = tread_thickness_map.get(inputs.bike_type, 8)
+    tread_thickness = TREADS.value(inputs.bike_type, 'tread_thickness') if inputs.bike_type in TREADS else 8
 
     sidewall_thickness = 0.08 * section_height
     bead_size = 17.5
@@ -41,11 +37,11 @@ def calculate_tyre(inputs: TyreInput) -> TyreOutput:
     contact_patch_area = load_per_tyre / inflation_pressure
 
     return TyreOutput(
-        section_height=f'{section_height:.2f} mm',
-        overall_diameter=f'{overall_diameter:.2f} mm',
-        tread_thickness=f'{tread_thickness:.2f} mm',
-        sidewall_thickness=f'{sidewall_thickness:.2f} mm',
-        bead_size=f'{bead_size:.2f} mm',
-        crown_radius=f'{crown_radius:.2f} mm',
-        contact_patch_area=f'{contact_patch_area:.4f} m²'
+        section_height=section_height,
+        overall_diameter=overall_diameter,
+        tread_thickness=tread_thickness,
+        sidewall_thickness=sidewall_thickness,
+        bead_size=bead_size,
+        crown_radius=crown_radius,
+        contact_patch_area=contact_patch_area
     )
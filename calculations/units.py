@@ -0,0 +1,149 @@
+from dataclasses import fields
+from functools import lru_cache
+import math
+import numpy as np
+
+# Every input and output field declares the unit the calculators work in
+# (parameter() and quantity() metadata). Values may arrive in, and be reported
+# in, any other unit of the same dimension: the conversion from and to the
+# declared unit is a (scale, offset) pair resolved once per unit choice and
+# cached, so a value or a whole batch column costs one multiply-add.
+
+# symbol: (dimension, scale to SI, offset to SI)
+UNITS = {
+    'm': ('length', 1.0, 0.0), 'mm': ('length', 1e-3, 0.0), 'cm': ('length', 1e-2, 0.0), 'km': ('length', 1e3, 0.0),
+    'in': ('length', 0.0254, 0.0), 'ft': ('length', 0.3048, 0.0), 'mi': ('length', 1609.344, 0.0),
+    'm²': ('area', 1.0, 0.0), 'cm²': ('area', 1e-4, 0.0), 'mm²': ('area', 1e-6, 0.0),
+    'in²': ('area', 0.0254**2, 0.0), 'ft²': ('area', 0.3048**2, 0.0),
+    'm/s': ('speed', 1.0, 0.0), 'km/h': ('speed', 1 / 3.6, 0.0), 'mph': ('speed', 0.44704, 0.0), 'ft/s': ('speed', 0.3048, 0.0),
+    'm/s²': ('acceleration', 1.0, 0.0), 'ft/s²': ('acceleration', 0.3048, 0.0), 'g': ('acceleration', 9.80665, 0.0),
+    'kg': ('mass', 1.0, 0.0), 'lb': ('mass', 0.45359237, 0.0),
+    'N': ('force', 1.0, 0.0), 'kN': ('force', 1e3, 0.0), 'lbf': ('force', 4.4482216152605, 0.0),
+    'Nm': ('torque', 1.0, 0.0), 'lbf·ft': ('torque', 1.3558179483314004, 0.0), 'lbf·in': ('torque', 0.1129848290276167, 0.0),
+    'Pa': ('pressure', 1.0, 0.0), 'kPa': ('pressure', 1e3, 0.0), 'MPa': ('pressure', 1e6, 0.0), 'GPa': ('pressure', 1e9, 0.0),
+    'bar': ('pressure', 1e5, 0.0), 'psi': ('pressure', 6894.757293168361, 0.0), 'ksi': ('pressure', 6894757.293168361, 0.0),
+    'kg/m³': ('density', 1.0, 0.0), 'g/cm³': ('density', 1e3, 0.0),
+    'lb/ft³': ('density', 16.018463373960138, 0.0), 'lb/in³': ('density', 27679.904710203125, 0.0),
+    'J/kg·K': ('specific heat', 1.0, 0.0), 'kJ/kg·K': ('specific heat', 1e3, 0.0), 'BTU/lb·°F': ('specific heat', 4186.8, 0.0),
+    'W': ('power', 1.0, 0.0), 'kW': ('power', 1e3, 0.0), 'hp': ('power', 745.6998715822702, 0.0),
+    'J': ('energy', 1.0, 0.0), 'kJ': ('energy', 1e3, 0.0), 'BTU': ('energy', 1055.05585262, 0.0),
+    'W/m²': ('heat flux', 1.0, 0.0), 'kW/m²': ('heat flux', 1e3, 0.0), 'BTU/h·ft²': ('heat flux', 3.154590745063049, 0.0),
+    'K': ('temperature', 1.0, 0.0), '°C': ('temperature', 1.0, 273.15), '°F': ('temperature', 5 / 9, 273.15 - 32 * 5 / 9),
+    'rpm': ('rotational speed', 2 * math.pi / 60, 0.0), 'rad/s': ('rotational speed', 1.0, 0.0),
+    's': ('time', 1.0, 0.0), 'min': ('time', 60.0, 0.0), 'h': ('time', 3600.0, 0.0),
+    '°': ('angle', math.pi / 180, 0.0), 'rad': ('angle', 1.0, 0.0),
+    'mm/1000km': ('wear rate', 1e-9, 0.0), 'in/1000mi': ('wear rate', 0.0254 / 1609344, 0.0),
+}
+
+# Preferred unit per declared unit; units missing here are kept as declared
+SYSTEMS = {
+    'metric': {},
+    'imperial': {
+        'mm': 'in', 'm': 'ft', 'km': 'mi', 'cm²': 'in²', 'm²': 'ft²', 'km/h': 'mph', 'm/s': 'ft/s', 'm/s²': 'ft/s²',
+        'kg': 'lb', 'N': 'lbf', 'Nm': 'lbf·ft', 'MPa': 'psi', 'kg/m³': 'lb/in³', 'J/kg·K': 'BTU/lb·°F', 'kW': 'hp',
+        'kJ': 'BTU', 'kW/m²': 'BTU/h·ft²', '°C': '°F', 'mm/1000km': 'in/1000mi',
+    },
+}
+
+class UnitError(ValueError):
+    # errors: {field: message}
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__('; '.join(f'{name} {message}' for name, message in errors.items()))
+
+def conversion(from_unit: str, to_unit: str, difference: bool = False) -> tuple:
+    # (scale, offset) with value_in_to_unit = value_in_from_unit * scale + offset;
+    # a temperature difference converts without the offset
+    from_dimension, from_scale, from_offset = UNITS[from_unit]
+    to_dimension, to_scale, to_offset = UNITS[to_unit]
+    if from_dimension != to_dimension:
+        raise ValueError(f'cannot convert {from_unit} ({from_dimension}) to {to_unit} ({to_dimension})')
+    offset = 0.0 if difference else (from_offset - to_offset) / to_scale
+    return from_scale / to_scale, offset
+
+def unit_spec(value) -> tuple:
+    # A hashable unit choice from a JSON mapping {'system': ..., field: unit} or
+    # a form string such as 'imperial' or 'imperial,stopping_distance:m'
+    if isinstance(value, dict):
+        return tuple(sorted(('system', str(unit)) if name == 'system' else (str(name), str(unit))
+                            for name, unit in value.items()))
+    return _text_spec(str(value))
+
+@lru_cache(maxsize=512)
+def _text_spec(text: str) -> tuple:
+    items = []
+    for token in text.split(','):
+        name, separator, unit = token.strip().partition(':')
+        if name:
+            items.append((name.strip(), unit.strip()) if separator else ('system', name))
+    return tuple(sorted(items))
+
+@lru_cache(maxsize=512)
+def _conversions(dataclass, spec: tuple, outgoing: bool) -> dict:
+    options = dict(spec)
+    system = options.pop('system', 'metric')
+    errors = {}
+    if system not in SYSTEMS:
+        errors['units'] = f"names an unknown unit system '{system}', expected one of {', '.join(SYSTEMS)}"
+    preferred = SYSTEMS.get(system, {})
+    known = {f.name: f for f in fields(dataclass)}
+    for name in options:
+        if name not in known:
+            errors[name] = 'is not a field that takes a unit'
+    result = {}
+    for name, f in known.items():
+        declared = f.metadata.get('unit')
+        # Inputs are converted as floats; counts and text keep their unit
+        if declared not in UNITS or not outgoing and f.type is not float:
+            if name in options and options[name] != declared:
+                if declared in UNITS:
+                    errors[name] = f"is a whole number of {declared} and cannot be given in '{options[name]}'"
+                elif declared:
+                    errors[name] = f"is in '{declared}' and cannot be given in '{options[name]}'"
+                else:
+                    errors[name] = f"has no unit and cannot be given in '{options[name]}'"
+            continue
+        unit = options.get(name, preferred.get(declared, declared))
+        if unit == declared:
+            continue
+        try:
+            if outgoing:
+                scale, offset = conversion(declared, unit, f.metadata.get('difference', False))
+            else:
+                scale, offset = conversion(unit, declared, f.metadata.get('difference', False))
+        except KeyError:
+            errors[name] = f"has an unknown unit '{unit}'"
+            continue
+        except ValueError:
+            errors[name] = f"is a {UNITS[declared][0]} and cannot be given in '{unit}'"
+            continue
+        result[name] = (scale, offset, unit)
+    if errors:
+        raise UnitError(errors)
+    return result
+
+def input_conversions(input_class, value) -> dict:
+    # {field: (scale, offset, unit)} taking given units to the declared ones
+    return _conversions(input_class, unit_spec(value), False)
+
+def output_conversions(output_class, value) -> dict:
+    # {field: (scale, offset, unit)} taking the declared units to the requested ones
+    return _conversions(output_class, unit_spec(value), True)
+
+def convert_value(value, scale: float, offset: float):
+    # Numbers and NumPy columns in one multiply-add; list outputs item by item
+    if isinstance(value, (list, tuple)):
+        return [item * scale + offset for item in value]
+    if isinstance(value, np.ndarray) and value.dtype == object:
+        converted = np.empty(value.shape, dtype=object)
+        converted.ravel()[:] = [convert_value(item, scale, offset) for item in value.ravel()]
+        return converted
+    return value * scale + offset
+
+def convert_values(values: dict, conversions: dict) -> dict:
+    # A copy of a {field: value or column} mapping with the conversions applied
+    converted = dict(values)
+    for name, (scale, offset, _) in conversions.items():
+        if name in converted:
+            converted[name] = convert_value(converted[name], scale, offset)
+    return converted
@@ -1,19 +1,22 @@
 from dataclasses import dataclass
 import numpy as np
+from calculations.catalogue import MATERIALS
+from calculations.results import quantity
+from calculations.schema import parameter
 
 @dataclass
 class WristPinInput:
-    piston_diameter: float
-    max_gas_pressure: float
-    wrist_pin_material_yield_strength: float
+    piston_diameter: float = parameter('mm', gt=0)
+    max_gas_pressure: float = parameter('MPa', gt=0)
+    wrist_pin_material_yield_strength: float = parameter('MPa', gt=0, catalogue=('material', MATERIALS, 'yield_strength'))
 
-@dataclass
+@dataclass(slots=True)
 class WristPinOutput:
-    wrist_pin_outer_diameter: str
-    wrist_pin_inner_diameter: str
-    bearing_pressure: str
-    bending_stress: str
-    safety_factor: str
+    wrist_pin_outer_diameter: float = quantity('mm')
+    wrist_pin_inner_diameter: float = quantity('mm')
+    bearing_pressure: float = quantity('MPa')
+    bending_stress: float = quantity('MPa')
+    safety_factor: float = quantity('')
 
 def calculate_wrist_pin(inputs: WristPinInput) -> WristPinOutput:
     # Simplified formulas based on common engineering practices
@@ -43,9 +46,9 @@ def calculate_wrist_pin(inputs: WristPinInput) -> WristPinOutput:
     safety_factor = inputs.wrist_pin_material_yield_strength / bending_stress if bending_stress > 0 else float('inf')
 
     return WristPinOutput(
-        wrist_pin_outer_diameter=f'{wrist_pin_outer_diameter:.2f} mm',
-        wrist_pin_inner_diameter=f'{wrist_pin_inner_diameter:.2f} mm',
-        bearing_pressure=f'{bearing_pressure:.2f} MPa',
-        bending_stress=f'{bending_stress:.2f} MPa',
-        safety_factor=f'{safety_factor:.2f}'
+        wrist_pin_outer_diameter=wrist_pin_outer_diameter,
+        wrist_pin_inner_diameter=wrist_pin_inner_diameter,
+        bearing_pressure=bearing_pressure,
+        bending_stress=bending_stress,
+        safety_factor=safety_factor
     )
@@ -0,0 +1,9 @@
+# Read by gunicorn from the working directory: gunicorn app:app
+# Threaded workers, so an open job event stream holds one thread rather than a whole worker
+worker_class = 'gthread'
+threads = 8
+
+def post_worker_init(worker):
+    # One job dispatcher per worker, so queued jobs resume after a restart
+    from app import job_queue
+    job_queue.start()
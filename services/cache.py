@@ -0,0 +1,178 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from calculations.results import as_dict
+from services.paths import data_path, make_parent
+
+# Results and rendered pages live in one SQLite file so that every gunicorn
+# worker on the host shares the same entries and counters. WAL mode lets the
+# workers read concurrently while one of them writes. Lookups only read: each
+# worker keeps its hit and miss counts and the access times of its hits in
+# memory and writes them in one transaction at most every flush_interval (and
+# with every put), so cache hits do not queue on the write lock. Expired
+# entries are deleted by those writes too. Keys include a digest of the
+# calculators and templates, so a deploy that changes either never serves
+# entries computed by the old code.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def code_version(directories=('calculations', 'templates')) -> str:
+    digest = hashlib.sha256()
+    for directory in directories:
+        for folder, _, names in sorted(os.walk(os.path.join(ROOT, directory))):
+            for name in sorted(names):
+                if name.endswith(('.py', '.html')):
+                    path = os.path.join(folder, name)
+                    digest.update(os.path.relpath(path, ROOT).encode())
+                    with open(path, 'rb') as source:
+                        digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+def input_key(calculator_name: str, inputs, *extra) -> str:
+    # Inputs are canonicalised after type conversion, so '60', '60.0' and 60 share an entry
+    canonical = json.dumps([calculator_name, as_dict(inputs), *extra], sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ResultCache:
+    def __init__(self, path: str, max_entries: int = 2048, ttl_seconds: float = 3600, flush_interval: float = 1.0,
+                 version: str = ''):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._accessed = {}
+        self._counts = {}
+        self._flushed = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Reconnect after a fork: SQLite connections must not cross processes
+        if self._connection is None or self._pid != os.getpid():
+            make_parent(self.path)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, results TEXT, html TEXT, created REAL, accessed REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_created ON entries (created)')
+            connection.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            connection.executemany('INSERT OR IGNORE INTO counters VALUES (?, 0)', [('hits',), ('misses',), ('evictions',)])
+            if self._pid is None:
+                atexit.register(self.flush)
+            # Counts inherited from the parent process are the parent's to write
+            self._accessed, self._counts, self._flushed = {}, {}, time.monotonic()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def make_key(self, calculator_name: str, inputs) -> str:
+        return input_key(calculator_name, inputs, self.version)
+
+    def get(self, key: str):
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute('SELECT results, html, created FROM entries WHERE key = ?', (key,)).fetchone()
+            now = time.time()
+            # An expired entry is a miss; the next write deletes it
+            if row is None or now - row[2] > self.ttl_seconds:
+                self._count('misses')
+                row = None
+            else:
+                self._count('hits')
+                self._accessed[key] = now
+            if time.monotonic() - self._flushed >= self.flush_interval:
+                self._write(connection)
+        return None if row is None else (json.loads(row[0]), row[1])
+
+    def put(self, key: str, results, html: str):
+        with self._lock:
+            connection = self._connect()
+            now = time.time()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                                   (key, json.dumps(as_dict(results)), html, now, now))
+                self._write(connection, transaction=False)
+                excess = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    connection.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)', (excess,))
+                    self._bump(connection, 'evictions', excess)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    def flush(self):
+        # Writes this process's pending counts and access times now
+        with self._lock:
+            if self._pid == os.getpid():
+                self._write(self._connection)
+
+    def _count(self, name: str):
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def _write(self, connection, transaction: bool = True):
+        # Pending counts and access times, plus deletion of expired entries; called with the lock held
+        self._flushed = time.monotonic()
+        if not (self._counts or self._accessed):
+            return
+        accessed, counts = self._accessed, self._counts
+        self._accessed, self._counts = {}, {}
+        if transaction:
+            connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany('UPDATE entries SET accessed = MAX(accessed, ?) WHERE key = ?',
+                                   [(when, key) for key, when in accessed.items()])
+            expired = connection.execute('DELETE FROM entries WHERE created < ?', (time.time() - self.ttl_seconds,)).rowcount
+            if expired:
+                counts['evictions'] = counts.get('evictions', 0) + expired
+            for name, amount in counts.items():
+                self._bump(connection, name, amount)
+            if transaction:
+                connection.execute('COMMIT')
+        except BaseException:
+            if transaction:
+                connection.execute('ROLLBACK')
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            connection = self._connect()
+            self._write(connection)
+            stats = dict(connection.execute('SELECT name, value FROM counters').fetchall())
+            stats['entries'] = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute('DELETE FROM entries')
+            connection.execute('UPDATE counters SET value = 0')
+            self._accessed, self._counts = {}, {}
+
+    @staticmethod
+    def _bump(connection, name: str, amount: int = 1):
+        connection.execute('UPDATE counters SET value = value + ? WHERE name = ?', (amount, name))
+
+def cache_from_environment() -> ResultCache:
+    return ResultCache(
+        path=os.environ.get('RESULT_CACHE_PATH', data_path('cache.sqlite3')),
+        max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 2048)),
+        ttl_seconds=float(os.environ.get('RESULT_CACHE_TTL', 3600)),
+        flush_interval=float(os.environ.get('RESULT_CACHE_FLUSH_INTERVAL', 1.0)),
+        version=code_version(),
+    )
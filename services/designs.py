@@ -0,0 +1,247 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+
+from calculations.registry import CALCULATORS
+from calculations.results import as_dict
+from services.cache import input_key
+from services.paths import data_path, make_parent
+
+# Every calculation served by the site is kept in one SQLite file, one table
+# per calculator with a column per input and output field and an index on each
+# numeric output, so range queries over past designs are index scans. Identical
+# inputs share a row (keyed like the result cache) that counts how often the
+# design was seen. The request path only appends to an in-memory queue; a
+# writer thread per process stores the queue in batched transactions.
+
+OPERATORS = {'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=', 'eq': '=', 'ne': '!='}
+COLUMN_TYPES = {float: 'REAL', int: 'INTEGER', str: 'TEXT', list: 'TEXT'}  # lists are stored as JSON
+
+def _columns(calculator: str) -> tuple:
+    # ({input field: type}, {output field: type})
+    entry = CALCULATORS[calculator]
+    return ({field.name: field.type for field in fields(entry.input_class)},
+            {field.name: field.type for field in fields(entry.output_class)})
+
+def _stored(value, kind):
+    if kind is list:
+        return json.dumps([item.item() if hasattr(item, 'item') else item for item in value])
+    if kind is str:
+        return str(value)
+    return value.item() if hasattr(value, 'item') else value
+
+class DesignStore:
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.5, max_pending: int = 50_000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._queue = None
+        self._writer = None
+        self._writer_pid = None
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_pending > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Reconnect after a fork: SQLite connections must not cross processes
+        if self._connection is None or self._pid != os.getpid():
+            make_parent(self.path)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for calculator in CALCULATORS:
+                input_columns, output_columns = _columns(calculator)
+                columns = ', '.join(f'"{name}" {COLUMN_TYPES[kind]}' for name, kind in {**input_columns, **output_columns}.items())
+                connection.execute(f'CREATE TABLE IF NOT EXISTS "designs_{calculator}" (id INTEGER PRIMARY KEY, '
+                                   f'input_key TEXT UNIQUE NOT NULL, created REAL, last_seen REAL, '
+                                   f'times_seen INTEGER NOT NULL DEFAULT 1, {columns})')
+                # Fields added to a calculator since the table was created become new (empty) columns
+                existing = {row['name'] for row in connection.execute(f'PRAGMA table_info("designs_{calculator}")')}
+                for name, kind in {**input_columns, **output_columns}.items():
+                    if name not in existing:
+                        connection.execute(f'ALTER TABLE "designs_{calculator}" ADD COLUMN "{name}" {COLUMN_TYPES[kind]}')
+                for name, kind in output_columns.items():
+                    if kind in (float, int):
+                        connection.execute(f'CREATE INDEX IF NOT EXISTS "designs_{calculator}_{name}" '
+                                           f'ON "designs_{calculator}" ("{name}")')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    # --- Recording ---
+    def record(self, calculator: str, inputs, outputs):
+        # Never blocks: when the writer falls behind by max_pending designs, new ones are dropped and counted
+        if not self.enabled:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait((calculator, inputs, outputs, time.time()))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        # Waits until every design recorded by this process so far is stored
+        if self._queue is not None and self._writer_pid == os.getpid():
+            self._queue.join()
+
+    def _start(self):
+        # One queue and writer thread per process, started on first use
+        if self._writer_pid != os.getpid():
+            with self._lock:
+                if self._writer_pid != os.getpid():
+                    self._queue = queue.Queue(self.max_pending)
+                    self._writer = threading.Thread(target=self._write, name='design-writer', daemon=True)
+                    self._writer.start()
+                    self._writer_pid = os.getpid()
+                    atexit.register(self.flush)
+
+    def _write(self):
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._store(batch)
+            except Exception:
+                # Any failure drops the batch; the writer must keep draining the queue for flush()
+                self.dropped += len(batch)
+            finally:
+                for _ in batch:
+                    pending.task_done()
+
+    def _store(self, batch: list):
+        rows = {}
+        for calculator, inputs, outputs, seen in batch:
+            input_columns, output_columns = _columns(calculator)
+            try:
+                values = as_dict(inputs)
+                results = as_dict(outputs)
+                row = ([input_key(calculator, inputs), seen, seen]
+                       + [_stored(values[name], kind) for name, kind in input_columns.items()]
+                       + [_stored(results[name], kind) for name, kind in output_columns.items()])
+            except Exception:
+                self.dropped += 1  # a malformed record only costs itself
+                continue
+            rows.setdefault(calculator, []).append(row)
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN')
+            try:
+                for calculator, table_rows in rows.items():
+                    input_columns, output_columns = _columns(calculator)
+                    columns = ', '.join(f'"{name}"' for name in [*input_columns, *output_columns])
+                    placeholders = ', '.join('?' * (len(input_columns) + len(output_columns) + 3))
+                    refreshed = ', '.join(f'"{name}" = excluded."{name}"' for name in output_columns)
+                    # A repeated design keeps its row; outputs are refreshed in case a calculator changed
+                    connection.executemany(
+                        f'INSERT INTO "designs_{calculator}" (input_key, created, last_seen, {columns}) '
+                        f'VALUES ({placeholders}) ON CONFLICT (input_key) DO UPDATE SET '
+                        f'last_seen = excluded.last_seen, times_seen = times_seen + 1, {refreshed}',
+                        table_rows)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    # --- Reading ---
+    def _design(self, calculator: str, row) -> dict:
+        input_columns, output_columns = _columns(calculator)
+
+        def value(name, kind):
+            return json.loads(row[name]) if kind is list and row[name] is not None else row[name]
+
+        return {
+            'id': row['id'], 'created': row['created'], 'last_seen': row['last_seen'], 'times_seen': row['times_seen'],
+            'inputs': {name: value(name, kind) for name, kind in input_columns.items()},
+            'outputs': {name: value(name, kind) for name, kind in output_columns.items()},
+        }
+
+    def get(self, calculator: str, design_id: int):
+        if calculator not in CALCULATORS:
+            raise KeyError(calculator)
+        with self._lock:
+            row = self._connect().execute(f'SELECT * FROM "designs_{calculator}" WHERE id = ?', (int(design_id),)).fetchone()
+        return self._design(calculator, row) if row is not None else None
+
+    def query(self, calculator: str, filters=(), order_by: str = None, descending: bool = False, limit: int = 100) -> list:
+        # filters: (field, operator, value) triples on any input or output field, all of which must hold,
+        # e.g. [('safety_factor', 'lt', 2), ('disc_mass', 'lt', 1)]
+        if calculator not in CALCULATORS:
+            raise KeyError(calculator)
+        input_columns, output_columns = _columns(calculator)
+        known = {**input_columns, **output_columns, 'times_seen': int, 'last_seen': float}
+        conditions, parameters = [], []
+        for name, operator, value in filters:
+            if name not in known:
+                raise KeyError(name)
+            if operator not in OPERATORS:
+                raise ValueError(f"Unknown operator '{operator}', expected one of {', '.join(OPERATORS)}")
+            conditions.append(f'"{name}" {OPERATORS[operator]} ?')
+            parameters.append(known[name](value) if known[name] in (float, int, str) else value)
+        sql = f'SELECT * FROM "designs_{calculator}"'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        if order_by is not None:
+            if order_by not in known:
+                raise KeyError(order_by)
+            sql += f' ORDER BY "{order_by}" {"DESC" if descending else "ASC"}'
+        else:
+            sql += ' ORDER BY id DESC'
+        with self._lock:
+            rows = self._connect().execute(sql + ' LIMIT ?', (*parameters, int(limit))).fetchall()
+        return [self._design(calculator, row) for row in rows]
+
+    def diff(self, calculator: str, first_id: int, second_id: int):
+        # Only the fields that differ, with the absolute and relative change of numeric ones
+        first, second = self.get(calculator, first_id), self.get(calculator, second_id)
+        if first is None or second is None:
+            return None
+        changes = {}
+        for group in ('inputs', 'outputs'):
+            changes[group] = {}
+            for name, old in first[group].items():
+                new = second[group][name]
+                if old == new:
+                    continue
+                change = {'from': old, 'to': new}
+                if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+                    change['change'] = new - old
+                    change['relative_change'] = (new - old) / abs(old) if old else None
+                changes[group][name] = change
+        unchanged = sum(len(first[group]) - len(changes[group]) for group in ('inputs', 'outputs'))
+        return {'calculator': calculator, 'from': first['id'], 'to': second['id'], 'unchanged_fields': unchanged, **changes}
+
+    def stats(self) -> dict:
+        with self._lock:
+            connection = self._connect()
+            stats = {'designs': {calculator: connection.execute(f'SELECT COUNT(*) FROM "designs_{calculator}"').fetchone()[0]
+                                 for calculator in CALCULATORS}}
+        stats['pending'] = self._queue.qsize() if self._queue is not None and self._writer_pid == os.getpid() else 0
+        stats['dropped'] = self.dropped
+        return stats
+
+def design_store_from_environment() -> DesignStore:
+    # DESIGN_DB_PATH='' turns recording off
+    return DesignStore(
+        path=os.environ.get('DESIGN_DB_PATH', data_path('designs.sqlite3')),
+        batch_size=int(os.environ.get('DESIGN_DB_BATCH', 500)),
+        flush_interval=float(os.environ.get('DESIGN_DB_FLUSH_INTERVAL', 0.5)),
+        max_pending=int(os.environ.get('DESIGN_DB_MAX_PENDING', 50_000)),
+    )
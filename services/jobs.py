@@ -0,0 +1,261 @@
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+
+from calculations.schema import InputError
+
+from services.studies import STUDIES
+
+# Long-running studies are queued in SQLite and run one child process per job,
+# so the queue outlives any web worker. Every worker runs a small dispatcher
+# thread; the number of running jobs is capped across all of them by claiming
+# jobs inside a write transaction. Each child is reniced, gets CPU-time and
+# address-space limits, and keeps a heartbeat; a job whose heartbeat goes stale
+# (its process died with a worker or the host) is queued again.
+
+TERMINAL_STATES = ('done', 'failed', 'cancelled')
+
+class JobQueue:
+    def __init__(self, path: str, directory: str, max_concurrent: int = 1, max_memory_mb: int = 2048,
+                 max_cpu_seconds: int = 3600, nice: int = 10, stale_after: float = 15.0,
+                 max_attempts: int = 3, poll_interval: float = 0.5):
+        self.path = path
+        self.directory = directory
+        self.max_concurrent = max_concurrent
+        self.max_memory_mb = max_memory_mb
+        self.max_cpu_seconds = max_cpu_seconds
+        self.nice = nice
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._dispatcher = None
+        self._dispatcher_pid = None
+        self._processes = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        # Reconnect after a fork: SQLite connections must not cross processes
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, priority INTEGER NOT NULL,
+                status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT, result TEXT, error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0, max_memory_mb INTEGER, max_cpu_seconds INTEGER,
+                created REAL, started REAL, finished REAL, heartbeat REAL)''')
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created)')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _execute(self, sql: str, parameters=()):
+        with self._lock:
+            return self._connect().execute(sql, parameters)
+
+    # --- Client side ---
+    def submit(self, kind: str, params: dict, priority: int = 0, max_memory_mb: int = None, max_cpu_seconds: int = None) -> str:
+        # Per-job limits may only tighten the server-wide ones
+        memory = min(max_memory_mb or self.max_memory_mb, self.max_memory_mb)
+        cpu = min(max_cpu_seconds or self.max_cpu_seconds, self.max_cpu_seconds)
+        job_id = uuid.uuid4().hex
+        self._execute('INSERT INTO jobs (id, kind, params, priority, status, max_memory_mb, max_cpu_seconds, created) '
+                      'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                      (job_id, kind, json.dumps(params), int(priority), 'queued', memory, cpu, time.time()))
+        return job_id
+
+    def get(self, job_id: str):
+        row = self._execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        job['files'] = sorted(os.listdir(self.job_directory(job_id))) if os.path.isdir(self.job_directory(job_id)) else []
+        return job
+
+    def list(self, status: str = None, limit: int = 100) -> list:
+        sql = 'SELECT id, kind, priority, status, progress, message, created, started, finished FROM jobs'
+        parameters = ()
+        if status is not None:
+            sql += ' WHERE status = ?'
+            parameters = (status,)
+        rows = self._execute(sql + ' ORDER BY created DESC LIMIT ?', (*parameters, int(limit))).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        # Queued jobs are cancelled at once; a running job's own heartbeat picks the request up
+        now = time.time()
+        cursor = self._execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'", (now, job_id))
+        if cursor.rowcount:
+            return True
+        return self._execute("UPDATE jobs SET status = 'cancelling' WHERE id = ? AND status = 'running'", (job_id,)).rowcount > 0
+
+    def events(self, job_id: str, interval: float = 0.5, lifetime: float = 30.0):
+        # Yields a snapshot whenever status, progress or message change, until the job
+        # ends or lifetime seconds pass; clients reconnect for the rest of a long job
+        last = None
+        deadline = time.monotonic() + lifetime
+        while time.monotonic() < deadline:
+            row = self._execute('SELECT id, kind, status, progress, message, error FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return
+            snapshot = dict(row)
+            if snapshot != last:
+                yield snapshot
+                last = snapshot
+            if snapshot['status'] in TERMINAL_STATES:
+                return
+            time.sleep(interval)
+
+    def job_directory(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    # --- Job side ---
+    def report(self, job_id: str, progress: float, message: str = None):
+        self._execute('UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ?',
+                      (float(progress), message, time.time(), job_id))
+
+    def _finish(self, job_id: str, status: str, result=None, error: str = None):
+        self._execute("UPDATE jobs SET status = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END, "
+                      "result = ?, error = ?, finished = ? WHERE id = ? AND status IN ('running', 'cancelling')",
+                      (status, status, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+
+    # --- Dispatcher ---
+    def start(self):
+        # One dispatcher thread per process; gunicorn.conf.py starts it in each worker
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive() or self._dispatcher_pid != os.getpid():
+                self._processes = {}
+                self._dispatcher_pid = os.getpid()
+                self._dispatcher = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self):
+        context = multiprocessing.get_context('spawn')
+        while True:
+            try:
+                self._reap()
+                self._recover()
+                while (job := self._claim()) is not None:
+                    process = context.Process(target=_run_job, daemon=True,
+                                              args=(self._settings(), job['id'], job['kind'], json.loads(job['params']),
+                                                    job['max_memory_mb'], job['max_cpu_seconds']))
+                    process.start()
+                    self._processes[job['id']] = process
+            except sqlite3.OperationalError:
+                pass  # database busy; try again on the next round
+            time.sleep(self.poll_interval)
+
+    def _settings(self) -> dict:
+        return {'path': self.path, 'directory': self.directory, 'nice': self.nice}
+
+    def _claim(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                running = connection.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('running', 'cancelling')").fetchone()[0]
+                job = None
+                if running < self.max_concurrent:
+                    job = connection.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created LIMIT 1").fetchone()
+                if job is not None:
+                    now = time.time()
+                    connection.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, started = ?, heartbeat = ? WHERE id = ?",
+                                       (now, now, job['id']))
+                connection.execute('COMMIT')
+                return job
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    def _reap(self):
+        # A child that exits without recording an outcome was killed, e.g. by its CPU limit
+        for job_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self._processes[job_id]
+            if process.exitcode == -signal.SIGXCPU:
+                self._finish(job_id, 'failed', error='CPU time limit exceeded')
+            elif process.exitcode != 0:
+                self._finish(job_id, 'failed', error=f'Job process exited with code {process.exitcode}')
+
+    def _recover(self):
+        # Jobs whose heartbeat stopped lost their process: retry them or give up
+        stale = time.time() - self.stale_after
+        with self._lock:
+            connection = self._connect()
+            connection.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running' AND heartbeat < ? AND attempts < ?",
+                               (stale, self.max_attempts))
+            connection.execute("UPDATE jobs SET status = CASE status WHEN 'cancelling' THEN 'cancelled' ELSE 'failed' END, "
+                               "error = 'Job process lost', finished = ? "
+                               "WHERE status IN ('running', 'cancelling') AND heartbeat < ?", (time.time(), stale))
+
+def _run_job(settings: dict, job_id: str, kind: str, params: dict, max_memory_mb: int, max_cpu_seconds: int):
+    # Entry point of the job's child process
+    os.nice(settings['nice'])
+    memory = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (max_cpu_seconds, max_cpu_seconds + 5))
+    queue = JobQueue(settings['path'], settings['directory'])
+    output_directory = queue.job_directory(job_id)
+    os.makedirs(output_directory, exist_ok=True)
+
+    def heartbeat():
+        while True:
+            time.sleep(2)
+            row = queue._execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is not None and row['status'] == 'cancelling':
+                queue._finish(job_id, 'cancelled')
+                os._exit(0)
+            queue._execute('UPDATE jobs SET heartbeat = ? WHERE id = ?', (time.time(), job_id))
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    last_report = 0.0
+
+    def progress(fraction: float, message: str = None):
+        # Throttled, so studies may call it as often as they like
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report >= 0.2 or fraction >= 1:
+            queue.report(job_id, min(max(fraction, 0.0), 1.0), message)
+            last_report = now
+
+    try:
+        study = STUDIES.get(kind)
+        if study is None:
+            raise InputError({'kind': f'is not a known study: {kind}'})
+        result = study(params, progress, output_directory)
+        queue._finish(job_id, 'done', result=result)
+    except MemoryError:
+        queue._finish(job_id, 'failed', error=f'Memory limit of {max_memory_mb} MB exceeded')
+    except InputError as e:
+        queue._finish(job_id, 'failed', error=f'Invalid parameters: {e}')
+    except Exception:
+        # Exception text can quote server files or internals; it goes to the log only
+        traceback.print_exc()
+        queue._finish(job_id, 'failed', error='Study failed')
+
+def job_queue_from_environment() -> JobQueue:
+    directory = os.environ.get('JOB_DIR', os.path.join(tempfile.gettempdir(), 'brake_design_jobs'))
+    return JobQueue(
+        path=os.path.join(directory, 'jobs.sqlite3'),
+        directory=directory,
+        max_concurrent=int(os.environ.get('JOB_MAX_CONCURRENT', max(1, (os.cpu_count() or 1) - 1))),
+        max_memory_mb=int(os.environ.get('JOB_MAX_MEMORY_MB', 2048)),
+        max_cpu_seconds=int(os.environ.get('JOB_MAX_CPU_SECONDS', 3600)),
+        nice=int(os.environ.get('JOB_NICE', 10)),
+    )
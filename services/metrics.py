@@ -0,0 +1,298 @@
+import atexit
+import bisect
+import cProfile
+import fcntl
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Request metrics in the Prometheus text format. Each worker keeps its counters
+# and histograms in memory and a background thread writes them to a file of its
+# own in the metrics directory every flush_interval; /metrics sums those files.
+# A worker folds its file into aggregate.json when it exits, and files left by
+# workers that died without doing so are folded in at the next scrape, so the
+# totals never go backwards and the directory does not grow with restarts.
+# When disabled every call is a no-op.
+
+PREFIX = 'brake_design'
+TIME_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+HELP = {
+    'requests_total': ('counter', 'Calculator form submissions by route and outcome (ok, cached, invalid)'),
+    'request_seconds': ('histogram', 'Time to answer a calculator form submission'),
+    'request_phase_seconds': ('histogram', 'Time spent in each phase of a calculator form submission'),
+    'validation_errors_total': ('counter', 'Rejected submissions by route and offending input field'),
+    'api_records': ('histogram', 'Records per JSON batch API request'),
+    'api_records_total': ('counter', 'JSON batch API records by calculator and outcome (ok, invalid)'),
+    'slow_request_profiles_total': ('counter', 'Profiles written for sampled requests slower than the threshold'),
+}
+
+class _NoPhases:
+    def mark(self, phase: str):
+        pass
+
+    def finish(self, outcome: str):
+        pass
+
+NO_PHASES = _NoPhases()
+
+class _Phases:
+    # Times consecutive phases of one request; finish() records the total
+    def __init__(self, metrics, route: str, profiler=None):
+        self.metrics = metrics
+        self.route = route
+        self.profiler = profiler
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.metrics.observe('request_phase_seconds', now - self.last, route=self.route, phase=phase)
+        self.last = now
+
+    def finish(self, outcome: str):
+        elapsed = time.perf_counter() - self.started
+        self.metrics.observe('request_seconds', elapsed, route=self.route)
+        self.metrics.increment('requests_total', route=self.route, outcome=outcome)
+        if self.profiler is not None:
+            self.profiler.disable()
+            if elapsed * 1000 >= self.metrics.slow_ms:
+                self.metrics.save_profile(self.profiler, self.route, elapsed)
+
+class Metrics:
+    def __init__(self, directory: str, enabled: bool = True, flush_interval: float = 1.0,
+                 profile_sample: float = 0.0, slow_ms: float = 500.0):
+        self.directory = directory
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.profile_sample = profile_sample
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._pid = None
+        self._counters = {}
+        self._histograms = {}
+        self._dirty = False
+        self._path = None
+        self._file_lock = threading.Lock()
+        self._retired = False
+
+    def _state(self):
+        # Counts belong to one process: a forked worker starts from zero with a file of its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._counters, self._histograms, self._dirty = {}, {}, False
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._path = os.path.join(self.directory, f'metrics-{os.getpid()}-{time.time_ns()}.json')
+                    threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+                    atexit.register(self._retire_own)
+                    self._pid = os.getpid()
+
+    # --- Recording ---
+    def phases(self, route: str):
+        if not self.enabled:
+            return NO_PHASES
+        self._state()
+        profiler = None
+        if self.profile_sample and random.random() < self.profile_sample:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                profiler = None  # another profiler is active in this thread
+        return _Phases(self, route, profiler)
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        self._state()
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+
+    def observe(self, name: str, value: float, buckets=TIME_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        self._state()
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': list(buckets), 'counts': [0] * (len(buckets) + 1),
+                                                     'sum': 0.0, 'count': 0}
+            histogram['counts'][bisect.bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+            self._dirty = True
+
+    def save_profile(self, profiler, route: str, elapsed: float):
+        directory = os.path.join(self.directory, 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{route}-{elapsed * 1000:.0f}ms-{os.getpid()}-{time.time_ns() % 10**9}.prof'
+        profiler.dump_stats(os.path.join(directory, name))
+        self.increment('slow_request_profiles_total', route=route)
+
+    # --- Sharing between workers ---
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        if self._pid != os.getpid() or not self._dirty:
+            return
+        with self._file_lock:
+            if self._retired:
+                return  # folded into the aggregate; writing again would count it twice
+            with self._lock:
+                snapshot = _snapshot(self._counters, self._histograms)
+                self._dirty = False
+            partial = f'{self._path}.partial'
+            with open(partial, 'w') as output:
+                json.dump(snapshot, output)
+            os.replace(partial, self._path)
+
+    @staticmethod
+    def _remove(path: str):
+        for name in (path, f'{path}.partial'):
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+
+    def _locked(self, mode: int):
+        # Held shared while summing the files and exclusively while folding one into the aggregate
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(os.path.join(self.directory, 'aggregate.lock'), 'a')
+        fcntl.flock(lock, mode)
+        return lock
+
+    def _retire_own(self):
+        if self._pid == os.getpid():
+            self.flush()
+            with self._file_lock:
+                self._retired = True
+                self._retire(self._path)
+
+    def _retire(self, path: str):
+        # Adds an exited worker's counts to aggregate.json and removes its file
+        with self._locked(fcntl.LOCK_EX):
+            snapshot = _read(path)
+            if snapshot is not None:
+                counters, histograms = {}, {}
+                for stored in (_read(os.path.join(self.directory, 'aggregate.json')), snapshot):
+                    if stored is not None:
+                        _add(counters, histograms, stored)
+                aggregate = os.path.join(self.directory, 'aggregate.json')
+                with open(f'{aggregate}.partial', 'w') as output:
+                    json.dump(_snapshot(counters, histograms), output)
+                os.replace(f'{aggregate}.partial', aggregate)
+            self._remove(path)
+
+    def collect(self) -> tuple:
+        # ({(name, labels): value}, {(name, labels): histogram}) summed over every worker file
+        # and the aggregate of the workers that have exited
+        self.flush()
+        counters, histograms = {}, {}
+        names = os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        workers = [os.path.join(self.directory, name) for name in names if name.startswith('metrics-') and name.endswith('.json')]
+        for path in workers:
+            if not _alive(int(os.path.basename(path).split('-')[1])):
+                self._retire(path)
+        if not os.path.isdir(self.directory):
+            return counters, histograms
+        with self._locked(fcntl.LOCK_SH):
+            for path in [os.path.join(self.directory, 'aggregate.json'), *workers]:
+                snapshot = _read(path)
+                if snapshot is not None:
+                    _add(counters, histograms, snapshot)
+        return counters, histograms
+
+    def exposition(self, gauges=()) -> str:
+        # Prometheus text format 0.0.4; gauges are extra (name, help, {labels tuple: value}) read at scrape time
+        counters, histograms = self.collect()
+        lines = []
+        described = set()
+
+        def describe(name, kind, text):
+            if name not in described:
+                lines.append(f'# HELP {PREFIX}_{name} {text}')
+                lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+                described.add(name)
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name, *HELP.get(name, ('counter', name)))
+            lines.append(f'{PREFIX}_{name}{_labels(labels)} {_number(value)}')
+        for (name, labels), histogram in sorted(histograms.items()):
+            describe(name, *HELP.get(name, ('histogram', name)))
+            cumulative = 0
+            for bound, count in zip([*histogram['buckets'], '+Inf'], histogram['counts']):
+                cumulative += count
+                lines.append(f'{PREFIX}_{name}_bucket{_labels(labels + (("le", _number(bound)),))} {cumulative}')
+            lines.append(f'{PREFIX}_{name}_sum{_labels(labels)} {_number(histogram["sum"])}')
+            lines.append(f'{PREFIX}_{name}_count{_labels(labels)} {histogram["count"]}')
+        for name, text, values in gauges:
+            describe(name, 'gauge', text)
+            for labels, value in sorted(values.items()):
+                lines.append(f'{PREFIX}_{name}{_labels(labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+def _snapshot(counters: dict, histograms: dict) -> dict:
+    return {
+        'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, dict(labels), {**histogram, 'counts': list(histogram['counts'])}]
+                       for (name, labels), histogram in histograms.items()],
+    }
+
+def _read(path: str):
+    try:
+        with open(path) as stored:
+            return json.load(stored)
+    except (OSError, ValueError):
+        return None  # gone, or being replaced; the next scrape reads it
+
+def _add(counters: dict, histograms: dict, snapshot: dict):
+    for name, labels, value in snapshot['counters']:
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, histogram in snapshot['histograms']:
+        key = (name, tuple(sorted(labels.items())))
+        total = histograms.get(key)
+        if total is None:
+            histograms[key] = {**histogram, 'counts': list(histogram['counts'])}
+        elif total['buckets'] == histogram['buckets']:
+            total['counts'] = [a + b for a, b in zip(total['counts'], histogram['counts'])]
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def metrics_from_environment() -> Metrics:
+    return Metrics(
+        directory=os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'brake_design_metrics')),
+        enabled=os.environ.get('METRICS_ENABLED', '1') not in ('0', 'false', 'no', ''),
+        flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0)),
+        profile_sample=float(os.environ.get('METRICS_PROFILE_SAMPLE', 0.0)),
+        slow_ms=float(os.environ.get('METRICS_SLOW_MS', 500)),
+    )
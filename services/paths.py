@@ -0,0 +1,12 @@
+import os
+
+# Files the app keeps between runs (caches, design history, jobs) live under
+# DATA_DIR, by default the 'instance' folder beside app.py. It is created on
+# first use and readable by the app's own user only.
+
+def data_path(name: str) -> str:
+    directory = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance'))
+    return os.path.join(directory, name)
+
+def make_parent(path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
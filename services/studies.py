@@ -0,0 +1,149 @@
+import os
+from dataclasses import fields, is_dataclass
+import numpy as np
+
+from calculations.catalogue import CATALOGUE
+from calculations.registry import CALCULATORS
+from calculations.results import as_dict
+from calculations.schema import InputError, schema_for
+from calculations.brakepad import BrakePadInput
+from calculations.disc import DiscInput, calculate_disc_batch
+from analysis.sweep import FullFactorial, LatinHypercube, run_sweep
+from analysis.uncertainty import LogNormal, Normal, Triangular, Uniform, propagate
+from analysis.sensitivity import morris_screening, sobol_indices
+from analysis.drive_cycle import disc_thermal_properties, read_speed_trace, simulate_drive_cycle
+from cadesign.parts import PARTS, export_part
+
+# Studies the job queue can run. Each takes the JSON parameters of the job, a
+# progress(fraction, message) callback and a directory for output files, and
+# returns a JSON-serialisable summary.
+
+def _jsonable(value):
+    if is_dataclass(value):
+        return {name: _jsonable(item) for name, item in as_dict(value).items()}
+    if isinstance(value, dict):
+        return {str(name): _jsonable(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _jsonable(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _inputs(input_class, record: dict):
+    return schema_for(input_class).parse(record)
+
+# --- Sweeps ---
+def _levels(spec):
+    # A list of levels, or catalogue ids: {'catalogue': table, 'class', 'filters': [[property, operator, value]]}
+    if isinstance(spec, dict):
+        return CATALOGUE[spec['catalogue']].select(spec.get('class'), [tuple(item) for item in spec.get('filters', ())])
+    return spec
+
+def sweep_study(params, progress, output_directory):
+    # {'calculator', 'design': {'parameters': {field or catalogue key: levels}} or {'bounds': {field: [low, high]},
+    #  'samples', 'seed'}, 'fixed', 'format': 'csv' | 'parquet', 'chunk_size', 'processes'}
+    design_spec = params['design']
+    if 'parameters' in design_spec:
+        design = FullFactorial({name: _levels(spec) for name, spec in design_spec['parameters'].items()})
+    else:
+        design = LatinHypercube(design_spec['bounds'], int(design_spec['samples']), design_spec.get('seed'))
+    output_path = os.path.join(output_directory, f"sweep.{params.get('format', 'csv')}")
+    report = run_sweep(params['calculator'], design, output_path, fixed=params.get('fixed'),
+                       chunk_size=int(params.get('chunk_size', 50_000)), processes=int(params.get('processes', 1)),
+                       progress=lambda done, total: progress(done / total, f'{done}/{total} cases'))
+    summary = _jsonable(report)
+    summary['output_path'] = os.path.basename(output_path)
+    return summary
+
+# --- Uncertainty and sensitivity ---
+DISTRIBUTIONS = {'normal': Normal, 'lognormal': LogNormal, 'uniform': Uniform, 'triangular': Triangular}
+
+def _distribution(spec: dict):
+    # {'type': 'normal', 'mean': ..., 'std': ...} and likewise for the other distributions
+    options = dict(spec)
+    return DISTRIBUTIONS[options.pop('type')](**options)
+
+def uncertainty_study(params, progress, output_directory):
+    # {'calculator', 'base': input record, 'distributions': {field: spec}, 'samples', 'target_output',
+    #  'target', 'seed', 'processes'}
+    calculator = params['calculator']
+    base = _inputs(CALCULATORS[calculator].input_class, params['base'])
+    progress(0.0, 'sampling')
+    result = propagate(calculator, base, {name: _distribution(spec) for name, spec in params['distributions'].items()},
+                       samples=int(params.get('samples', 100_000)), target_output=params.get('target_output', 'safety_factor'),
+                       target=params.get('target'), seed=params.get('seed'), processes=int(params.get('processes', 1)))
+    return _jsonable(result)
+
+def sensitivity_study(params, progress, output_directory):
+    # {'calculator', 'base': input record, 'bounds': {field: [low, high]}, 'method': 'sobol' | 'morris',
+    #  'samples' (Sobol) or 'trajectories' (Morris), 'seed', 'processes'}
+    calculator = params['calculator']
+    base = _inputs(CALCULATORS[calculator].input_class, params['base'])
+    bounds = {name: tuple(limits) for name, limits in params['bounds'].items()}
+    progress(0.0, 'evaluating')
+    if params.get('method', 'sobol') == 'morris':
+        result = morris_screening(calculator, base, bounds, trajectories=int(params.get('trajectories', 100)),
+                                  seed=params.get('seed'), processes=int(params.get('processes', 1)))
+    else:
+        result = sobol_indices(calculator, base, bounds, samples=int(params.get('samples', 4096)),
+                               seed=params.get('seed'), processes=int(params.get('processes', 1)))
+    return _jsonable(result)
+
+# --- Drive cycles ---
+def _trace_path(name: str, output_directory: str) -> str:
+    # Server-side traces are only read from the trace directory (TRACE_DIR, by default
+    # 'traces' beside the job directories); paths that leave it are rejected
+    directory = os.path.realpath(os.environ.get('TRACE_DIR', os.path.join(os.path.dirname(output_directory), 'traces')))
+    path = os.path.realpath(os.path.join(directory, str(name)))
+    if os.path.commonpath((directory, path)) != directory or not os.path.isfile(path):
+        raise InputError({'trace_path': 'must name a file in the trace directory'})
+    return path
+
+def drive_cycle_study(params, progress, output_directory):
+    # {'trace_path' (.npy or CSV in the trace directory) or 'speeds': [km/h...], 'dt', 'pad': BrakePadInput record,
+    #  'discs': [DiscInput records], plus any simulate_drive_cycle option}
+    pad = _inputs(BrakePadInput, params['pad'])
+    discs = [_inputs(DiscInput, record) for record in params['discs']]
+    table = calculate_disc_batch({field.name: np.array([getattr(disc, field.name) for disc in discs])
+                                  for field in fields(DiscInput)})
+    mass, area = disc_thermal_properties(table)
+    if 'trace_path' in params:
+        chunks = read_speed_trace(_trace_path(params['trace_path'], output_directory))
+    else:
+        chunks = [np.asarray(params['speeds'], dtype=float)]
+
+    def counted(chunks):
+        samples = 0
+        for chunk in chunks:
+            samples += len(chunk)
+            progress(0.0, f'{samples} samples')
+            yield chunk
+
+    options = {name: params[name] for name in ('number_of_discs', 'disc_heat_fraction', 'pad_mass', 'pad_specific_heat',
+                                               'ambient_temperature', 'h_static', 'h_per_speed', 'fade_temperature',
+                                               'steady_window') if name in params}
+    result = simulate_drive_cycle(counted(chunks), float(params['dt']), pad, mass,
+                                  np.array([disc.material_specific_heat for disc in discs]), area, **options)
+    return _jsonable(result)
+
+# --- CAD ---
+def cad_study(params, progress, output_directory):
+    # {'part', 'format': 'step' | 'stl', plus the part's calculator inputs and options}
+    part = PARTS[params['part']]
+    calculator = CALCULATORS[part.calculator]
+    inputs = _inputs(calculator.input_class, params)
+    dimensions = part.dimensions(inputs, calculator.function(inputs), params)
+    export_format = params.get('format', 'step')
+    progress(0.0, 'modelling')
+    export_part(params['part'], dimensions, export_format, os.path.join(output_directory, f"{params['part']}.{export_format}"))
+    return {'dimensions': dimensions}
+
+STUDIES = {
+    'sweep': sweep_study,
+    'uncertainty': uncertainty_study,
+    'sensitivity': sensitivity_study,
+    'drive_cycle': drive_cycle_study,
+    'cad': cad_study,
+}